@@ -0,0 +1,35 @@
+program HDF5_Startup_Bench;
+
+// Times THDF5Dll.Create. Build once against an eager hdf5dll.pas and once
+// against one generated with "hdf5pas.py --lazy", then compare. A lazy
+// THDF5Dll allows one instance at a time, so the loop never overlaps them.
+// No eager or lazy figures have been recorded yet: quote only timings taken
+// with this program, together with the HDF5 build they were taken against.
+
+uses SysUtils, dynlibs, hdf5dll;
+
+{$MACRO ON}
+{$DEFINE REPEATS:= 1000}
+
+var
+  keep:TLibHandle;
+  h5:THDF5Dll;
+  i:Integer;
+  start, stop:QWord;
+
+begin
+
+  // Keep the library loaded so the loop below doesn't time LoadLibrary itself
+  keep := LoadLibrary('hdf5.dll');
+
+  start := GetTickCount64();
+  for i := 1 to REPEATS do begin
+    h5 := THDF5Dll.Create('hdf5.dll');
+    h5.Free();
+  end;
+  stop := GetTickCount64();
+
+  writeln('THDF5Dll.Create: ', (stop - start) * 1000.0 / REPEATS:0:1, ' us per call');
+
+  UnloadLibrary(keep);
+end.
@@ -0,0 +1,126 @@
+program OMX_SWMR_Test;
+
+// One SWMR writer and one SWMR reader on the same matrix. Run without
+// arguments: the program creates the file for SWMR writing, starts itself
+// again as the reader ("OMX_SWMR_Test read <file>") and writes the rows one
+// by one, flushing after each. The reader refreshes until it sees the last
+// row, then checks every row. The exit code is the reader's: 0 if it saw
+// the whole matrix as written. Needs HDF5 1.10 or later.
+
+uses SysUtils, Process, omxmatrix;
+
+{$MACRO ON}
+{$DEFINE ROWS:= 200}
+{$DEFINE COLS:= 50}
+{$DEFINE TIMEOUT_MS:= 60000}
+
+var
+  fileName:String;
+  rowData:array[0..COLS-1] of Double;
+
+function expected(row:Integer; col:Integer):Double;
+begin
+  result := row * 1000.0 + col;
+end;
+
+function runReader():Integer;
+var
+  omx:TOMXMatrix;
+  row, col:Integer;
+  start:QWord;
+begin
+  result := 1;
+  omx := TOMXMatrix.Create();
+  omx.openFile(fileName, OMX_OPEN_SWMR_READ);
+  if (not omx.isOMX()) then begin
+    writeln('reader: cannot open ', fileName);
+    exit;
+  end;
+
+  // Follow the writer until its last row arrives
+  start := GetTickCount64();
+  repeat
+    omx.refresh();
+    omx.getRow('Test', ROWS, @(rowData[0]));
+    if (rowData[COLS-1] = expected(ROWS, COLS)) then break;
+    Sleep(10);
+  until (GetTickCount64() - start > TIMEOUT_MS);
+
+  if (omx.getRows() <> ROWS) or (omx.getCols() <> COLS) then begin
+    writeln('reader: size ', omx.getRows(), 'x', omx.getCols(), ' after refresh');
+    omx.closeFile();
+    exit;
+  end;
+
+  for row := 1 to ROWS do begin
+    omx.getRow('Test', row, @(rowData[0]));
+    for col := 1 to COLS do begin
+      if (rowData[col-1] <> expected(row, col)) then begin
+        writeln('reader: row ', row, ' col ', col, ' is ', rowData[col-1]:0:1, ', not ', expected(row, col):0:1);
+        omx.closeFile();
+        exit;
+      end;
+    end;
+  end;
+
+  omx.closeFile();
+  writeln('reader: saw all ', ROWS, ' rows');
+  result := 0;
+end;
+
+function runWriter():Integer;
+var
+  omx:TOMXMatrix;
+  options:TOMXCreateOptions;
+  reader:TProcess;
+  tableNames:array[1..1] of string;
+  row, col:Integer;
+begin
+  tableNames[1] := 'Test';
+  options := OMXRowOptions();
+  options.swmr := true;
+
+  omx := TOMXMatrix.CreateNew(1, ROWS, COLS, tableNames, fileName, 64, options);
+  if (not omx.isOMX()) then begin
+    writeln('writer: cannot create ', fileName);
+    exit(1);
+  end;
+
+  // SWMR writing has started, so the reader may open the file now
+  reader := TProcess.Create(nil);
+  reader.Executable := ParamStr(0);
+  reader.Parameters.Add('read');
+  reader.Parameters.Add(fileName);
+  reader.Execute();
+
+  for row := 1 to ROWS do begin
+    for col := 1 to COLS do begin
+      rowData[col-1] := expected(row, col);
+    end;
+    omx.writeRow('Test', row, @(rowData[0]));
+    omx.flush();
+    Sleep(5);
+  end;
+
+  reader.WaitOnExit();
+  result := reader.ExitStatus;
+  reader.Free();
+
+  omx.closeFile();
+  DeleteFile(fileName);
+end;
+
+begin
+  if (ParamCount() >= 2) and (ParamStr(1) = 'read') then begin
+    fileName := ParamStr(2);
+    ExitCode := runReader();
+  end else begin
+    fileName := GetTempDir() + 'omx-swmr-test.omx';
+    ExitCode := runWriter();
+    if (ExitCode = 0) then begin
+      writeln('Finished OMX_SWMR_Test.');
+    end else begin
+      writeln('OMX_SWMR_Test FAILED.');
+    end;
+  end;
+end.
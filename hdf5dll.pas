@@ -1929,6 +1929,7 @@ type
     TH5Dget_create_plist = function(dset_id: hid_t): hid_t; cdecl;
     TH5Dget_access_plist = function(dset_id: hid_t): hid_t; cdecl;
     TH5Dget_storage_size = function(dset_id: hid_t): hsize_t; cdecl;
+    TH5Dget_chunk_storage_size = function(dset_id: hid_t; offset: Phsize_t; chunk_bytes: Phsize_t): herr_t; cdecl;
     TH5Dget_offset = function(dset_id: hid_t): haddr_t; cdecl;
     TH5Dread = function(dset_id: hid_t; mem_type_id: hid_t; mem_space_id: hid_t; file_space_id: hid_t; plist_id: hid_t; buf: Pointer): herr_t; cdecl;
     TH5Dwrite = function(dset_id: hid_t; mem_type_id: hid_t; mem_space_id: hid_t; file_space_id: hid_t; plist_id: hid_t; buf: Pointer): herr_t; cdecl;
@@ -2315,6 +2316,11 @@ type
     TH5Pfree_merge_committed_dtype_paths = function(plist_id: hid_t): herr_t; cdecl;
     TH5Pset_mcdt_search_cb = function(plist_id: hid_t; func: H5O_mcdt_search_cb_t; op_data: Pointer): herr_t; cdecl;
     TH5Pget_mcdt_search_cb = function(plist_id: hid_t; func: PH5O_mcdt_search_cb_t; op_data: PPointer): herr_t; cdecl;
+    TH5FD_core_init = function: hid_t; cdecl;
+    TH5Pset_fapl_core = function(fapl_id: hid_t; increment: size_t; backing_store: hbool_t): herr_t; cdecl;
+    TH5Pget_fapl_core = function(fapl_id: hid_t; increment: Psize_t; backing_store: Phbool_t): herr_t; cdecl;
+    TH5FD_sec2_init = function: hid_t; cdecl;
+    TH5Pset_fapl_sec2 = function(fapl_id: hid_t): herr_t; cdecl;
 
   private
     FHandle: THandle;
@@ -2523,6 +2529,7 @@ type
     FH5Dget_create_plist: TH5Dget_create_plist;
     FH5Dget_access_plist: TH5Dget_access_plist;
     FH5Dget_storage_size: TH5Dget_storage_size;
+    FH5Dget_chunk_storage_size: TH5Dget_chunk_storage_size;
     FH5Dget_offset: TH5Dget_offset;
     FH5Dread: TH5Dread;
     FH5Dwrite: TH5Dwrite;
@@ -2943,6 +2950,11 @@ type
     FH5Pfree_merge_committed_dtype_paths: TH5Pfree_merge_committed_dtype_paths;
     FH5Pset_mcdt_search_cb: TH5Pset_mcdt_search_cb;
     FH5Pget_mcdt_search_cb: TH5Pget_mcdt_search_cb;
+    FH5FD_core_init: TH5FD_core_init;
+    FH5Pset_fapl_core: TH5Pset_fapl_core;
+    FH5Pget_fapl_core: TH5Pget_fapl_core;
+    FH5FD_sec2_init: TH5FD_sec2_init;
+    FH5Pset_fapl_sec2: TH5Pset_fapl_sec2;
 
   public
     constructor Create(APath: string);
@@ -3194,6 +3206,7 @@ type
     property H5Dget_create_plist: TH5Dget_create_plist read FH5Dget_create_plist;
     property H5Dget_access_plist: TH5Dget_access_plist read FH5Dget_access_plist;
     property H5Dget_storage_size: TH5Dget_storage_size read FH5Dget_storage_size;
+    property H5Dget_chunk_storage_size: TH5Dget_chunk_storage_size read FH5Dget_chunk_storage_size;
     property H5Dget_offset: TH5Dget_offset read FH5Dget_offset;
     property H5Dread: TH5Dread read FH5Dread;
     property H5Dwrite: TH5Dwrite read FH5Dwrite;
@@ -3614,6 +3627,11 @@ type
     property H5Pfree_merge_committed_dtype_paths: TH5Pfree_merge_committed_dtype_paths read FH5Pfree_merge_committed_dtype_paths;
     property H5Pset_mcdt_search_cb: TH5Pset_mcdt_search_cb read FH5Pset_mcdt_search_cb;
     property H5Pget_mcdt_search_cb: TH5Pget_mcdt_search_cb read FH5Pget_mcdt_search_cb;
+    property H5FD_core_init: TH5FD_core_init read FH5FD_core_init;
+    property H5Pset_fapl_core: TH5Pset_fapl_core read FH5Pset_fapl_core;
+    property H5Pget_fapl_core: TH5Pget_fapl_core read FH5Pget_fapl_core;
+    property H5FD_sec2_init: TH5FD_sec2_init read FH5FD_sec2_init;
+    property H5Pset_fapl_sec2: TH5Pset_fapl_sec2 read FH5Pset_fapl_sec2;
 
     property Handle: THandle read FHandle;
     function IsValid: Boolean;
@@ -3754,6 +3772,7 @@ begin
   @FH5Dget_create_plist := GetDllProc(FHandle, 'H5Dget_create_plist');
   @FH5Dget_access_plist := GetDllProc(FHandle, 'H5Dget_access_plist');
   @FH5Dget_storage_size := GetDllProc(FHandle, 'H5Dget_storage_size');
+  @FH5Dget_chunk_storage_size := GetProcAddress(FHandle, 'H5Dget_chunk_storage_size');  // optional
   @FH5Dget_offset := GetDllProc(FHandle, 'H5Dget_offset');
   @FH5Dread := GetDllProc(FHandle, 'H5Dread');
   @FH5Dwrite := GetDllProc(FHandle, 'H5Dwrite');
@@ -4139,6 +4158,11 @@ begin
   @FH5Pfree_merge_committed_dtype_paths := GetDllProc(FHandle, 'H5Pfree_merge_committed_dtype_paths');
   @FH5Pset_mcdt_search_cb := GetDllProc(FHandle, 'H5Pset_mcdt_search_cb');
   @FH5Pget_mcdt_search_cb := GetDllProc(FHandle, 'H5Pget_mcdt_search_cb');
+  @FH5FD_core_init := GetDllProc(FHandle, 'H5FD_core_init');
+  @FH5Pset_fapl_core := GetDllProc(FHandle, 'H5Pset_fapl_core');
+  @FH5Pget_fapl_core := GetDllProc(FHandle, 'H5Pget_fapl_core');
+  @FH5FD_sec2_init := GetDllProc(FHandle, 'H5FD_sec2_init');
+  @FH5Pset_fapl_sec2 := GetDllProc(FHandle, 'H5Pset_fapl_sec2');
 
   H5open;
   FH5T_IEEE_F32BE := Phid_t(GetDllProc(FHandle, 'H5T_IEEE_F32BE_g'))^;
@@ -0,0 +1,550 @@
+unit hdf5hldll;
+
+{$MODE DELPHI}
+
+// Delphi wrapper for HDF5 high-level library.
+
+// Auto-generated 2026-10-16 by hdf5pas.py.
+
+interface
+
+uses
+  windows, hdf5dll;
+
+{$ALIGN ON}
+{$MINENUMSIZE 4}
+
+const
+  DIMENSION_SCALE_CLASS = 'DIMENSION_SCALE';
+  DIMENSION_LIST = 'DIMENSION_LIST';
+  REFERENCE_LIST = 'REFERENCE_LIST';
+  DIMENSION_LABELS = 'DIMENSION_LABELS';
+type
+  H5DS_iterate_t = function(dset: hid_t; dim: Cardinal; scale: hid_t; visitor_data: Pointer): herr_t; cdecl;
+  PH5DS_iterate_t = ^H5DS_iterate_t;
+
+(* Flag definitions for H5LTopen_file_image() *)
+const
+  H5LT_FILE_IMAGE_OPEN_RW = 1;  (* Open image for read-write *)
+  H5LT_FILE_IMAGE_DONT_COPY = 2;  (* The HDF5 lib won't copy *)
+(* user supplied image buffer. The same image is open with the core driver.  *)
+  H5LT_FILE_IMAGE_DONT_RELEASE = 4;  (* The HDF5 lib won't *)
+(* deallocate user supplied image buffer. The user application is reponsible *)
+(* for doing so.                                                             *)
+  H5LT_FILE_IMAGE_ALL = 7;
+type
+  PH5LT_lang_t = ^H5LT_lang_t;
+  H5LT_lang_t =
+    (H5LT_LANG_ERR = -1,  (* this is the first *)
+     H5LT_DDL,  (* for DDL *)
+     H5LT_C = 1,  (* for C *)
+     H5LT_FORTRAN = 2,  (* for Fortran *)
+     H5LT_NO_LANG = 3);  (* this is the last *)
+
+type
+  THDF5HLDll = class
+  private
+  type
+    TH5DOappend = function(dset_id: hid_t; dxpl_id: hid_t; axis: Cardinal; extension: size_t; memtype: hid_t; buf: Pointer): herr_t; cdecl;
+    TH5DOwrite_chunk = function(dset_id: hid_t; dxpl_id: hid_t; filters: uint32_t; offset: Phsize_t; data_size: size_t; buf: Pointer): herr_t; cdecl;
+    TH5DOread_chunk = function(dset_id: hid_t; dxpl_id: hid_t; offset: Phsize_t; filters: Puint32_t; buf: Pointer): herr_t; cdecl;
+    TH5DSattach_scale = function(did: hid_t; dsid: hid_t; idx: Cardinal): herr_t; cdecl;
+    TH5DSdetach_scale = function(did: hid_t; dsid: hid_t; idx: Cardinal): herr_t; cdecl;
+    TH5DSset_scale = function(dsid: hid_t; dimname: PAnsiChar): herr_t; cdecl;
+    TH5DSget_num_scales = function(did: hid_t; dim: Cardinal): Integer; cdecl;
+    TH5DSset_label = function(did: hid_t; idx: Cardinal; label_: PAnsiChar): herr_t; cdecl;
+    TH5DSget_label = function(did: hid_t; idx: Cardinal; label_: PAnsiChar; size: size_t): ssize_t; cdecl;
+    TH5DSget_scale_name = function(did: hid_t; name: PAnsiChar; size: size_t): ssize_t; cdecl;
+    TH5DSis_scale = function(did: hid_t): htri_t; cdecl;
+    TH5DSiterate_scales = function(did: hid_t; dim: Cardinal; idx: PInteger; visitor: H5DS_iterate_t; visitor_data: Pointer): herr_t; cdecl;
+    TH5DSis_attached = function(did: hid_t; dsid: hid_t; idx: Cardinal): htri_t; cdecl;
+    TH5LTmake_dataset = function(loc_id: hid_t; dset_name: PAnsiChar; rank: Integer; dims: Phsize_t; type_id: hid_t; buffer: Pointer): herr_t; cdecl;
+    TH5LTmake_dataset_char = function(loc_id: hid_t; dset_name: PAnsiChar; rank: Integer; dims: Phsize_t; buffer: PAnsiChar): herr_t; cdecl;
+    TH5LTmake_dataset_short = function(loc_id: hid_t; dset_name: PAnsiChar; rank: Integer; dims: Phsize_t; buffer: PShortInt): herr_t; cdecl;
+    TH5LTmake_dataset_int = function(loc_id: hid_t; dset_name: PAnsiChar; rank: Integer; dims: Phsize_t; buffer: PInteger): herr_t; cdecl;
+    TH5LTmake_dataset_long = function(loc_id: hid_t; dset_name: PAnsiChar; rank: Integer; dims: Phsize_t; buffer: PInteger): herr_t; cdecl;
+    TH5LTmake_dataset_float = function(loc_id: hid_t; dset_name: PAnsiChar; rank: Integer; dims: Phsize_t; buffer: PSingle): herr_t; cdecl;
+    TH5LTmake_dataset_double = function(loc_id: hid_t; dset_name: PAnsiChar; rank: Integer; dims: Phsize_t; buffer: PDouble): herr_t; cdecl;
+    TH5LTmake_dataset_string = function(loc_id: hid_t; dset_name: PAnsiChar; buf: PAnsiChar): herr_t; cdecl;
+    TH5LTread_dataset = function(loc_id: hid_t; dset_name: PAnsiChar; type_id: hid_t; buffer: Pointer): herr_t; cdecl;
+    TH5LTread_dataset_char = function(loc_id: hid_t; dset_name: PAnsiChar; buffer: PAnsiChar): herr_t; cdecl;
+    TH5LTread_dataset_short = function(loc_id: hid_t; dset_name: PAnsiChar; buffer: PShortInt): herr_t; cdecl;
+    TH5LTread_dataset_int = function(loc_id: hid_t; dset_name: PAnsiChar; buffer: PInteger): herr_t; cdecl;
+    TH5LTread_dataset_long = function(loc_id: hid_t; dset_name: PAnsiChar; buffer: PInteger): herr_t; cdecl;
+    TH5LTread_dataset_float = function(loc_id: hid_t; dset_name: PAnsiChar; buffer: PSingle): herr_t; cdecl;
+    TH5LTread_dataset_double = function(loc_id: hid_t; dset_name: PAnsiChar; buffer: PDouble): herr_t; cdecl;
+    TH5LTread_dataset_string = function(loc_id: hid_t; dset_name: PAnsiChar; buf: PAnsiChar): herr_t; cdecl;
+    TH5LTget_dataset_ndims = function(loc_id: hid_t; dset_name: PAnsiChar; rank: PInteger): herr_t; cdecl;
+    TH5LTget_dataset_info = function(loc_id: hid_t; dset_name: PAnsiChar; dims: Phsize_t; type_class: PH5T_class_t; type_size: Psize_t): herr_t; cdecl;
+    TH5LTfind_dataset = function(loc_id: hid_t; name: PAnsiChar): herr_t; cdecl;
+    TH5LTset_attribute_string = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; attr_data: PAnsiChar): herr_t; cdecl;
+    TH5LTset_attribute_char = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PAnsiChar; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_uchar = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PByte; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_short = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PShortInt; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_ushort = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PWord; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_int = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PInteger; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_uint = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PCardinal; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_long = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PInteger; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_long_long = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PInteger; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_ulong = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PCardinal; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_float = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PSingle; size: size_t): herr_t; cdecl;
+    TH5LTset_attribute_double = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; buffer: PDouble; size: size_t): herr_t; cdecl;
+    TH5LTget_attribute = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; mem_type_id: hid_t; data: Pointer): herr_t; cdecl;
+    TH5LTget_attribute_string = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PAnsiChar): herr_t; cdecl;
+    TH5LTget_attribute_char = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PAnsiChar): herr_t; cdecl;
+    TH5LTget_attribute_uchar = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PByte): herr_t; cdecl;
+    TH5LTget_attribute_short = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PShortInt): herr_t; cdecl;
+    TH5LTget_attribute_ushort = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PWord): herr_t; cdecl;
+    TH5LTget_attribute_int = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PInteger): herr_t; cdecl;
+    TH5LTget_attribute_uint = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PCardinal): herr_t; cdecl;
+    TH5LTget_attribute_long = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PInteger): herr_t; cdecl;
+    TH5LTget_attribute_long_long = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PInteger): herr_t; cdecl;
+    TH5LTget_attribute_ulong = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PCardinal): herr_t; cdecl;
+    TH5LTget_attribute_float = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PSingle): herr_t; cdecl;
+    TH5LTget_attribute_double = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; data: PDouble): herr_t; cdecl;
+    TH5LTget_attribute_ndims = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; rank: PInteger): herr_t; cdecl;
+    TH5LTget_attribute_info = function(loc_id: hid_t; obj_name: PAnsiChar; attr_name: PAnsiChar; dims: Phsize_t; type_class: PH5T_class_t; type_size: Psize_t): herr_t; cdecl;
+    TH5LTtext_to_dtype = function(text: PAnsiChar; lang_type: H5LT_lang_t): hid_t; cdecl;
+    TH5LTdtype_to_text = function(dtype: hid_t; str: PAnsiChar; lang_type: H5LT_lang_t; len: Psize_t): herr_t; cdecl;
+    TH5LTfind_attribute = function(loc_id: hid_t; name: PAnsiChar): herr_t; cdecl;
+    TH5LTpath_valid = function(loc_id: hid_t; path: PAnsiChar; check_object_valid: hbool_t): htri_t; cdecl;
+    TH5LTopen_file_image = function(buf_ptr: Pointer; buf_size: size_t; flags: Cardinal): hid_t; cdecl;
+    TH5IMmake_image_8bit = function(loc_id: hid_t; dset_name: PAnsiChar; width: hsize_t; height: hsize_t; buffer: PByte): herr_t; cdecl;
+    TH5IMmake_image_24bit = function(loc_id: hid_t; dset_name: PAnsiChar; width: hsize_t; height: hsize_t; interlace: PAnsiChar; buffer: PByte): herr_t; cdecl;
+    TH5IMget_image_info = function(loc_id: hid_t; dset_name: PAnsiChar; width: Phsize_t; height: Phsize_t; planes: Phsize_t; interlace: PAnsiChar; npals: Phssize_t): herr_t; cdecl;
+    TH5IMread_image = function(loc_id: hid_t; dset_name: PAnsiChar; buffer: PByte): herr_t; cdecl;
+    TH5IMmake_palette = function(loc_id: hid_t; pal_name: PAnsiChar; pal_dims: Phsize_t; pal_data: PByte): herr_t; cdecl;
+    TH5IMlink_palette = function(loc_id: hid_t; image_name: PAnsiChar; pal_name: PAnsiChar): herr_t; cdecl;
+    TH5IMunlink_palette = function(loc_id: hid_t; image_name: PAnsiChar; pal_name: PAnsiChar): herr_t; cdecl;
+    TH5IMget_npalettes = function(loc_id: hid_t; image_name: PAnsiChar; npals: Phssize_t): herr_t; cdecl;
+    TH5IMget_palette_info = function(loc_id: hid_t; image_name: PAnsiChar; pal_number: Integer; pal_dims: Phsize_t): herr_t; cdecl;
+    TH5IMget_palette = function(loc_id: hid_t; image_name: PAnsiChar; pal_number: Integer; pal_data: PByte): herr_t; cdecl;
+    TH5IMis_image = function(loc_id: hid_t; dset_name: PAnsiChar): herr_t; cdecl;
+    TH5IMis_palette = function(loc_id: hid_t; dset_name: PAnsiChar): herr_t; cdecl;
+    TH5TBmake_table = function(table_title: PAnsiChar; loc_id: hid_t; dset_name: PAnsiChar; nfields: hsize_t; nrecords: hsize_t; type_size: size_t; field_names: PPAnsiChar; field_offset: Psize_t; field_types: Phid_t; chunk_size: hsize_t; fill_data: Pointer; compress: Integer; buf: Pointer): herr_t; cdecl;
+    TH5TBappend_records = function(loc_id: hid_t; dset_name: PAnsiChar; nrecords: hsize_t; type_size: size_t; field_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBwrite_records = function(loc_id: hid_t; dset_name: PAnsiChar; start: hsize_t; nrecords: hsize_t; type_size: size_t; field_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBwrite_fields_name = function(loc_id: hid_t; dset_name: PAnsiChar; field_names: PAnsiChar; start: hsize_t; nrecords: hsize_t; type_size: size_t; field_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBwrite_fields_index = function(loc_id: hid_t; dset_name: PAnsiChar; nfields: hsize_t; field_index: PInteger; start: hsize_t; nrecords: hsize_t; type_size: size_t; field_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBread_table = function(loc_id: hid_t; dset_name: PAnsiChar; dst_size: size_t; dst_offset: Psize_t; dst_sizes: Psize_t; dst_buf: Pointer): herr_t; cdecl;
+    TH5TBread_fields_name = function(loc_id: hid_t; dset_name: PAnsiChar; field_names: PAnsiChar; start: hsize_t; nrecords: hsize_t; type_size: size_t; field_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBread_fields_index = function(loc_id: hid_t; dset_name: PAnsiChar; nfields: hsize_t; field_index: PInteger; start: hsize_t; nrecords: hsize_t; type_size: size_t; field_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBread_records = function(loc_id: hid_t; dset_name: PAnsiChar; start: hsize_t; nrecords: hsize_t; type_size: size_t; dst_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBget_table_info = function(loc_id: hid_t; dset_name: PAnsiChar; nfields: Phsize_t; nrecords: Phsize_t): herr_t; cdecl;
+    TH5TBget_field_info = function(loc_id: hid_t; dset_name: PAnsiChar; field_names: PPAnsiChar; field_sizes: Psize_t; field_offsets: Psize_t; type_size: Psize_t): herr_t; cdecl;
+    TH5TBdelete_record = function(loc_id: hid_t; dset_name: PAnsiChar; start: hsize_t; nrecords: hsize_t): herr_t; cdecl;
+    TH5TBinsert_record = function(loc_id: hid_t; dset_name: PAnsiChar; start: hsize_t; nrecords: hsize_t; dst_size: size_t; dst_offset: Psize_t; dst_sizes: Psize_t; buf: Pointer): herr_t; cdecl;
+    TH5TBadd_records_from = function(loc_id: hid_t; dset_name1: PAnsiChar; start1: hsize_t; nrecords: hsize_t; dset_name2: PAnsiChar; start2: hsize_t): herr_t; cdecl;
+    TH5TBcombine_tables = function(loc_id1: hid_t; dset_name1: PAnsiChar; loc_id2: hid_t; dset_name2: PAnsiChar; dset_name3: PAnsiChar): herr_t; cdecl;
+    TH5TBinsert_field = function(loc_id: hid_t; dset_name: PAnsiChar; field_name: PAnsiChar; field_type: hid_t; position: hsize_t; fill_data: Pointer; buf: Pointer): herr_t; cdecl;
+    TH5TBdelete_field = function(loc_id: hid_t; dset_name: PAnsiChar; field_name: PAnsiChar): herr_t; cdecl;
+    TH5TBAget_title = function(loc_id: hid_t; table_title: PAnsiChar): herr_t; cdecl;
+    TH5TBAget_fill = function(loc_id: hid_t; dset_name: PAnsiChar; dset_id: hid_t; dst_buf: PByte): htri_t; cdecl;
+    TH5PTcreate = function(loc_id: hid_t; dset_name: PAnsiChar; dtype_id: hid_t; chunk_size: hsize_t; plist_id: hid_t): hid_t; cdecl;
+    TH5PTopen = function(loc_id: hid_t; dset_name: PAnsiChar): hid_t; cdecl;
+    TH5PTclose = function(table_id: hid_t): herr_t; cdecl;
+    TH5PTcreate_fl = function(loc_id: hid_t; dset_name: PAnsiChar; dtype_id: hid_t; chunk_size: hsize_t; compression: Integer): hid_t; cdecl;
+    TH5PTappend = function(table_id: hid_t; nrecords: size_t; data: Pointer): herr_t; cdecl;
+    TH5PTget_next = function(table_id: hid_t; nrecords: size_t; data: Pointer): herr_t; cdecl;
+    TH5PTread_packets = function(table_id: hid_t; start: hsize_t; nrecords: size_t; data: Pointer): herr_t; cdecl;
+    TH5PTget_num_packets = function(table_id: hid_t; nrecords: Phsize_t): herr_t; cdecl;
+    TH5PTis_valid = function(table_id: hid_t): herr_t; cdecl;
+    TH5PTis_varlen = function(table_id: hid_t): herr_t; cdecl;
+    TH5PTget_dataset = function(table_id: hid_t): hid_t; cdecl;
+    TH5PTget_type = function(table_id: hid_t): hid_t; cdecl;
+    TH5PTcreate_index = function(table_id: hid_t): herr_t; cdecl;
+    TH5PTset_index = function(table_id: hid_t; pt_index: hsize_t): herr_t; cdecl;
+    TH5PTget_index = function(table_id: hid_t; pt_index: Phsize_t): herr_t; cdecl;
+    TH5PTfree_vlen_buff = function(table_id: hid_t; bufflen: size_t; buff: Pointer): herr_t; cdecl;
+    TH5LDget_dset_dims = function(did: hid_t; cur_dims: Phsize_t): herr_t; cdecl;
+    TH5LDget_dset_type_size = function(did: hid_t; fields: PAnsiChar): size_t; cdecl;
+    TH5LDget_dset_elmts = function(did: hid_t; prev_dims: Phsize_t; cur_dims: Phsize_t; fields: PAnsiChar; buf: Pointer): herr_t; cdecl;
+
+  private
+    FHandle: THandle;
+
+    FH5DOappend: TH5DOappend;
+    FH5DOwrite_chunk: TH5DOwrite_chunk;
+    FH5DOread_chunk: TH5DOread_chunk;
+    FH5DSattach_scale: TH5DSattach_scale;
+    FH5DSdetach_scale: TH5DSdetach_scale;
+    FH5DSset_scale: TH5DSset_scale;
+    FH5DSget_num_scales: TH5DSget_num_scales;
+    FH5DSset_label: TH5DSset_label;
+    FH5DSget_label: TH5DSget_label;
+    FH5DSget_scale_name: TH5DSget_scale_name;
+    FH5DSis_scale: TH5DSis_scale;
+    FH5DSiterate_scales: TH5DSiterate_scales;
+    FH5DSis_attached: TH5DSis_attached;
+    FH5LTmake_dataset: TH5LTmake_dataset;
+    FH5LTmake_dataset_char: TH5LTmake_dataset_char;
+    FH5LTmake_dataset_short: TH5LTmake_dataset_short;
+    FH5LTmake_dataset_int: TH5LTmake_dataset_int;
+    FH5LTmake_dataset_long: TH5LTmake_dataset_long;
+    FH5LTmake_dataset_float: TH5LTmake_dataset_float;
+    FH5LTmake_dataset_double: TH5LTmake_dataset_double;
+    FH5LTmake_dataset_string: TH5LTmake_dataset_string;
+    FH5LTread_dataset: TH5LTread_dataset;
+    FH5LTread_dataset_char: TH5LTread_dataset_char;
+    FH5LTread_dataset_short: TH5LTread_dataset_short;
+    FH5LTread_dataset_int: TH5LTread_dataset_int;
+    FH5LTread_dataset_long: TH5LTread_dataset_long;
+    FH5LTread_dataset_float: TH5LTread_dataset_float;
+    FH5LTread_dataset_double: TH5LTread_dataset_double;
+    FH5LTread_dataset_string: TH5LTread_dataset_string;
+    FH5LTget_dataset_ndims: TH5LTget_dataset_ndims;
+    FH5LTget_dataset_info: TH5LTget_dataset_info;
+    FH5LTfind_dataset: TH5LTfind_dataset;
+    FH5LTset_attribute_string: TH5LTset_attribute_string;
+    FH5LTset_attribute_char: TH5LTset_attribute_char;
+    FH5LTset_attribute_uchar: TH5LTset_attribute_uchar;
+    FH5LTset_attribute_short: TH5LTset_attribute_short;
+    FH5LTset_attribute_ushort: TH5LTset_attribute_ushort;
+    FH5LTset_attribute_int: TH5LTset_attribute_int;
+    FH5LTset_attribute_uint: TH5LTset_attribute_uint;
+    FH5LTset_attribute_long: TH5LTset_attribute_long;
+    FH5LTset_attribute_long_long: TH5LTset_attribute_long_long;
+    FH5LTset_attribute_ulong: TH5LTset_attribute_ulong;
+    FH5LTset_attribute_float: TH5LTset_attribute_float;
+    FH5LTset_attribute_double: TH5LTset_attribute_double;
+    FH5LTget_attribute: TH5LTget_attribute;
+    FH5LTget_attribute_string: TH5LTget_attribute_string;
+    FH5LTget_attribute_char: TH5LTget_attribute_char;
+    FH5LTget_attribute_uchar: TH5LTget_attribute_uchar;
+    FH5LTget_attribute_short: TH5LTget_attribute_short;
+    FH5LTget_attribute_ushort: TH5LTget_attribute_ushort;
+    FH5LTget_attribute_int: TH5LTget_attribute_int;
+    FH5LTget_attribute_uint: TH5LTget_attribute_uint;
+    FH5LTget_attribute_long: TH5LTget_attribute_long;
+    FH5LTget_attribute_long_long: TH5LTget_attribute_long_long;
+    FH5LTget_attribute_ulong: TH5LTget_attribute_ulong;
+    FH5LTget_attribute_float: TH5LTget_attribute_float;
+    FH5LTget_attribute_double: TH5LTget_attribute_double;
+    FH5LTget_attribute_ndims: TH5LTget_attribute_ndims;
+    FH5LTget_attribute_info: TH5LTget_attribute_info;
+    FH5LTtext_to_dtype: TH5LTtext_to_dtype;
+    FH5LTdtype_to_text: TH5LTdtype_to_text;
+    FH5LTfind_attribute: TH5LTfind_attribute;
+    FH5LTpath_valid: TH5LTpath_valid;
+    FH5LTopen_file_image: TH5LTopen_file_image;
+    FH5IMmake_image_8bit: TH5IMmake_image_8bit;
+    FH5IMmake_image_24bit: TH5IMmake_image_24bit;
+    FH5IMget_image_info: TH5IMget_image_info;
+    FH5IMread_image: TH5IMread_image;
+    FH5IMmake_palette: TH5IMmake_palette;
+    FH5IMlink_palette: TH5IMlink_palette;
+    FH5IMunlink_palette: TH5IMunlink_palette;
+    FH5IMget_npalettes: TH5IMget_npalettes;
+    FH5IMget_palette_info: TH5IMget_palette_info;
+    FH5IMget_palette: TH5IMget_palette;
+    FH5IMis_image: TH5IMis_image;
+    FH5IMis_palette: TH5IMis_palette;
+    FH5TBmake_table: TH5TBmake_table;
+    FH5TBappend_records: TH5TBappend_records;
+    FH5TBwrite_records: TH5TBwrite_records;
+    FH5TBwrite_fields_name: TH5TBwrite_fields_name;
+    FH5TBwrite_fields_index: TH5TBwrite_fields_index;
+    FH5TBread_table: TH5TBread_table;
+    FH5TBread_fields_name: TH5TBread_fields_name;
+    FH5TBread_fields_index: TH5TBread_fields_index;
+    FH5TBread_records: TH5TBread_records;
+    FH5TBget_table_info: TH5TBget_table_info;
+    FH5TBget_field_info: TH5TBget_field_info;
+    FH5TBdelete_record: TH5TBdelete_record;
+    FH5TBinsert_record: TH5TBinsert_record;
+    FH5TBadd_records_from: TH5TBadd_records_from;
+    FH5TBcombine_tables: TH5TBcombine_tables;
+    FH5TBinsert_field: TH5TBinsert_field;
+    FH5TBdelete_field: TH5TBdelete_field;
+    FH5TBAget_title: TH5TBAget_title;
+    FH5TBAget_fill: TH5TBAget_fill;
+    FH5PTcreate: TH5PTcreate;
+    FH5PTopen: TH5PTopen;
+    FH5PTclose: TH5PTclose;
+    FH5PTcreate_fl: TH5PTcreate_fl;
+    FH5PTappend: TH5PTappend;
+    FH5PTget_next: TH5PTget_next;
+    FH5PTread_packets: TH5PTread_packets;
+    FH5PTget_num_packets: TH5PTget_num_packets;
+    FH5PTis_valid: TH5PTis_valid;
+    FH5PTis_varlen: TH5PTis_varlen;
+    FH5PTget_dataset: TH5PTget_dataset;
+    FH5PTget_type: TH5PTget_type;
+    FH5PTcreate_index: TH5PTcreate_index;
+    FH5PTset_index: TH5PTset_index;
+    FH5PTget_index: TH5PTget_index;
+    FH5PTfree_vlen_buff: TH5PTfree_vlen_buff;
+    FH5LDget_dset_dims: TH5LDget_dset_dims;
+    FH5LDget_dset_type_size: TH5LDget_dset_type_size;
+    FH5LDget_dset_elmts: TH5LDget_dset_elmts;
+
+  public
+    constructor Create(APath: string);
+    destructor Destroy; override;
+
+    property H5DOappend: TH5DOappend read FH5DOappend;
+    property H5DOwrite_chunk: TH5DOwrite_chunk read FH5DOwrite_chunk;
+    property H5DOread_chunk: TH5DOread_chunk read FH5DOread_chunk;
+    property H5DSattach_scale: TH5DSattach_scale read FH5DSattach_scale;
+    property H5DSdetach_scale: TH5DSdetach_scale read FH5DSdetach_scale;
+    property H5DSset_scale: TH5DSset_scale read FH5DSset_scale;
+    property H5DSget_num_scales: TH5DSget_num_scales read FH5DSget_num_scales;
+    property H5DSset_label: TH5DSset_label read FH5DSset_label;
+    property H5DSget_label: TH5DSget_label read FH5DSget_label;
+    property H5DSget_scale_name: TH5DSget_scale_name read FH5DSget_scale_name;
+    property H5DSis_scale: TH5DSis_scale read FH5DSis_scale;
+    property H5DSiterate_scales: TH5DSiterate_scales read FH5DSiterate_scales;
+    property H5DSis_attached: TH5DSis_attached read FH5DSis_attached;
+    property H5LTmake_dataset: TH5LTmake_dataset read FH5LTmake_dataset;
+    property H5LTmake_dataset_char: TH5LTmake_dataset_char read FH5LTmake_dataset_char;
+    property H5LTmake_dataset_short: TH5LTmake_dataset_short read FH5LTmake_dataset_short;
+    property H5LTmake_dataset_int: TH5LTmake_dataset_int read FH5LTmake_dataset_int;
+    property H5LTmake_dataset_long: TH5LTmake_dataset_long read FH5LTmake_dataset_long;
+    property H5LTmake_dataset_float: TH5LTmake_dataset_float read FH5LTmake_dataset_float;
+    property H5LTmake_dataset_double: TH5LTmake_dataset_double read FH5LTmake_dataset_double;
+    property H5LTmake_dataset_string: TH5LTmake_dataset_string read FH5LTmake_dataset_string;
+    property H5LTread_dataset: TH5LTread_dataset read FH5LTread_dataset;
+    property H5LTread_dataset_char: TH5LTread_dataset_char read FH5LTread_dataset_char;
+    property H5LTread_dataset_short: TH5LTread_dataset_short read FH5LTread_dataset_short;
+    property H5LTread_dataset_int: TH5LTread_dataset_int read FH5LTread_dataset_int;
+    property H5LTread_dataset_long: TH5LTread_dataset_long read FH5LTread_dataset_long;
+    property H5LTread_dataset_float: TH5LTread_dataset_float read FH5LTread_dataset_float;
+    property H5LTread_dataset_double: TH5LTread_dataset_double read FH5LTread_dataset_double;
+    property H5LTread_dataset_string: TH5LTread_dataset_string read FH5LTread_dataset_string;
+    property H5LTget_dataset_ndims: TH5LTget_dataset_ndims read FH5LTget_dataset_ndims;
+    property H5LTget_dataset_info: TH5LTget_dataset_info read FH5LTget_dataset_info;
+    property H5LTfind_dataset: TH5LTfind_dataset read FH5LTfind_dataset;
+    property H5LTset_attribute_string: TH5LTset_attribute_string read FH5LTset_attribute_string;
+    property H5LTset_attribute_char: TH5LTset_attribute_char read FH5LTset_attribute_char;
+    property H5LTset_attribute_uchar: TH5LTset_attribute_uchar read FH5LTset_attribute_uchar;
+    property H5LTset_attribute_short: TH5LTset_attribute_short read FH5LTset_attribute_short;
+    property H5LTset_attribute_ushort: TH5LTset_attribute_ushort read FH5LTset_attribute_ushort;
+    property H5LTset_attribute_int: TH5LTset_attribute_int read FH5LTset_attribute_int;
+    property H5LTset_attribute_uint: TH5LTset_attribute_uint read FH5LTset_attribute_uint;
+    property H5LTset_attribute_long: TH5LTset_attribute_long read FH5LTset_attribute_long;
+    property H5LTset_attribute_long_long: TH5LTset_attribute_long_long read FH5LTset_attribute_long_long;
+    property H5LTset_attribute_ulong: TH5LTset_attribute_ulong read FH5LTset_attribute_ulong;
+    property H5LTset_attribute_float: TH5LTset_attribute_float read FH5LTset_attribute_float;
+    property H5LTset_attribute_double: TH5LTset_attribute_double read FH5LTset_attribute_double;
+    property H5LTget_attribute: TH5LTget_attribute read FH5LTget_attribute;
+    property H5LTget_attribute_string: TH5LTget_attribute_string read FH5LTget_attribute_string;
+    property H5LTget_attribute_char: TH5LTget_attribute_char read FH5LTget_attribute_char;
+    property H5LTget_attribute_uchar: TH5LTget_attribute_uchar read FH5LTget_attribute_uchar;
+    property H5LTget_attribute_short: TH5LTget_attribute_short read FH5LTget_attribute_short;
+    property H5LTget_attribute_ushort: TH5LTget_attribute_ushort read FH5LTget_attribute_ushort;
+    property H5LTget_attribute_int: TH5LTget_attribute_int read FH5LTget_attribute_int;
+    property H5LTget_attribute_uint: TH5LTget_attribute_uint read FH5LTget_attribute_uint;
+    property H5LTget_attribute_long: TH5LTget_attribute_long read FH5LTget_attribute_long;
+    property H5LTget_attribute_long_long: TH5LTget_attribute_long_long read FH5LTget_attribute_long_long;
+    property H5LTget_attribute_ulong: TH5LTget_attribute_ulong read FH5LTget_attribute_ulong;
+    property H5LTget_attribute_float: TH5LTget_attribute_float read FH5LTget_attribute_float;
+    property H5LTget_attribute_double: TH5LTget_attribute_double read FH5LTget_attribute_double;
+    property H5LTget_attribute_ndims: TH5LTget_attribute_ndims read FH5LTget_attribute_ndims;
+    property H5LTget_attribute_info: TH5LTget_attribute_info read FH5LTget_attribute_info;
+    property H5LTtext_to_dtype: TH5LTtext_to_dtype read FH5LTtext_to_dtype;
+    property H5LTdtype_to_text: TH5LTdtype_to_text read FH5LTdtype_to_text;
+    property H5LTfind_attribute: TH5LTfind_attribute read FH5LTfind_attribute;
+    property H5LTpath_valid: TH5LTpath_valid read FH5LTpath_valid;
+    property H5LTopen_file_image: TH5LTopen_file_image read FH5LTopen_file_image;
+    property H5IMmake_image_8bit: TH5IMmake_image_8bit read FH5IMmake_image_8bit;
+    property H5IMmake_image_24bit: TH5IMmake_image_24bit read FH5IMmake_image_24bit;
+    property H5IMget_image_info: TH5IMget_image_info read FH5IMget_image_info;
+    property H5IMread_image: TH5IMread_image read FH5IMread_image;
+    property H5IMmake_palette: TH5IMmake_palette read FH5IMmake_palette;
+    property H5IMlink_palette: TH5IMlink_palette read FH5IMlink_palette;
+    property H5IMunlink_palette: TH5IMunlink_palette read FH5IMunlink_palette;
+    property H5IMget_npalettes: TH5IMget_npalettes read FH5IMget_npalettes;
+    property H5IMget_palette_info: TH5IMget_palette_info read FH5IMget_palette_info;
+    property H5IMget_palette: TH5IMget_palette read FH5IMget_palette;
+    property H5IMis_image: TH5IMis_image read FH5IMis_image;
+    property H5IMis_palette: TH5IMis_palette read FH5IMis_palette;
+    property H5TBmake_table: TH5TBmake_table read FH5TBmake_table;
+    property H5TBappend_records: TH5TBappend_records read FH5TBappend_records;
+    property H5TBwrite_records: TH5TBwrite_records read FH5TBwrite_records;
+    property H5TBwrite_fields_name: TH5TBwrite_fields_name read FH5TBwrite_fields_name;
+    property H5TBwrite_fields_index: TH5TBwrite_fields_index read FH5TBwrite_fields_index;
+    property H5TBread_table: TH5TBread_table read FH5TBread_table;
+    property H5TBread_fields_name: TH5TBread_fields_name read FH5TBread_fields_name;
+    property H5TBread_fields_index: TH5TBread_fields_index read FH5TBread_fields_index;
+    property H5TBread_records: TH5TBread_records read FH5TBread_records;
+    property H5TBget_table_info: TH5TBget_table_info read FH5TBget_table_info;
+    property H5TBget_field_info: TH5TBget_field_info read FH5TBget_field_info;
+    property H5TBdelete_record: TH5TBdelete_record read FH5TBdelete_record;
+    property H5TBinsert_record: TH5TBinsert_record read FH5TBinsert_record;
+    property H5TBadd_records_from: TH5TBadd_records_from read FH5TBadd_records_from;
+    property H5TBcombine_tables: TH5TBcombine_tables read FH5TBcombine_tables;
+    property H5TBinsert_field: TH5TBinsert_field read FH5TBinsert_field;
+    property H5TBdelete_field: TH5TBdelete_field read FH5TBdelete_field;
+    property H5TBAget_title: TH5TBAget_title read FH5TBAget_title;
+    property H5TBAget_fill: TH5TBAget_fill read FH5TBAget_fill;
+    property H5PTcreate: TH5PTcreate read FH5PTcreate;
+    property H5PTopen: TH5PTopen read FH5PTopen;
+    property H5PTclose: TH5PTclose read FH5PTclose;
+    property H5PTcreate_fl: TH5PTcreate_fl read FH5PTcreate_fl;
+    property H5PTappend: TH5PTappend read FH5PTappend;
+    property H5PTget_next: TH5PTget_next read FH5PTget_next;
+    property H5PTread_packets: TH5PTread_packets read FH5PTread_packets;
+    property H5PTget_num_packets: TH5PTget_num_packets read FH5PTget_num_packets;
+    property H5PTis_valid: TH5PTis_valid read FH5PTis_valid;
+    property H5PTis_varlen: TH5PTis_varlen read FH5PTis_varlen;
+    property H5PTget_dataset: TH5PTget_dataset read FH5PTget_dataset;
+    property H5PTget_type: TH5PTget_type read FH5PTget_type;
+    property H5PTcreate_index: TH5PTcreate_index read FH5PTcreate_index;
+    property H5PTset_index: TH5PTset_index read FH5PTset_index;
+    property H5PTget_index: TH5PTget_index read FH5PTget_index;
+    property H5PTfree_vlen_buff: TH5PTfree_vlen_buff read FH5PTfree_vlen_buff;
+    property H5LDget_dset_dims: TH5LDget_dset_dims read FH5LDget_dset_dims;
+    property H5LDget_dset_type_size: TH5LDget_dset_type_size read FH5LDget_dset_type_size;
+    property H5LDget_dset_elmts: TH5LDget_dset_elmts read FH5LDget_dset_elmts;
+
+    property Handle: THandle read FHandle;
+    function IsValid: Boolean;
+  end;
+
+implementation
+
+{ THDF5HLDll }
+constructor THDF5HLDll.Create(APath: string);
+
+  function GetDllProc(AModule: THandle; AName: string): Pointer;
+  begin
+    Result := GetProcAddress(AModule, PChar(AName));
+    Assert(Assigned(Result));
+  end;
+
+begin
+  inherited Create;
+  FHandle := LoadLibrary(PChar(APath));
+
+  @FH5DOappend := GetDllProc(FHandle, 'H5DOappend');
+  @FH5DOwrite_chunk := GetDllProc(FHandle, 'H5DOwrite_chunk');
+  @FH5DOread_chunk := GetDllProc(FHandle, 'H5DOread_chunk');
+  @FH5DSattach_scale := GetDllProc(FHandle, 'H5DSattach_scale');
+  @FH5DSdetach_scale := GetDllProc(FHandle, 'H5DSdetach_scale');
+  @FH5DSset_scale := GetDllProc(FHandle, 'H5DSset_scale');
+  @FH5DSget_num_scales := GetDllProc(FHandle, 'H5DSget_num_scales');
+  @FH5DSset_label := GetDllProc(FHandle, 'H5DSset_label');
+  @FH5DSget_label := GetDllProc(FHandle, 'H5DSget_label');
+  @FH5DSget_scale_name := GetDllProc(FHandle, 'H5DSget_scale_name');
+  @FH5DSis_scale := GetDllProc(FHandle, 'H5DSis_scale');
+  @FH5DSiterate_scales := GetDllProc(FHandle, 'H5DSiterate_scales');
+  @FH5DSis_attached := GetDllProc(FHandle, 'H5DSis_attached');
+  @FH5LTmake_dataset := GetDllProc(FHandle, 'H5LTmake_dataset');
+  @FH5LTmake_dataset_char := GetDllProc(FHandle, 'H5LTmake_dataset_char');
+  @FH5LTmake_dataset_short := GetDllProc(FHandle, 'H5LTmake_dataset_short');
+  @FH5LTmake_dataset_int := GetDllProc(FHandle, 'H5LTmake_dataset_int');
+  @FH5LTmake_dataset_long := GetDllProc(FHandle, 'H5LTmake_dataset_long');
+  @FH5LTmake_dataset_float := GetDllProc(FHandle, 'H5LTmake_dataset_float');
+  @FH5LTmake_dataset_double := GetDllProc(FHandle, 'H5LTmake_dataset_double');
+  @FH5LTmake_dataset_string := GetDllProc(FHandle, 'H5LTmake_dataset_string');
+  @FH5LTread_dataset := GetDllProc(FHandle, 'H5LTread_dataset');
+  @FH5LTread_dataset_char := GetDllProc(FHandle, 'H5LTread_dataset_char');
+  @FH5LTread_dataset_short := GetDllProc(FHandle, 'H5LTread_dataset_short');
+  @FH5LTread_dataset_int := GetDllProc(FHandle, 'H5LTread_dataset_int');
+  @FH5LTread_dataset_long := GetDllProc(FHandle, 'H5LTread_dataset_long');
+  @FH5LTread_dataset_float := GetDllProc(FHandle, 'H5LTread_dataset_float');
+  @FH5LTread_dataset_double := GetDllProc(FHandle, 'H5LTread_dataset_double');
+  @FH5LTread_dataset_string := GetDllProc(FHandle, 'H5LTread_dataset_string');
+  @FH5LTget_dataset_ndims := GetDllProc(FHandle, 'H5LTget_dataset_ndims');
+  @FH5LTget_dataset_info := GetDllProc(FHandle, 'H5LTget_dataset_info');
+  @FH5LTfind_dataset := GetDllProc(FHandle, 'H5LTfind_dataset');
+  @FH5LTset_attribute_string := GetDllProc(FHandle, 'H5LTset_attribute_string');
+  @FH5LTset_attribute_char := GetDllProc(FHandle, 'H5LTset_attribute_char');
+  @FH5LTset_attribute_uchar := GetDllProc(FHandle, 'H5LTset_attribute_uchar');
+  @FH5LTset_attribute_short := GetDllProc(FHandle, 'H5LTset_attribute_short');
+  @FH5LTset_attribute_ushort := GetDllProc(FHandle, 'H5LTset_attribute_ushort');
+  @FH5LTset_attribute_int := GetDllProc(FHandle, 'H5LTset_attribute_int');
+  @FH5LTset_attribute_uint := GetDllProc(FHandle, 'H5LTset_attribute_uint');
+  @FH5LTset_attribute_long := GetDllProc(FHandle, 'H5LTset_attribute_long');
+  @FH5LTset_attribute_long_long := GetDllProc(FHandle, 'H5LTset_attribute_long_long');
+  @FH5LTset_attribute_ulong := GetDllProc(FHandle, 'H5LTset_attribute_ulong');
+  @FH5LTset_attribute_float := GetDllProc(FHandle, 'H5LTset_attribute_float');
+  @FH5LTset_attribute_double := GetDllProc(FHandle, 'H5LTset_attribute_double');
+  @FH5LTget_attribute := GetDllProc(FHandle, 'H5LTget_attribute');
+  @FH5LTget_attribute_string := GetDllProc(FHandle, 'H5LTget_attribute_string');
+  @FH5LTget_attribute_char := GetDllProc(FHandle, 'H5LTget_attribute_char');
+  @FH5LTget_attribute_uchar := GetDllProc(FHandle, 'H5LTget_attribute_uchar');
+  @FH5LTget_attribute_short := GetDllProc(FHandle, 'H5LTget_attribute_short');
+  @FH5LTget_attribute_ushort := GetDllProc(FHandle, 'H5LTget_attribute_ushort');
+  @FH5LTget_attribute_int := GetDllProc(FHandle, 'H5LTget_attribute_int');
+  @FH5LTget_attribute_uint := GetDllProc(FHandle, 'H5LTget_attribute_uint');
+  @FH5LTget_attribute_long := GetDllProc(FHandle, 'H5LTget_attribute_long');
+  @FH5LTget_attribute_long_long := GetDllProc(FHandle, 'H5LTget_attribute_long_long');
+  @FH5LTget_attribute_ulong := GetDllProc(FHandle, 'H5LTget_attribute_ulong');
+  @FH5LTget_attribute_float := GetDllProc(FHandle, 'H5LTget_attribute_float');
+  @FH5LTget_attribute_double := GetDllProc(FHandle, 'H5LTget_attribute_double');
+  @FH5LTget_attribute_ndims := GetDllProc(FHandle, 'H5LTget_attribute_ndims');
+  @FH5LTget_attribute_info := GetDllProc(FHandle, 'H5LTget_attribute_info');
+  @FH5LTtext_to_dtype := GetDllProc(FHandle, 'H5LTtext_to_dtype');
+  @FH5LTdtype_to_text := GetDllProc(FHandle, 'H5LTdtype_to_text');
+  @FH5LTfind_attribute := GetDllProc(FHandle, 'H5LTfind_attribute');
+  @FH5LTpath_valid := GetDllProc(FHandle, 'H5LTpath_valid');
+  @FH5LTopen_file_image := GetDllProc(FHandle, 'H5LTopen_file_image');
+  @FH5IMmake_image_8bit := GetDllProc(FHandle, 'H5IMmake_image_8bit');
+  @FH5IMmake_image_24bit := GetDllProc(FHandle, 'H5IMmake_image_24bit');
+  @FH5IMget_image_info := GetDllProc(FHandle, 'H5IMget_image_info');
+  @FH5IMread_image := GetDllProc(FHandle, 'H5IMread_image');
+  @FH5IMmake_palette := GetDllProc(FHandle, 'H5IMmake_palette');
+  @FH5IMlink_palette := GetDllProc(FHandle, 'H5IMlink_palette');
+  @FH5IMunlink_palette := GetDllProc(FHandle, 'H5IMunlink_palette');
+  @FH5IMget_npalettes := GetDllProc(FHandle, 'H5IMget_npalettes');
+  @FH5IMget_palette_info := GetDllProc(FHandle, 'H5IMget_palette_info');
+  @FH5IMget_palette := GetDllProc(FHandle, 'H5IMget_palette');
+  @FH5IMis_image := GetDllProc(FHandle, 'H5IMis_image');
+  @FH5IMis_palette := GetDllProc(FHandle, 'H5IMis_palette');
+  @FH5TBmake_table := GetDllProc(FHandle, 'H5TBmake_table');
+  @FH5TBappend_records := GetDllProc(FHandle, 'H5TBappend_records');
+  @FH5TBwrite_records := GetDllProc(FHandle, 'H5TBwrite_records');
+  @FH5TBwrite_fields_name := GetDllProc(FHandle, 'H5TBwrite_fields_name');
+  @FH5TBwrite_fields_index := GetDllProc(FHandle, 'H5TBwrite_fields_index');
+  @FH5TBread_table := GetDllProc(FHandle, 'H5TBread_table');
+  @FH5TBread_fields_name := GetDllProc(FHandle, 'H5TBread_fields_name');
+  @FH5TBread_fields_index := GetDllProc(FHandle, 'H5TBread_fields_index');
+  @FH5TBread_records := GetDllProc(FHandle, 'H5TBread_records');
+  @FH5TBget_table_info := GetDllProc(FHandle, 'H5TBget_table_info');
+  @FH5TBget_field_info := GetDllProc(FHandle, 'H5TBget_field_info');
+  @FH5TBdelete_record := GetDllProc(FHandle, 'H5TBdelete_record');
+  @FH5TBinsert_record := GetDllProc(FHandle, 'H5TBinsert_record');
+  @FH5TBadd_records_from := GetDllProc(FHandle, 'H5TBadd_records_from');
+  @FH5TBcombine_tables := GetDllProc(FHandle, 'H5TBcombine_tables');
+  @FH5TBinsert_field := GetDllProc(FHandle, 'H5TBinsert_field');
+  @FH5TBdelete_field := GetDllProc(FHandle, 'H5TBdelete_field');
+  @FH5TBAget_title := GetDllProc(FHandle, 'H5TBAget_title');
+  @FH5TBAget_fill := GetDllProc(FHandle, 'H5TBAget_fill');
+  @FH5PTcreate := GetDllProc(FHandle, 'H5PTcreate');
+  @FH5PTopen := GetDllProc(FHandle, 'H5PTopen');
+  @FH5PTclose := GetDllProc(FHandle, 'H5PTclose');
+  @FH5PTcreate_fl := GetDllProc(FHandle, 'H5PTcreate_fl');
+  @FH5PTappend := GetDllProc(FHandle, 'H5PTappend');
+  @FH5PTget_next := GetDllProc(FHandle, 'H5PTget_next');
+  @FH5PTread_packets := GetDllProc(FHandle, 'H5PTread_packets');
+  @FH5PTget_num_packets := GetDllProc(FHandle, 'H5PTget_num_packets');
+  @FH5PTis_valid := GetDllProc(FHandle, 'H5PTis_valid');
+  @FH5PTis_varlen := GetDllProc(FHandle, 'H5PTis_varlen');
+  @FH5PTget_dataset := GetDllProc(FHandle, 'H5PTget_dataset');
+  @FH5PTget_type := GetDllProc(FHandle, 'H5PTget_type');
+  @FH5PTcreate_index := GetDllProc(FHandle, 'H5PTcreate_index');
+  @FH5PTset_index := GetDllProc(FHandle, 'H5PTset_index');
+  @FH5PTget_index := GetDllProc(FHandle, 'H5PTget_index');
+  @FH5PTfree_vlen_buff := GetDllProc(FHandle, 'H5PTfree_vlen_buff');
+  @FH5LDget_dset_dims := GetDllProc(FHandle, 'H5LDget_dset_dims');
+  @FH5LDget_dset_type_size := GetDllProc(FHandle, 'H5LDget_dset_type_size');
+  @FH5LDget_dset_elmts := GetDllProc(FHandle, 'H5LDget_dset_elmts');
+
+
+end;
+
+destructor THDF5HLDll.Destroy;
+begin
+  if FHandle <> 0 then
+    FreeLibrary(FHandle);
+  inherited;
+end;
+
+function THDF5HLDll.IsValid: Boolean;
+begin
+  Result := (FHandle <> 0);
+end;
+
+end.
+
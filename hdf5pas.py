@@ -6,37 +6,283 @@ from __future__ import print_function
 import sys
 import os.path
 import argparse
-import networkx as nx
+import contextlib
 import datetime
+import glob
+import hashlib
+import json
+import multiprocessing
+import pickle
 import re
+import string
+import tempfile
+import time
 from collections import *
 from itertools import *
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 parser = argparse.ArgumentParser(description = 'Generate Delphi wrapper for HDF5 library.')
 parser.add_argument('srcdir', help = 'directory containing HDF5 *.h files.',
                     nargs = '?', default = '.')
+binding = parser.add_mutually_exclusive_group()
+binding.add_argument('--lazy', action = 'store_true',
+                     help = 'bind each procedure on its first call instead of in the constructor.')
+binding.add_argument('--external', action = 'store_true',
+                     help = "link statically: declare procedures and variables as external 'hdf5'.")
+parser.add_argument('--hl', action = 'store_true',
+                    help = 'generate the hdf5_hl unit (hdf5hldll) from hdf5_hl.h instead of the hdf5 one.')
+parser.add_argument('--deprecated', action = 'store_true',
+                    help = 'keep the declarations inside #ifndef H5_NO_DEPRECATED_SYMBOLS.')
+parser.add_argument('--used-by', metavar = 'SOURCE', dest = 'usedby', action = 'append',
+                    help = 'emit only the declarations reachable from identifiers used in this Pascal source; may be repeated.')
+parser.add_argument('--optional', metavar = 'NAME', action = 'append', default = [],
+                    help = 'bind procedure NAME without requiring it (nil if missing; a failing stub with --external); may be repeated.')
+parser.add_argument('-j', '--jobs', metavar = 'N', type = int, default = 1,
+                    help = 'parse headers in N worker processes (0: one per CPU).')
+parser.add_argument('--cache-dir', metavar = 'DIR', dest = 'cachedir', default = '.hdf5pas-cache',
+                    help = 'keep parsed headers in DIR, keyed by header content and generator (default: %(default)s).')
+parser.add_argument('--no-cache', dest = 'cache', action = 'store_false',
+                    help = 'parse every header, neither reading nor writing the cache.')
+parser.add_argument('--prune-cache', dest = 'prunecache', action = 'store_true',
+                    help = 'remove cache entries this run did not use.')
+parser.add_argument('--save-ir', metavar = 'PATH', dest = 'saveir',
+                    help = 'also write the parsed constants, types and exports to PATH as JSON.')
+parser.add_argument('--load-ir', metavar = 'PATH', dest = 'loadir',
+                    help = 'generate from an IR file written by --save-ir instead of parsing srcdir.')
+parser.add_argument('--diff-ir', metavar = 'PATH', dest = 'diffir',
+                    help = 'instead of the unit, list the symbols added, removed or changed since the IR in PATH.')
+parser.add_argument('-o', '--output', metavar = 'PATH',
+                    help = 'write the unit to PATH (replaced atomically) instead of stdout.')
 args = parser.parse_args()
+if args.prunecache and not args.cache:
+    parser.error('--prune-cache would empty the cache: with --no-cache no entry counts as used')
+
+# Procedures newer than HDF5 1.10.1, the oldest library the units are used
+# with, are always optional: callers check the library version first.
+optional = set(['H5Dget_chunk_storage_size'] + args.optional)
+
+# Patterns applied to every header line, compiled once.
+# Besides the H5*public.h headers, follow the in-memory (core) and default
+# (sec2) file driver headers; the other drivers are platform-specific.
+includere = re.compile('#include "(H5.*public.h|H5FDcore.h|H5FDsec2.h)".*')
+linekindre = re.compile(r'(?P<comment>\(\*| \*)|(?P<indentedcomment> *\(\*)|'
+                        r'(?P<define>#define)|(?P<typedef>typedef|struct|enum)|(?P<export>H5_(?:HL)?DLL)')
+opencommentre = re.compile('(.*)(/\*.*)')
+closecommentre = re.compile('\*/')
+trailingcommentre = re.compile(' *(\(\*.*\*\))?$')
+commentre = re.compile('\(\*(.*)\*\)')
+endcommentre = re.compile('\(\*(.*)\*\)$')
+inlinecommentre = re.compile('\(\*[^()]*?\*\)')
+exportcommentre = re.compile('[(/]\*.*?\*[)/]')
+doubleparensre = re.compile('^\((\(.*\))\)$')
+parensre = re.compile('^\((.*)\)$')
+castsre = re.compile('(\((.*?)\)( *|$))|([^()]+$)')
+shiftre = re.compile('(.*) << (.*)')
+proctypere = re.compile('(.*) ?\( \* ([^ ]*)\) ?\((.*)\);')
+procre = re.compile('(.*) ([^ ]*) ?\((.*)\);')
+arrayre = re.compile('([^\[\]]*)(\[(.+)\])?')
+definecommentre = re.compile(' *?(((\(\*)|( \*)).*)')
+definere = re.compile(r'#define +(.*?) +([^\\]+)$')
+enumitemre = re.compile(' *([^ *(),]+)( *= ?([^,]+))?,?')
+enumcommentre = re.compile(' *([( ]\*.*)')
+synonymre = re.compile('typedef *([^(),]*) +([^(),]*);')
+typedefre = re.compile('typedef (.*;)')
+exportre = re.compile('H5_(?:HL)?DLL (.*;)')
+
+@contextlib.contextmanager
+def replacing(path, mode = 'w'):
+    '''
+    Open a temporary file next to path for writing and move it over path
+    when the block completes, so path never holds partial contents.
+    '''
+
+    fd, temp = tempfile.mkstemp(prefix = '.hdf5pas-', dir = os.path.dirname(os.path.abspath(path)))
+    umask = os.umask(0)
+    os.umask(umask)
+    try:
+        os.chmod(temp, 0o666 & ~umask)
+        with os.fdopen(fd, mode) as f:
+            yield f
+        getattr(os, 'replace', os.rename)(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+Header = namedtuple('Header', ['lines', 'includes', 'digest'])
+headers = {}
+headerstats = Counter()
+
+def loadheader(header):
+    '''
+    Read, decode and split header once; later calls return the cached lines
+    together with the H5*public.h headers it includes.
+    '''
+
+    if header not in headers:
+        with open(os.path.join(args.srcdir, header), 'rb') as f:
+            data = f.read()
+        headerstats['files'] += 1
+        headerstats['bytes'] += len(data)
+        lines = data.decode('utf-8', 'replace').replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        tail = lines.pop()
+        lines = [line + '\n' for line in lines] + ([tail] if tail else [])
+        includes = []
+        for line in lines:
+            m = includere.match(line)
+            if m:
+                includes.append(m.group(1))
+        headers[header] = Header(lines, includes, hashlib.sha1(data).hexdigest())
+    return headers[header]
+
+def parsedeps(header, graph, visited = None):
+    if visited is None:
+        visited = set()
+    visited.add(header)
+    if header.startswith('H5') and header not in graph:
+        graph[header] = []
+    for include in loadheader(header).includes:
+        if header.startswith('H5'):
+            if include not in graph:
+                graph[include] = []
+            if include not in graph[header]:
+                graph[header].append(include)
+        if include not in visited:
+            parsedeps(include, graph, visited)
+
+def sortdeps(graph):
+    '''
+    Order headers so that each one follows the headers it includes.
+
+    Headers are ranked by the number of headers they reach (themselves
+    included), ties kept in discovery order.  Reach sets are bit masks
+    built per strongly connected component (Tarjan), so headers including
+    each other in a cycle share a rank and the pass stays linear.
+    '''
+
+    bit = dict((header, 1 << i) for i, header in enumerate(graph))
+    index = {}
+    lowlink = {}
+    stack = []
+    onstack = set()
+    partial = {}
+    reach = {}
+
+    def strongconnect(header):
+        index[header] = lowlink[header] = len(index)
+        stack.append(header)
+        onstack.add(header)
+        partial[header] = bit[header]
+        for include in graph[header]:
+            if include not in index:
+                strongconnect(include)
+                lowlink[header] = min(lowlink[header], lowlink[include])
+            elif include in onstack:
+                lowlink[header] = min(lowlink[header], index[include])
+            if include in reach:
+                partial[header] |= reach[include]
+        if lowlink[header] == index[header]:
+            component = []
+            mask = 0
+            while not component or component[-1] != header:
+                component.append(stack.pop())
+                onstack.discard(component[-1])
+                mask |= partial[component[-1]]
+            for member in component:
+                reach[member] = mask
+
+    for header in graph:
+        if header not in index:
+            strongconnect(header)
+    return sorted(graph, key = lambda header: bin(reach[header]).count('1'))
+
+class Emitter(object):
+    '''
+    Collects the generated unit as lists of text fragments, one list per
+    template section, and streams the filled-in template to a file.
+    '''
+
+    def __init__(self):
+        self.sections = defaultdict(list)
+
+    def add(self, section, text):
+        if text:
+            self.sections[section].append(text)
+
+    def text(self, section):
+        return ''.join(self.sections[section])
+
+    def replace(self, section, text):
+        self.sections[section] = [text]
+
+    def fragments(self, section):
+        '''
+        Yield the fragments of section with leading and trailing newlines of
+        the section as a whole dropped.
+        '''
+
+        held = None
+        for fragment in self.sections[section]:
+            if held is None:
+                fragment = fragment.lstrip('\n')
+            body = fragment.rstrip('\n')
+            if body:
+                if held:
+                    yield held
+                yield body
+                held = fragment[len(body):]
+            elif held is not None:
+                held += fragment
+
+    def write(self, template, out, **values):
+        '''
+        Write template to out.  Fields naming a section are filled in from its
+        fragments, others from values.  Trailing blanks are stripped from
+        every line.
+        '''
+
+        pending = ''
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            chunks = [literal]
+            if field in values:
+                chunks.append(format(values[field], spec))
+            elif field is not None:
+                chunks = chain(chunks, self.fragments(field))
+            for chunk in chunks:
+                lines = (pending + chunk).split('\n')
+                pending = lines.pop()
+                for line in lines:
+                    out.write(line.rstrip() + '\n')
+        out.write(pending.rstrip() + '\n')
+
+    def save(self, template, path, **values):
+        '''
+        Write template to path through a temporary file in the same directory,
+        so path is either left as it was or fully replaced.
+        '''
+
+        with replacing(path) as out:
+            self.write(template, out, **values)
+
+emitter = Emitter()
+if args.hl:
+    root, unitname, classname, libname = 'hdf5_hl.h', 'hdf5hldll', 'THDF5HLDll', 'hdf5_hl'
+else:
+    root, unitname, classname, libname = 'hdf5.h', 'hdf5dll', 'THDF5Dll', 'hdf5'
 
-def parsedeps(header, graph):
-    if header.startswith('H5') and header not in graph.onodes:
-        graph.onodes.append(header)
-    for line in open(os.path.join(args.srcdir, header)):
-        m = re.match('#include "(H5.*public.h)".*', line)
-        if m:
-            include = m.group(1)
-            if header.startswith('H5'):
-                if include not in graph.onodes:
-                    graph.onodes.append(include)
-                graph.add_edge(header, include)
-            parsedeps(include, graph)
-
-defs = ''
-classname = 'THDF5Dll'
-types = ''
-fields = ''
-props = ''
-init = ''
-cinit = ''
+# Exported symbols in declaration order, as (name, dependencies, fragments)
+# where fragments maps a template section (types, fields, props, ...) to the
+# text the symbol adds to it.
+exports = []
+
+# Version of the IR layout written by --save-ir; bump on incompatible changes.
+irformat = 1
+
+# What parse() makes of one header: the fragments of the defs section, and
+# the symbols it declares as plain dicts (the IR, see symbolfragments).
+Parsed = namedtuple('Parsed', ['defs', 'symbols'])
 
 template = \
 '''unit hdf5dll;
@@ -85,7 +331,10 @@ const
 
 {defs}
 
-type
+'''
+
+dlltemplate = \
+'''type
   {classname} = class
   private
   type
@@ -108,7 +357,10 @@ type
 
 implementation
 
-{{ {classname} }}
+'''
+
+eagerimpl = \
+'''{{ {classname} }}
 constructor {classname}.Create(APath: string);
 
   function GetDllProc(AModule: THandle; AName: string): Pointer;
@@ -127,7 +379,114 @@ begin
 {cinit}
 end;
 
-destructor {classname}.Destroy;
+'''
+
+# With --lazy every F<name> starts out pointing at a Lazy<name> stub which
+# resolves the real address, stores it over itself and forwards the call.
+# The stubs cannot tell which instance they were called through, so only
+# one instance may exist at a time; Destroy releases the slot.
+lazyimpl = \
+'''function GetDllProc(AModule: THandle; AName: string): Pointer;
+begin
+  Result := GetProcAddress(AModule, PChar(AName));
+  Assert(Assigned(Result));
+end;
+
+var
+  LazyDll: {classname};
+
+{stubs}
+
+{{ {classname} }}
+constructor {classname}.Create(APath: string);
+begin
+  inherited Create;
+  Assert(LazyDll = nil, 'only one {classname} at a time with --lazy');
+  FHandle := LoadLibrary(PChar(APath));
+  LazyDll := Self;
+
+{init}
+
+  H5open;
+{cinit}
+end;
+
+'''
+
+# With --external the same names are kept, but every {classname} method is
+# an inline wrapper around a statically linked procedure.
+externtemplate = \
+'''const
+  HDF5Lib = '{libname}';
+
+{externs}
+
+var
+{externvars}
+
+type
+  {classname} = class
+  private
+    FHandle: THandle;
+
+{fields}
+
+  public
+    constructor Create(APath: string);
+
+{methods}
+
+{props}
+
+    property Handle: THandle read FHandle;
+    function IsValid: Boolean;
+  end;
+
+implementation
+
+{{ {classname} }}
+constructor {classname}.Create(APath: string);
+begin
+  inherited Create;
+  FHandle := 0;
+
+  H5open;
+{cinit}
+end;
+
+{bodies}
+
+function {classname}.IsValid: Boolean;
+begin
+  Result := True;
+end;
+
+end.
+'''
+
+# The high-level library is a separate unit on top of hdf5dll, which
+# declares the basic types and opens the library.
+hltemplate = \
+'''unit hdf5hldll;
+
+// Delphi wrapper for HDF5 high-level library.
+
+// Auto-generated {date} by hdf5pas.py.
+
+interface
+
+uses
+  windows, hdf5dll;
+
+{{$ALIGN ON}}
+{{$MINENUMSIZE 4}}
+
+{defs}
+
+'''
+
+templatetail = \
+'''destructor {classname}.Destroy;
 begin
   if FHandle <> 0 then
     FreeLibrary(FHandle);
@@ -143,6 +502,12 @@ end.
 '''
 
 def parse(header):
+    '''
+    Parse header and return its Parsed fragments.  Diagnostics go to stderr.
+    '''
+
+    defs = []
+    symbols = []
 
     def smartjoin(sep, *args):
         if args[0]:
@@ -151,12 +516,12 @@ def parse(header):
             return args[1]
 
     def stripcomment(s):
-        return re.sub(' *(\(\*.*\*\))?$', '', s)
+        return trailingcommentre.sub('', s)
 
     def strtoint(value):
-        value = re.sub('^\(\(.*\)\)$', r'\1', value.strip())
+        value = doubleparensre.sub(r'\1', value.strip())
         if value.startswith('('):
-            tokens = re.findall('(\((.*?)\)( *|$))|([^()]+$)', value)
+            tokens = castsre.findall(value)
             value = (tokens[-1][1] or tokens[-1][3]).strip()
         else:
             tokens = None
@@ -169,7 +534,7 @@ def parse(header):
                     (name, typ) = convnametype('', typ)
                     result = '{}({})'.format(typ, result)
         except ValueError:
-            m = re.match('(.*) << (.*)', value)
+            m = shiftre.match(value)
             if m:
                 result = '{} shl {}'.format(m.group(1), int(m.group(2), 0))
             else:
@@ -184,11 +549,11 @@ def parse(header):
             pass
 
     def parseprocdecl(signature, istype):
-        signature = re.sub('\(\*[^()]*?\*\)', '', signature).replace('*', ' * ')
+        signature = inlinecommentre.sub('', signature).replace('*', ' * ')
         if istype:
-            (rettype, name, args) = re.match('(.*) ?\( \* ([^ ]*)\) ?\((.*)\);', signature).groups()
+            (rettype, name, args) = proctypere.match(signature).groups()
         else:
-            (rettype, name, args) = re.match('(.*) ([^ ]*) ?\((.*)\);', signature).groups()
+            (rettype, name, args) = procre.match(signature).groups()
         if args != 'void':
             args = [s.strip() for s in args.split(',')]
         else:
@@ -213,7 +578,7 @@ def parse(header):
     def getnametype(signature):
         while '  ' in signature:
             signature = signature.replace('  ', ' ')
-        m = re.match('([^\[\]]*)(\[(.+)\])?', signature.strip())
+        m = arrayre.match(signature.strip())
         lexems = m.group(1).split(' ')
         if lexems[0] == 'enum':
             lexems = lexems[1:]
@@ -242,7 +607,7 @@ def parse(header):
         if name.endswith('[]'):
             name = name.rstrip('[]')
             typ += ['*']
-        m = re.match('([^\[\]]*)(\[(.+)\])?', name)
+        m = arrayre.match(name)
         arrsize = m.group(3)
         name = m.group(1)
 
@@ -254,6 +619,8 @@ def parse(header):
             name = 'end_'
         elif name == 'file':
             name = 'file_'
+        elif name == 'label':
+            name = 'label_'
 
         typ = [s for s in typ if s != 'const']
         typ = replace(typ, ['unsigned', 'long', 'long', 'int'], 'UInt64')
@@ -275,6 +642,7 @@ def parse(header):
         typ = replace(typ, ['unsigned'], 'Cardinal')
         typ = replace(typ, ['bool'], 'Boolean')
         typ = replace(typ, ['double'], 'Double')
+        typ = replace(typ, ['float'], 'Single')
         if '*' in typ:
             typ = replace(typ, ['void'], 'ointer')
 
@@ -293,18 +661,22 @@ def parse(header):
     def preprocess(lines):
         '''
         Parse and strip off pre-processor directives.
-        Currently all #if/#ifdef/#ifndef are considered as false.
+        Currently all #if/#ifdef/#ifndef are considered as false, except
+        #ifndef H5_NO_DEPRECATED_SYMBOLS with --deprecated.
         '''
 
         print('{}: Pre-processing...'.format(header), file = sys.stderr)
         ifdef = 0
+        kept = []
         result = []
+        hdef = '_{}_H'.format(os.path.splitext(header)[0])
+        guardre = re.compile('#(ifndef|define) {}'.format(hdef))
         for line in lines:
             line = line.strip('\n').expandtabs()
             if line.strip() == '':
                 line = ''
-            m = re.match('(.*)(/\*.*)', line)
-            if m and not re.search('\*/', m.group(2)):
+            m = opencommentre.match(line)
+            if m and not closecommentre.search(m.group(2)):
                 if m.group(1).strip() == '':
                     sublines = [m.group(2)]
                 else:
@@ -313,17 +685,21 @@ def parse(header):
                 sublines = [line]
             for line in sublines:
                 line = line.replace('/*', '(*').replace('*/', '*)')
-                hdef = '_{}_H'.format(os.path.splitext(header)[0])
-                if re.match('#ifndef {}'.format(hdef), line) or \
-                   re.match('#define {}'.format(hdef), line):
+                if guardre.match(line):
                     pass
                 elif line.startswith('#if') or \
                      line.startswith('#ifdef') or \
                      line.startswith('#ifndef'):
+                    if ifdef >= 0:
+                        kept.append(args.deprecated and line.split()[:2] == ['#ifndef', 'H5_NO_DEPRECATED_SYMBOLS'])
                     ifdef += 1
+                elif line.startswith('#else') and ifdef > 0:
+                    kept[-1] = False
                 elif line.startswith('#endif'):
                     ifdef -= 1
-                elif not ifdef:
+                    if ifdef >= 0:
+                        kept.pop()
+                elif ifdef == 0 or (ifdef > 0 and all(kept)):
                     if line.startswith('#include') or line.startswith('#undef'):
                         pass
                     else:
@@ -331,8 +707,7 @@ def parse(header):
         print('{}: {} of {} lines left'.format(header, len(result), len(lines)), file = sys.stderr)
         return result
 
-    lines = open(os.path.join(args.srcdir, header)).readlines()
-    lines = preprocess(lines)
+    lines = preprocess(loadheader(header).lines)
 
     print('{}: Parsing...'.format(header), file = sys.stderr)
 
@@ -343,52 +718,57 @@ def parse(header):
             Process sequence of #define's.
             '''
 
-            global props
+            def constant(name, value, comment):
+                value = '{}'.format(value)
+                symbols.append({'kind': 'const', 'name': name, 'value': value})
+                return '\n  {} = {};  {}'.format(name, value, comment)
 
             result = ''
             comment = False
-            for line in lines.split('\n'):
-                m = re.match(' *?(((\(\*)|( \*)).*)', line)
+            for line in lines:
+                m = definecommentre.match(line)
                 if m:
                     comment = True
                     if len(result) > 0:
                         result += '\n' + m.group(1)
                 else:
-                    m = re.match(r'#define +(.*?) +([^\\]+)$', stripcomment(line))
+                    m = definere.match(stripcomment(line))
                     if m:
                         comment = False
-                        mm = re.search('\(\*(.*)\*\)', line.strip())
+                        mm = commentre.search(line.strip())
                         comment = mm.group(1) if mm else None
                         (name, value) = m.groups()
-                        value = re.sub('^\((.*)\)$', r'\1', value)
-                        value = re.sub('^H5CHECK ', '', value)
-                        if name.startswith('H5F_ACC_'):
-                            value = re.sub('^H5OPEN ', '', value)
+                        value = parensre.sub(r'\1', value)
+                        if value.startswith('H5CHECK '):
+                            value = value[len('H5CHECK '):]
+                        if name.startswith('H5F_ACC_') and value.startswith('H5OPEN '):
+                            value = value[len('H5OPEN '):]
                         value = value.replace('sizeof', 'SizeOf')
                         comment = ' '.join(['(*', comment.strip(), '*)'] if comment else '')
                         if '?' in value or ',' in value:
                             print('WARN: {}'.format(line), file = sys.stderr)
                         elif value.startswith('H5OPEN'):
-                            props += '    property {}: hid_t read F{};\n'.format(name, value.split(' ')[-1].strip('_g'))
+                            symbols.append({'kind': 'alias', 'name': name, 'field': value.split(' ')[-1].strip('_g')})
                         elif 'SIZEOF' in name:
                             pass
+                        elif value.endswith('()'):
+                            # Driver ids such as H5FD_CORE are calls to the
+                            # driver's init function, which is bound instead
+                            pass
                         elif strtoint(value) != None:
-                            result += '\n  {} = {};  {}'.format(name, strtoint(value), comment)
+                            result += constant(name, strtoint(value), comment)
                         elif strtofloat(value) != None:
-                            result += '\n  {} = {};  {}'.format(name, strtofloat(value), comment)
+                            result += constant(name, strtofloat(value), comment)
                         elif value.startswith('"') and value.endswith('"'):
-                            result += "\n  {} = '{}';  {}".format(name, value.strip('"'), comment)
+                            result += constant(name, "'{}'".format(value.strip('"')), comment)
                         elif len(value.split('|')) > 1:
-                            result += '\n  {} = {};  {}'.format(name,
-                                                            ' or '.join([item.strip()
-                                                                         for item in value.split('|')]),
-                                                                comment)
+                            result += constant(name, ' or '.join([item.strip() for item in value.split('|')]), comment)
                         elif name.startswith('H5T_INTEL') or \
                              name.startswith('H5T_ALPHA') or \
                              name.startswith('H5T_MIPS'):
-                            props += '    property {}: hid_t read F{};\n'.format(name, value)
+                            symbols.append({'kind': 'alias', 'name': name, 'field': value})
                         else:
-                            result += '\n  {} = {};  {}'.format(name, value, comment)
+                            result += constant(name, value, comment)
                     elif comment:
                         result += '\n' + line
                     else:
@@ -423,6 +803,8 @@ def parse(header):
                     name = stateinfo[-1].strip('}; ') or stateinfo[0].split(' ')[2]
                     result += '\n  P{name} = ^{name};'.format(name = name)
                     result += '\n  {} ='.format(name)
+                    symbol = {'kind': 'enum', 'name': name, 'items': []}
+                    symbols.append(symbol)
 
                     lines = list()
                     Line = namedtuple('Line', ['line', 'name', 'value', 'comment'])
@@ -430,19 +812,20 @@ def parse(header):
                     for line in stateinfo[1:len(stateinfo) - 1]:
                         if stripcomment(line).strip() == '{':
                             continue
-                        m = re.match(' *([^ *(),]+)( *= ?([^,]+))?,?', stripcomment(line))
+                        m = enumitemre.match(stripcomment(line))
                         if m:
                             (name, dummy, value) = m.groups()
                             value = strtoint(value) if value else None
-                            mm = re.search('\(\*(.*)\*\)', line.strip())
+                            mm = commentre.search(line.strip())
                             comment = mm.group(1) if mm else None
                             comment = ' '.join(['(*', comment.strip(), '*)'] if comment else '')
                             lines.append(Line(line = None, name = name, value = value, comment = comment))
+                            symbol['items'].append([name, '{}'.format(value) if value else None])
                             lastname = name
                         elif not stripcomment(line).strip():
                             lines.append(Line(line = line.strip(), name = None, value = None, comment = None))
-                        elif re.match(' *([( ]\*.*)', line):
-                            lines.append(Line(line = re.sub(' *([( ]\*.*)', r'\1', line), name = None, value = None, comment = None))
+                        elif enumcommentre.match(line):
+                            lines.append(Line(line = enumcommentre.sub(r'\1', line), name = None, value = None, comment = None))
                         else:
                             print('WARN: {}'.format(line), file = sys.stderr)
                     firstline = True
@@ -463,7 +846,14 @@ def parse(header):
                     result += '\ntype'
 
                     def procstruct(lines, offset, pointertypes = False):
+                        '''
+                        Return the record declaration and its fields as
+                        [name, type] pairs, type being {'record': fields} or
+                        {'union': fields} for nested ones.
+                        '''
+
                         result = ''
+                        fields = []
                         typename = lines[-1].strip('}; ') or lines[0].split(' ')[2]
                         if pointertypes:
                             result += '\n{}P{name} = ^{name};'.format(' '*offset, name = typename)
@@ -479,7 +869,7 @@ def parse(header):
                             item += line.strip()
                             if stripcomment(item).strip()[-1] not in ('{', ';'):
                                 continue
-                            mm = re.search('\(\*(.*)\*\)$', item.strip())
+                            mm = endcommentre.search(item.strip())
                             comment = ' '.join(['(*', mm.group(1).strip(), '*)'] if mm else '')
                             if item.startswith('struct') or item.startswith('union'):
                                 nested += [item]
@@ -487,15 +877,20 @@ def parse(header):
                                 nested += [item]
                                 if item.startswith('}'):
                                     if nested[0].startswith('union'):
+                                        variants = []
+                                        fields.append([None, {'union': variants}])
                                         result += '\n  {}case Integer of'.format(' '*offset)
                                         for n, line in zip(count(1), nested[1:len(nested) - 1]):
-                                            mm = re.search('\(\*(.*)\*\)$', line.strip())
+                                            mm = endcommentre.search(line.strip())
                                             comment = ' '.join(['(*', mm.group(1).strip(), '*)'] if mm else '')
                                             (cname, ctype) = getnametype(stripcomment(line).rstrip(';'));
                                             (name, typ) = convnametype(cname, ctype)
                                             result += '\n    {}{}: ({}: {});  {}'.format(' '*offset, n, name, typ, comment).rstrip()
+                                            variants.append([name, typ])
                                     else:
-                                        result += procstruct(nested, offset + 2)
+                                        text, members = procstruct(nested, offset + 2)
+                                        result += text
+                                        fields.append([nested[-1].strip('}; '), {'record': members}])
                                     nested = []
                             else:
                                 if item.endswith(');'):
@@ -508,21 +903,27 @@ def parse(header):
                                     else:
                                         args = ''
                                     if rettype == 'void':
-                                        result += '\n  {}{}: procedure{}; cdecl;  {}'.format(' '*offset, name, args, comment).rstrip()
+                                        typ = 'procedure{}; cdecl'.format(args)
                                     else:
-                                        result += '\n  {}{}: function{}: {}; cdecl;  {}'.format(' '*offset, name, args, rettype, comment).rstrip()
+                                        typ = 'function{}: {}; cdecl'.format(args, rettype)
+                                    result += '\n  {}{}: {};  {}'.format(' '*offset, name, typ, comment).rstrip()
+                                    fields.append([name, typ])
                                 else:
                                     (cname, ctype) = getnametype(stripcomment(item).rstrip(';'));
                                     (name, typ) = convnametype(cname, ctype)
                                     if typename == 'H5FD_class_t':
                                         typ = typ.replace('array[0..H5FD_MEM_NTYPES - 1]', 'array[H5FD_MEM_DEFAULT..Pred(H5FD_MEM_NTYPES)]')
                                     result += '\n  {}{}: {};  {}'.format(' '*offset, name, typ, comment).rstrip()
+                                    fields.append([name, typ])
                             item = ''
 
                         result += '\n{}end;'.format(' '*offset)
-                        return result
+                        return result, fields
 
-                    result += procstruct(stateinfo, 2, True)
+                    text, fields = procstruct(stateinfo, 2, True)
+                    result += text
+                    symbols.append({'kind': 'struct', 'name': stateinfo[-1].strip('}; ') or stateinfo[0].split(' ')[2],
+                                    'fields': fields})
 
                 elif state == 'other':
                     comments = None
@@ -531,19 +932,21 @@ def parse(header):
                             comments = stateinfo[i:]
                             stateinfo = stateinfo[:i]
                             break
-                    if len(stateinfo) == 1 and re.match('typedef *([^(),]*) +([^(),]*);', stateinfo[0]):
+                    if len(stateinfo) == 1 and synonymre.match(stateinfo[0]):
                         '''
                         Type synonym.
                         '''
 
-                        (typ, name) = re.match('typedef *([^(),]*) +([^(),]*);', stateinfo[0]).groups()
+                        (typ, name) = synonymre.match(stateinfo[0]).groups()
                         (name, typ) = convnametype(name.strip(), typ.strip())
                         if name != typ:
                             if prevstate != 'other':
                                 result += 'type\n'
                             if name.endswith(']'):
                                 result += '  P{} = P{};'.format(re.sub('\[.*', '', name), typ)
+                                symbols.append({'kind': 'synonym', 'name': 'P' + re.sub('\[.*', '', name), 'type': 'P' + typ})
                             else:
+                                symbols.append({'kind': 'synonym', 'name': name, 'type': typ})
                                 result += '  {} = {};'.format(name, typ)
                                 result += '\n  P{name} = ^{name};'.format(name = name)
                     else:
@@ -554,11 +957,13 @@ def parse(header):
                         if prevstate != 'other':
                             result += 'type\n'
                         signature = ' '.join(stateinfo)
-                        name, args, rettype, varargs = parseprocdecl(re.match('typedef (.*;)', signature.strip()).group(1), True)
+                        name, args, rettype, varargs = parseprocdecl(typedefre.match(signature.strip()).group(1), True)
                         if rettype == 'void':
                             result += '  {} = procedure({}); cdecl;'.format(name, '; '.join(args))
                         else:
                             result += '  {} = function({}): {}; cdecl;'.format(name, '; '.join(args), rettype)
+                        symbols.append({'kind': 'proctype', 'name': name,
+                                        'args': [arg.split(': ', 1) for arg in args], 'result': rettype})
                         result += '\n  P{name} = ^{name};'.format(name = name)
                     if comments:
                         result += '\n'.join([''] + comments)
@@ -568,9 +973,9 @@ def parse(header):
             prevstate = None
             state = None
             stateinfo = []
-            for line in lines.split('\n'):
-                line = re.sub('^enum', 'typedef enum', line)
-                line = re.sub('^struct', 'typedef struct', line)
+            for line in lines:
+                if line.startswith('enum') or line.startswith('struct'):
+                    line = 'typedef ' + line
                 if line.startswith('typedef enum'):
                     result += '\n' + process(prevstate, state, stateinfo)
                     prevstate = state
@@ -599,14 +1004,12 @@ def parse(header):
             Process sequence of exported symbols.
             '''
 
-            global defs, types, fields, props, init, cinit
-
             signature = None
-            for line in lines.split('\n'):
+            for line in lines:
                 if line.startswith('(*') or line.startswith(' *'):
                     continue
-                line = re.sub('[(/]\*.*?\*[)/]', '', line.strip())
-                if line.startswith('H5_DLLVAR'):
+                line = exportcommentre.sub('', line.strip())
+                if line.startswith('H5_DLLVAR') or line.startswith('H5_HLDLLVAR'):
                     '''
                     Exported variable.
                     '''
@@ -614,8 +1017,7 @@ def parse(header):
                     (dummy, ctype, cname) = line.split(' ')
                     cname = cname.strip('_g;')
                     (cname, ctype) = convnametype(cname, ctype)
-                    fields += '    F{}: {};\n'.format(cname, ctype)
-                    cinit += "  F{cname} := P{ctype}(GetDllProc(FHandle, '{cname}_g'))^;\n".format(cname = cname, ctype = ctype)
+                    symbols.append({'kind': 'variable', 'name': cname, 'type': ctype})
 
                 else:
                     '''
@@ -627,48 +1029,45 @@ def parse(header):
                         continue
 
                     signature = signature.replace(' (', '(')
-                    fname, args, rettype, varargs = parseprocdecl(re.match('H5_DLL (.*;)', signature.strip()).group(1), False)
-                    if len(args) > 0:
-                        fdef = '(' + '; '.join(args) + ')'
-                    else:
-                        fdef = ''
-                    fdef = fdef + ': ' + rettype
-
+                    fname, fargs, rettype, varargs = parseprocdecl(exportre.match(signature.strip()).group(1), False)
                     if varargs:
-                        types += '    // T{} = function{}; cdecl; varargs;\n'.format(fname, fdef)
-                        fields += '    // F{}: T{};\n'.format(fname, fname)
-                        props += '    // property {}: T{} read {};\n'.format(fname, fname, fname)
                         print('ERROR: Ignoring varargs procedure {}.'.format(fname), file = sys.stderr)
-                    else:
-                        types += '    T{} = function{}; cdecl;\n'.format(fname, fdef)
-                        fields += '    F{}: T{};\n'.format(fname, fname)
-                        props += '    property {}: T{} read F{};\n'.format(fname, fname, fname)
-                        init += "  @F{0} := GetDllProc(FHandle, '{0}');\n".format(fname)
+                    symbols.append({'kind': 'function', 'name': fname, 'args': [arg.split(': ', 1) for arg in fargs],
+                                    'result': rettype, 'varargs': varargs})
                     signature = None
 
-        global defs, types, fields, props, init, cinit
-        if stateinfo:
-            stateinfo = stateinfo.strip('\n')
+        if stateinfo and stateinfo != ['']:
+            while stateinfo[0] == '':
+                stateinfo = stateinfo[1:]
+            while stateinfo[-1] == '':
+                stateinfo = stateinfo[:-1]
         if state == 'define':
             newdefs = procdefine(stateinfo).lstrip('\n')
             if len(newdefs) > 0:
                 if comment:
-                    defs += '\n'
-                    defs += comment.strip('\n') + '\n'
-                defs += 'const\n'
-                defs += newdefs
-                defs += '\n'
+                    defs.append('\n' + comment.strip('\n') + '\n')
+                defs.append('const\n' + newdefs + '\n')
         elif state == 'typedef':
             newdefs = proctypedef(stateinfo).lstrip('\n')
             if len(newdefs) > 0:
                 if comment:
-                    defs += '\n'
-                    defs += comment.strip('\n') + '\n'
-                defs += newdefs
-                defs += '\n'
+                    defs.append('\n' + comment.strip('\n') + '\n')
+                defs.append(newdefs + '\n')
         elif state == 'export':
             newdefs = procexport(stateinfo)
 
+    def tokenize(lines):
+        '''
+        Classify each pre-processed line by how it starts.  Yields (kind, line)
+        where kind is comment, indentedcomment, define, typedef, export or None.
+        '''
+
+        for line in lines:
+            m = linekindre.match(line)
+            yield (m.lastgroup if m else None), line
+
+    # The block being collected: its kind, its lines, and the text of the
+    # comment block right before it.
     global state, stateinfo, comment
     state = None
     stateinfo = None
@@ -676,7 +1075,7 @@ def parse(header):
 
     def setstate(newstate):
         global state, stateinfo, comment
-        if stateinfo and stateinfo.endswith('\n'):
+        if stateinfo and len(stateinfo) > 1 and stateinfo[-1] == '':
             if state:
                 process(state, stateinfo, comment)
             state = newstate
@@ -688,47 +1087,387 @@ def parse(header):
                     return
             else:
                 if state == 'comment':
-                    comment = stateinfo
+                    comment = '\n'.join(stateinfo)
             process(state, stateinfo, comment)
             if state != 'comment':
                 comment = None
             state = newstate
             stateinfo = None
 
-    for line in lines + ['']:
-        if line.startswith('(*') or line.startswith(' *'):
-            setstate('comment')
-        elif not state and line.lstrip(' ').startswith('(*'):
+    for kind, line in tokenize(lines + ['']):
+        if kind == 'comment' or (kind == 'indentedcomment' and not state):
             setstate('comment')
-        elif line.startswith('#define'):
-            setstate('define')
-        elif line.startswith('typedef') or \
-             line.startswith('struct') or \
-             line.startswith('enum'):
-            setstate('typedef')
-        elif line.startswith('H5_DLL'):
-            setstate('export')
+        elif kind in ('define', 'typedef', 'export'):
+            setstate(kind)
         elif line and not state:
             raise Exception(header, line)
         if state:
-            stateinfo = smartjoin('\n', stateinfo, line)
+            if stateinfo and stateinfo != ['']:
+                stateinfo.append(line)
+            else:
+                stateinfo = [line]
     setstate(None)
 
     print(file = sys.stderr)
+    return Parsed(defs, symbols)
+
+def parsejob(header):
+    '''
+    Run parse(header) with its diagnostics captured, so that they can be
+    replayed in header order.  Returns (parsed, diagnostics, seconds).
+    '''
+
+    stderr = sys.stderr
+    sys.stderr = log = StringIO()
+    start = time.time()
+    try:
+        parsed = parse(header)
+    except BaseException:
+        stderr.write(log.getvalue())
+        raise
+    finally:
+        sys.stderr = stderr
+    return parsed, log.getvalue(), time.time() - start
+
+# Result types of optional stubs that report failure as -1
+failingresults = set(['herr_t', 'hid_t', 'htri_t', 'ssize_t', 'Integer', 'int64_t'])
+
+def symbolfragments(symbol):
+    '''
+    Return (name, dependencies, fragments) of an exported symbol, one of the
+    alias, variable and function entries of the IR, for the binding mode
+    selected on the command line.
+    '''
+
+    name = symbol['name']
+    frag = defaultdict(str)
+    if symbol['kind'] == 'alias':
+        frag['props'] += '    property {}: hid_t read F{};\n'.format(name, symbol['field'])
+        return name, symbol['field'], frag
+
+    if symbol['kind'] == 'variable':
+        ctype = symbol['type']
+        frag['fields'] += '    F{}: {};\n'.format(name, ctype)
+        if args.external:
+            frag['externvars'] += '  {}_g: {}; cvar; external HDF5Lib;\n'.format(name, ctype)
+            frag['cinit'] += '  F{0} := {0}_g;\n'.format(name)
+        else:
+            frag['cinit'] += "  F{cname} := P{ctype}(GetDllProc(FHandle, '{cname}_g'))^;\n".format(cname = name, ctype = ctype)
+        return name, '{0} P{0}'.format(ctype), frag
+
+    fargs = ['{}: {}'.format(aname, atyp) for aname, atyp in symbol['args']]
+    if len(fargs) > 0:
+        fdef = '(' + '; '.join(fargs) + ')'
+    else:
+        fdef = ''
+    fdef = fdef + ': ' + symbol['result']
+    argnames = ', '.join([aname for aname, atyp in symbol['args']])
+
+    if symbol['varargs'] and args.external:
+        frag['externs'] += '// function {}{}; cdecl; varargs; external HDF5Lib;\n'.format(name, fdef)
+        frag['methods'] += '    // function {}{};\n'.format(name, fdef)
+    elif symbol['varargs']:
+        frag['types'] += '    // T{} = function{}; cdecl; varargs;\n'.format(name, fdef)
+        frag['fields'] += '    // F{}: T{};\n'.format(name, name)
+        frag['props'] += '    // property {}: T{} read {};\n'.format(name, name, name)
+    elif args.external and name in optional:
+        # Nothing to link against in older libraries: always fail
+        frag['methods'] += '    function {}{}; inline;\n'.format(name, fdef)
+        frag['bodies'] += 'function {}.{}{};\n'.format(classname, name, fdef)
+        frag['bodies'] += 'begin\n'
+        if symbol['result'] in failingresults:
+            frag['bodies'] += '  Result := -1;\n'
+        else:
+            frag['bodies'] += '  Result := Default({});\n'.format(symbol['result'])
+        frag['bodies'] += 'end;\n\n'
+    elif args.external:
+        frag['externs'] += 'function {}{}; cdecl; external HDF5Lib;\n'.format(name, fdef)
+        frag['methods'] += '    function {}{}; inline;\n'.format(name, fdef)
+        frag['bodies'] += 'function {}.{}{};\n'.format(classname, name, fdef)
+        frag['bodies'] += 'begin\n'
+        frag['bodies'] += '  Result := {}.{}({});\n'.format(unitname, name, argnames)
+        frag['bodies'] += 'end;\n\n'
+    else:
+        frag['types'] += '    T{} = function{}; cdecl;\n'.format(name, fdef)
+        frag['fields'] += '    F{}: T{};\n'.format(name, name)
+        frag['props'] += '    property {}: T{} read F{};\n'.format(name, name, name)
+        if name in optional:
+            frag['init'] += "  @F{0} := GetProcAddress(FHandle, '{0}');  // optional\n".format(name)
+        elif args.lazy:
+            frag['init'] += '  @F{0} := @Lazy{0};\n'.format(name)
+            frag['stubs'] += 'function Lazy{}{}; cdecl;\n'.format(name, fdef)
+            frag['stubs'] += 'begin\n'
+            frag['stubs'] += "  @LazyDll.F{0} := GetDllProc(LazyDll.FHandle, '{0}');\n".format(name)
+            frag['stubs'] += '  Result := LazyDll.F{}({});\n'.format(name, argnames)
+            frag['stubs'] += 'end;\n\n'
+        else:
+            frag['init'] += "  @F{0} := GetDllProc(FHandle, '{0}');\n".format(name)
+    return name, fdef, frag
+
+class Cache(object):
+    '''
+    On-disk store of parsejob() results, one pickle per header.  An entry is
+    keyed by the header contents and the generator script itself, so editing
+    either the header or hdf5pas.py invalidates it.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.abspath(__file__), 'rb') as f:
+            self.generator = hashlib.sha1(f.read()).hexdigest()
+        self.used = set()
+
+    def filename(self, header):
+        key = hashlib.sha1(' '.join([self.generator, header, loadheader(header).digest,
+                                     str(args.deprecated)]).encode())
+        return os.path.join(self.path, key.hexdigest() + '.pickle')
+
+    def load(self, header):
+        '''
+        Return the cached (parsed, diagnostics) for header, or None.
+        '''
 
-graph = nx.DiGraph()
-graph.onodes = []
-parsedeps('hdf5.h', graph)
-paths = nx.all_pairs_shortest_path_length(graph)
-for header in sorted(graph.onodes, key = lambda header: len(paths[header])):
-    parse(header)
-
-for line in template.format(date = datetime.date.today(),
-                            defs = defs.strip('\n'),
-                            classname = classname,
-                            types = types.strip('\n'),
-                            fields = fields.strip('\n'),
-                            props = props.strip('\n'),
-                            init = init.strip('\n'),
-                            cinit = cinit.strip('\n')).split('\n'):
-    print(line.rstrip())
+        filename = self.filename(header)
+        self.used.add(filename)
+        try:
+            with open(filename, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def store(self, header, parsed, diagnostics):
+        filename = self.filename(header)
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        with replacing(filename, 'wb') as f:
+            pickle.dump((parsed, diagnostics), f, 2)
+
+    def prune(self):
+        '''
+        Remove the entries not used since this Cache was created; return how
+        many were removed.
+        '''
+
+        stale = set(glob.glob(os.path.join(self.path, '*.pickle'))) - self.used
+        for filename in stale:
+            os.remove(filename)
+        return len(stale)
+
+def diffir(old, new):
+    '''
+    Yield a line for each symbol of IR new that is not in IR old (+), each
+    one of old missing from new (-) and each declared differently (~).
+    '''
+
+    def index(ir):
+        return OrderedDict(((symbol['kind'], symbol['name']), symbol)
+                           for entry in ir['headers'] for symbol in entry['symbols'])
+
+    old = index(old)
+    new = index(new)
+    for key in old:
+        if key not in new:
+            yield '- {} {}'.format(*key)
+    for key, symbol in new.items():
+        if key not in old:
+            yield '+ {} {}'.format(*key)
+        elif symbol != old[key]:
+            yield '~ {} {}'.format(*key)
+            yield '    was {}'.format(json.dumps(old[key], sort_keys = True))
+            yield '    now {}'.format(json.dumps(symbol, sort_keys = True))
+
+def identifiers(text):
+    '''
+    Lower-cased Pascal identifiers in text, comments and string literals excluded.
+    '''
+
+    text = re.sub(r"\(\*.*?\*\)|\{.*?\}|'[^'\n]*'|//[^\n]*", ' ', text, flags = re.S)
+    return set(name.lower() for name in re.findall('[A-Za-z_][A-Za-z0-9_]*', text))
+
+def selectexports(needed):
+    '''
+    Return the names of exports reachable from needed, adding the identifiers
+    their declarations use to needed.
+    '''
+
+    selected = set()
+    changed = True
+    while changed:
+        changed = False
+        for name, deps, frag in exports:
+            if name.lower() in needed and name not in selected:
+                selected.add(name)
+                needed |= identifiers(deps)
+                changed = True
+    return selected
+
+def prunedefs(defs, needed):
+    '''
+    Drop the const/type declarations in defs not reachable from needed.
+    Comments preceding a run of declarations are kept if any of them is;
+    comments directly following an enum or record stay with it.
+    '''
+
+    Decl = namedtuple('Decl', ['section', 'names', 'refs', 'lines'])
+    groups = [([], [])]
+    section = None
+    lines = None
+    trailing = False
+    for line in defs.split('\n'):
+        code = re.sub('\(\*.*?\*\)', '', line).rstrip()
+        if lines is None:
+            m = re.match('  ([A-Za-z_][A-Za-z0-9_]*) *=(.*)', code)
+            if line in ('const', 'type'):
+                section = line
+                trailing = False
+                continue
+            elif not m and trailing and line:
+                groups[-1][1][-1].lines.append(line)
+                continue
+            elif not m:
+                trailing = False
+                if groups[-1][1]:
+                    groups.append(([], []))
+                groups[-1][0].append(line)
+                continue
+            lines = [line]
+            names = [m.group(1)]
+            kind = m.group(2).strip()
+        else:
+            lines.append(line)
+            if kind == '':
+                mm = re.match('    +\(?([A-Za-z_][A-Za-z0-9_]*)', code)
+                if mm:
+                    names.append(mm.group(1))
+        if (kind == '' and code.endswith(');')) or \
+           (kind == 'record' and code == '  end;') or \
+           kind not in ('', 'record'):
+            names = set(name.lower() for name in names)
+            groups[-1][1].append(Decl(section, names, identifiers('\n'.join(lines)) - names, lines))
+            trailing = kind in ('', 'record')
+            lines = None
+
+    declared = defaultdict(list)
+    for comments, decls in groups:
+        for decl in decls:
+            for name in decl.names:
+                declared[name].append(decl)
+    kept = set()
+    pending = list(needed)
+    while pending:
+        for decl in declared[pending.pop()]:
+            if id(decl) not in kept:
+                kept.add(id(decl))
+                pending += decl.refs
+
+    result = []
+    section = None
+    for comments, decls in groups:
+        decls = [decl for decl in decls if id(decl) in kept]
+        if decls:
+            result += comments
+            for decl in decls:
+                if decl.section != section:
+                    section = decl.section
+                    result.append(section)
+                result += decl.lines
+    return '\n'.join(result)
+
+if __name__ == '__main__':
+    if args.loadir:
+        with open(args.loadir) as f:
+            ir = json.load(f)
+        if ir.get('format') != irformat:
+            parser.error('{}: not an IR file of format {}'.format(args.loadir, irformat))
+        print('{} headers loaded from {}.'.format(len(ir['headers']), args.loadir), file = sys.stderr)
+    else:
+        ir = {'format': irformat, 'headers': []}
+        graph = OrderedDict()
+        parsedeps(root, graph)
+        order = sortdeps(graph)
+        cache = Cache(args.cachedir)
+        cached = {}
+        if args.cache:
+            for header in order:
+                entry = cache.load(header)
+                if entry:
+                    cached[header] = entry
+        missing = [header for header in order if header not in cached]
+
+        jobs = args.jobs or multiprocessing.cpu_count()
+        start = time.time()
+        if jobs == 1 or len(missing) < 2:
+            results = iter(map(parsejob, missing))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            results = ProcessPoolExecutor(jobs).map(parsejob, missing)
+        cputime = 0.0
+        for header in order:
+            if header in cached:
+                parsed, diagnostics = cached[header]
+                seconds = 0.0
+            else:
+                parsed, diagnostics, seconds = next(results)
+                if args.cache:
+                    cache.store(header, parsed, diagnostics)
+            sys.stderr.write(diagnostics)
+            ir['headers'].append({'header': header, 'digest': loadheader(header).digest,
+                                  'defs': parsed.defs, 'symbols': parsed.symbols})
+            cputime += seconds
+        walltime = time.time() - start
+        print('{} headers, {} bytes read.'.format(headerstats['files'], headerstats['bytes']), file = sys.stderr)
+        print('Parsed in {:.2f} s with {} job(s): {:.2f} s of parsing, {:.1f}x.'.format(
+              walltime, jobs, cputime, cputime / walltime if walltime else 1.0), file = sys.stderr)
+        if args.cache:
+            print('{} of {} headers from cache {}.'.format(len(cached), len(order), cache.path), file = sys.stderr)
+        if args.prunecache:
+            print('{} stale cache entries removed.'.format(cache.prune()), file = sys.stderr)
+
+    if args.saveir:
+        with replacing(args.saveir) as f:
+            json.dump(ir, f, separators = (',', ':'))
+
+    if args.diffir:
+        with open(args.diffir) as f:
+            for line in diffir(json.load(f), ir):
+                print(line)
+        sys.exit()
+
+    for entry in ir['headers']:
+        for fragment in entry['defs']:
+            emitter.add('defs', fragment)
+        for symbol in entry['symbols']:
+            if symbol['kind'] in ('alias', 'variable', 'function'):
+                exports.append(symbolfragments(symbol))
+
+    if args.usedby:
+        needed = set(['h5open'])
+        for source in args.usedby:
+            needed |= identifiers(open(source).read())
+        selected = selectexports(needed)
+        emitter.replace('defs', prunedefs(emitter.text('defs'), needed))
+    else:
+        selected = set(name for name, deps, frag in exports)
+
+    for name, deps, frag in exports:
+        if name in selected:
+            for section in frag:
+                emitter.add(section, frag[section])
+
+    if args.external:
+        body = externtemplate
+    elif args.lazy:
+        body = dlltemplate + lazyimpl + templatetail.replace('begin\n  if FHandle',
+                                                              'begin\n  if LazyDll = Self then\n    LazyDll := nil;\n  if FHandle', 1)
+    else:
+        body = dlltemplate + eagerimpl + templatetail
+    if args.hl:
+        template = hltemplate + body.replace('  H5open;\n', '')
+    else:
+        template += body
+
+    values = dict(date = datetime.date.today(), classname = classname, libname = libname)
+    if args.output:
+        emitter.save(template, args.output, **values)
+    else:
+        emitter.write(template, sys.stdout, **values)
@@ -16,9 +16,13 @@ interface
 {$DEFINE  MODE_READWRITE:= 0 }
 {$DEFINE  MODE_CREATE   := 1 }
 {$DEFINE  MAX_TABLES  := 500 }
+{$DEFINE  CHUNK_ROWS  := 5 }
+{$DEFINE  CORE_INCREMENT := 16777216 }
+{$DEFINE  CACHE_FILE_BYTES := 268435456 }
+{$DEFINE  STREAM_BYTES := 67108864 }
 
 uses
-	fgl, hdf5dll, SysUtils;
+	fgl, hdf5dll, hdf5hldll, SysUtils, Classes, syncobjs;
 
 type
 
@@ -26,6 +30,9 @@ type
   PtrFloat = ^single;
   TMapStringInt = specialize TFPGMap<String,Integer>;
   TMapStringHID = specialize TFPGMap<String,hid_t>;
+  TMapIntInt = specialize TFPGMap<Integer,Integer>;
+  TOMXZones = array of Integer;
+  TOMXValues = array of Double;
 
   FileOpenException = Class(Exception);
   MatrixReadException = Class(Exception);
@@ -33,28 +40,248 @@ type
   OutOfMemoryException = Class(Exception);
   NoSuchTableException = Class(Exception);
 
+const
+  OMX_NO_DEFLATE = -1;
+
+  OMX_ACCESS_ROWS = 0;
+  OMX_ACCESS_COLUMNS = 1;
+
+  // openFile modes. Readers that never write should use OMX_OPEN_READONLY so
+  // many processes can share one file; OMX_OPEN_SWMR_READ follows a file a
+  // single writer keeps writing to (call refresh() to see its new data).
+  // That writer opens it with OMX_OPEN_SWMR_WRITE, or creates it with the
+  // swmr create option, and calls flush() to publish what it has written.
+  // SWMR needs HDF5 1.10 and a file on disk; tables and lookups cannot be
+  // added while SWMR writing.
+  OMX_OPEN_READWRITE = 0;
+  OMX_OPEN_READONLY = 1;
+  OMX_OPEN_SWMR_READ = 2;
+  OMX_OPEN_SWMR_WRITE = 3;
+
+  // Where a file's bytes live. The memory kinds use the HDF5 core driver:
+  // the whole file is held in RAM, OMX_STORAGE_MEMORY writes it to disk in
+  // one sequential pass at closeFile, OMX_STORAGE_SCRATCH never writes it.
+  OMX_STORAGE_DISK = 0;
+  OMX_STORAGE_MEMORY = 1;
+  OMX_STORAGE_SCRATCH = 2;
+
+type
+
+  // Dataset layout for createFile/CreateNew. A chunk dimension of 0 means
+  // the whole matrix dimension; larger ones are clipped to it.
+  TOMXCreateOptions = record
+      chunkRows:Integer;
+      chunkCols:Integer;
+      shuffle:Boolean;
+      deflate:Integer;         // 0-9, or OMX_NO_DEFLATE
+      fillValue:Double;
+      storage:Integer;         // OMX_STORAGE_*
+      swmr:Boolean;            // SWMR writing once the tables exist
+  end;
+
+  // Chunk cache of each table's dataset (H5Pset_chunk_cache). Zero byte and
+  // slot counts are chosen automatically from the chunk size and access:
+  // enough bytes for every chunk one row (or column) crosses, capped at an
+  // equal share of fileBytes, and about 100 slots per cached chunk.
+  // OMXCacheOptions caps the whole file at CACHE_FILE_BYTES (256 MB).
+  TOMXCacheOptions = record
+      fileBytes:Int64;         // total for the automatic caches, 0: no cap
+      tableBytes:Int64;
+      slots:Integer;
+      w0:Double;               // preemption policy 0..1, negative: HDF5's 0.75
+      access:Integer;          // OMX_ACCESS_ROWS or OMX_ACCESS_COLUMNS
+  end;
+
+  // A table resolved once by getTableHandle, for loops that should do no
+  // string work. Valid until closeFile, refresh, or setTableChunkCache on
+  // the table.
+  TOMXTable = record
+      index:Integer;           // 1-based table number
+      dataset:hid_t;
+      dataspace:hid_t;
+      dtype:hid_t;             // memory element type
+  end;
+
+  // I/O counters of one table, kept while setStats is on. Times are
+  // wall-clock seconds spent inside H5Dread/H5Dwrite.
+  TOMXTableStats = record
+      reads:Int64;             // H5Dread calls
+      writes:Int64;            // H5Dwrite calls
+      rowsRead:Int64;
+      rowsWritten:Int64;
+      colsRead:Int64;
+      residentCols:Int64;      // getCol calls served by loadColumns' copy
+      bytesRead:Int64;
+      bytesWritten:Int64;
+      readSeconds:Double;
+      writeSeconds:Double;
+      opens:Integer;           // dataset opens
+      cacheBytes:Int64;        // chunk cache of the open dataset, 0 if closed
+      cacheSlots:Int64;
+  end;
+
+  // Everything summarizeTable gathers in its one pass over a table
+  TOMXSummary = record
+      rowSums:TOMXValues;
+      colSums:TOMXValues;
+      total:Double;
+      minValue:Double;
+      maxValue:Double;
+  end;
+
+  // Called by forEachRow for every row, with that row of each table
+  TOMXRowProc = procedure(row:Integer; const rowptrs:array of Pointer; data:Pointer);
+
+  // Rows of one chunk-aligned block collected by writeRow before writing
+  TRowBlock = record
+      firstRow:Integer;        // 0 when nothing is buffered
+      rows:Integer;
+      filled:Integer;
+      present:array of Boolean;
+      data:array of Byte;
+  end;
+
 
 TOMXMatrix = class(TObject)
 
 public
     constructor Create();
-    constructor CreateNew(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string; std_type:Integer);
+    constructor CreateNew(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string; std_type:Integer); overload;
+    constructor CreateNew(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string; std_type:Integer;
+                          options:TOMXCreateOptions); overload;
     destructor Destroy(); override;
 
-    procedure openFile(fileName:string);
+    procedure openFile(fileName:string); overload;
+    procedure openFile(fileName:string; cache:TOMXCacheOptions); overload;
+    procedure openFile(fileName:string; mode:Integer); overload;
+    procedure openFile(fileName:string; mode:Integer; cache:TOMXCacheOptions); overload;
+    procedure openFile(fileName:string; mode:Integer; storage:Integer); overload;
     procedure closeFile();
+    function  isOMX(): Boolean;
+    procedure refresh();
+    procedure flush();
 
     //Read/Open operations
-    function  getRows(): Integer;
+    function  getRows(): Integer; overload;
     function  getCols(): Integer;
     function  getTables(): Integer;
-    procedure getRow(table:string; row:Integer; rowptr:Pointer);  // throws InvalidOperationException, MatrixReadException
-    procedure getCol(table:string; col:Integer; colptr:Pointer);  // throws InvalidOperationException, MatrixReadException
+    procedure getRow(table:string; row:Integer; rowptr:Pointer); overload;  // throws InvalidOperationException, MatrixReadException
+    procedure getCol(table:string; col:Integer; colptr:Pointer); overload;  // throws InvalidOperationException, MatrixReadException
     function  getTableName(table:Integer): String;
 
+    //Element types: each table's type on disk is read when its dataset is
+    //opened. Buffers hold the memory type, double (64) unless CreateNew
+    //said 32 or setMemoryType changes it; HDF5 converts between the two,
+    //so float32 tables read into doubles, or stay float32 end to end.
+    //Changing the memory type flushes buffered writes and drops resident
+    //columns; table handles and row readers have to be got again.
+    function  getTableType(table:string): Integer;  // throws NoSuchTableException
+    function  getMemoryType(): Integer;
+    procedure setMemoryType(bits:Integer);  // throws InvalidOperationException
+
+    //Block operations: count rows from firstRow (1-based) in a single HDF5 call;
+    //buffer holds count*cols values. Blocks starting on a multiple of
+    //getChunkRows() touch each chunk once.
+    procedure getRows(table:string; firstRow:Integer; count:Integer; buffer:Pointer); overload;
+    procedure readTable(table:string; buffer:Pointer); overload;
+    function  getChunkRows(table:string): Integer; overload;
+
     //Write/Create operations
-    procedure createFile(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string);
-    procedure writeRow(table:string;  row:Integer; rowptr:Pointer);
+    procedure createFile(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string); overload;
+    procedure createFile(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string;
+                         options:TOMXCreateOptions); overload;
+    procedure writeRow(table:string;  row:Integer; rowptr:Pointer); overload;
+    procedure writeRows(table:string; firstRow:Integer; count:Integer; buffer:Pointer); overload;
+    procedure writeTable(table:string; buffer:Pointer); overload;
+
+    //Table handles: resolve a table once, then use the overloads below,
+    //which do no string hashing or map searches per call.
+    function  getTableHandle(table:string): TOMXTable; overload;  // throws NoSuchTableException
+    function  getTableHandle(table:Integer): TOMXTable; overload;  // throws NoSuchTableException
+    procedure getRow(const h:TOMXTable; row:Integer; rowptr:Pointer); overload;
+    procedure getCol(const h:TOMXTable; col:Integer; colptr:Pointer); overload;
+    procedure getRows(const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer); overload;
+    procedure readTable(const h:TOMXTable; buffer:Pointer); overload;
+    function  getChunkRows(const h:TOMXTable): Integer; overload;
+    procedure writeRow(const h:TOMXTable; row:Integer; rowptr:Pointer); overload;
+    procedure writeRows(const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer); overload;
+    procedure writeTable(const h:TOMXTable; buffer:Pointer); overload;
+
+    //Several tables at once: the same rows of each table, into buffers[i]
+    //for tables[i], with one memory space and one range check for them all.
+    //forEachRow reads chunk-aligned blocks of the tables and calls proc for
+    //every row in order.
+    procedure getRowMulti(const tables:array of string; row:Integer; const buffers:array of Pointer); overload;
+    procedure getRowMulti(const tables:array of TOMXTable; row:Integer; const buffers:array of Pointer); overload;
+    procedure getRowsMulti(const tables:array of string; firstRow:Integer; count:Integer; const buffers:array of Pointer); overload;
+    procedure getRowsMulti(const tables:array of TOMXTable; firstRow:Integer; count:Integer; const buffers:array of Pointer); overload;
+    procedure forEachRow(const tables:array of TOMXTable; proc:TOMXRowProc; data:Pointer);
+
+    //Write buffering: writeRow collects rows until a whole chunk-aligned block
+    //is present and writes it at once, so each chunk is compressed once.
+    //budget is in bytes across all tables; 0 (the default) writes through.
+    procedure setWriteBuffer(budget:Int64);
+    procedure flushWrites();
+
+    //Chunk cache for tables opened from now on; the table form overrides
+    //the file-wide one and reopens the table if it is already open.
+    procedure setChunkCache(cache:TOMXCacheOptions);
+    procedure setTableChunkCache(table:string; cache:TOMXCacheOptions);
+
+    //Column access: loadColumns reads a table once, a chunk-aligned block at
+    //a time, into a resident column-major copy which getCol then serves
+    //from memory. Writes keep the copy current.
+    procedure loadColumns(table:string);  // throws OutOfMemoryException
+    procedure releaseColumns(table:string);
+
+    //Raw chunk copy: moves the stored (compressed) chunks of count rows from
+    //firstRow of a table in source to destRow of a table here, without
+    //inflating and deflating them, for copying, subsetting or concatenating
+    //tables. Both tables need the same columns, chunk shape, element type
+    //and filters; rows must start on a chunk boundary and count be whole
+    //chunks, unless the copy runs to the last row of both. Loads hdf5_hl.
+    procedure copyChunks(source:TOMXMatrix; const src:TOMXTable; const dest:TOMXTable;
+                         firstRow:Integer; count:Integer; destRow:Integer);  // throws InvalidOperationException
+    procedure copyTable(source:TOMXMatrix; srcTable:string; destTable:string);  // throws InvalidOperationException
+
+    //Zone lookups: vectors in /lookup holding the zone number of each row
+    //(and column). openFile reads one once and indexes it: the lookup named
+    //by useLookup, or else the first one with a zone per row. useLookup on
+    //an open file switches to that lookup at once. Zones then map to 1-based
+    //indexes in constant time, 0 meaning no such zone. Only lookups with a
+    //zone per row are indexed; getColByZone needs a square matrix.
+    procedure writeLookup(name:string; const zones:array of Integer);  // throws InvalidOperationException
+    function  readLookup(name:string): TOMXZones;  // throws NoSuchTableException
+    procedure useLookup(name:string);  // throws NoSuchTableException, InvalidOperationException
+    function  zoneIndex(zone:Integer): Integer;
+    procedure zoneIndexes(const zones:array of Integer; var indexes:array of Integer);
+    procedure getRowByZone(table:string; zone:Integer; rowptr:Pointer); overload;  // throws InvalidOperationException
+    procedure getRowByZone(const h:TOMXTable; zone:Integer; rowptr:Pointer); overload;
+    procedure getColByZone(table:string; zone:Integer; colptr:Pointer); overload;  // throws InvalidOperationException
+    procedure getColByZone(const h:TOMXTable; zone:Integer; colptr:Pointer); overload;
+
+    //I/O statistics: per-table counts of HDF5 reads, writes and dataset
+    //opens, off until setStats. Counters restart with each file; with
+    //dumpOnClose they are printed to stderr by closeFile.
+    procedure setStats(enabled:Boolean; dumpOnClose:Boolean);
+    procedure resetStats();
+    function  getStats(table:string): TOMXTableStats;  // throws NoSuchTableException
+    function  metadataCacheHitRate(): Double;
+    procedure dumpStats(var f:Text);
+
+    //Reductions and transforms: one pass over each table, a chunk-aligned
+    //block at a time so every chunk is decompressed once, working in double.
+    //transformTable sets each value v to v*factor + offset; combineTables
+    //writes constant + sum of weights[i]*tables[i] to destTable, creating
+    //it like tables[0] if it does not exist.
+    function  summarizeTable(table:string): TOMXSummary;  // throws NoSuchTableException
+    function  rowSums(table:string): TOMXValues;
+    function  colSums(table:string): TOMXValues;
+    function  tableTotal(table:string): Double;
+    procedure tableMinMax(table:string; var minValue:Double; var maxValue:Double);
+    procedure transformTable(table:string; factor:Double; offset:Double);  // throws InvalidOperationException
+    procedure combineTables(destTable:string; const tables:array of string; const weights:array of Double;
+                            constant:Double);  // throws InvalidOperationException
 
 
 
@@ -83,25 +310,144 @@ public
     std_dtype:Integer;
 private
 
-	_memspace:hid_t;
+    _tableBits:array[1..MAX_TABLES] of Integer;   // element size on disk
+
+	_memspace:hid_t;   // one row
+    _colspace:hid_t;   // one column
+
+    _writeBudget:Int64;
+    _writeBuffered:Int64;
+    _rowBlock:array[1..MAX_TABLES] of TRowBlock;
+
+    _cache:TOMXCacheOptions;
+    _tableCache:array[1..MAX_TABLES] of TOMXCacheOptions;
+    _tableCacheSet:array[1..MAX_TABLES] of Boolean;
+
+    _columns:array[1..MAX_TABLES] of array of Byte;
+    _residentTables:Integer;
+
+    _openMode:Integer;
+
+    _zoneLookup:string;              // lookup in use, '' for none
+    _zoneWanted:string;              // lookup chosen by useLookup
+    _zoneBase:Integer;               // smallest zone number
+    _zoneDirect:array of Integer;    // index by zone - _zoneBase, 0 for none
+    _zoneSparse:TMapIntInt;          // instead, for widely spread zones
+
+    _statsOn:Boolean;
+    _statsDump:Boolean;
+    _stats:array[1..MAX_TABLES] of TOMXTableStats;
 
     //Methods
     procedure readTableNames();
     //procedure printErrorCode(error:Integer);
-    procedure init_tables (tableNames:array of string);
+    procedure init_tables (tableNames:array of string; options:TOMXCreateOptions);
     function  openDataset(table:string):hid_t;  // throws InvalidOperationException
+    function  tableDataset(table:string):hid_t;  // throws NoSuchTableException
+    procedure transferRows(const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer; writing:Boolean);
+    procedure transferBlock(const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer; writing:Boolean; memspace:hid_t);
+    function  rowsMemspace(count:Integer):hid_t;
+    procedure checkRows(firstRow:Integer; count:Integer);  // throws InvalidOperationException
+    procedure bufferRow(const h:TOMXTable; row:Integer; rowptr:Pointer);
+    procedure flushBlock(t:Integer);
+    function  chunkCacheList(t:Integer; chunkRows:hsize_t; chunkCols:hsize_t; elemSize:size_t):hid_t;
+    procedure forgetTable(table:string);
+    procedure scatterRow(t:Integer; row:Integer; rowptr:Pointer);
+    procedure checkWritable();  // throws InvalidOperationException
+    function  fileAccessList(storage:Integer; swmr:Boolean):hid_t;  // throws InvalidOperationException
+    function  sameChunks(a:hid_t; b:hid_t; var chunk:array of hsize_t; var elemSize:size_t):Boolean;
+    procedure fillChunk(const h:TOMXTable; const offset:array of hsize_t; const chunk:array of hsize_t);
+    procedure copyRows(source:TOMXMatrix; const src:TOMXTable; const dest:TOMXTable;
+                       firstRow:Integer; count:Integer; destRow:Integer);
+    procedure indexZones(const zones:array of Integer);
+    function  zoneRow(zone:Integer):Integer;  // throws InvalidOperationException
+    procedure openLookup();
+    procedure useZones(name:string; const zones:array of Integer);  // throws InvalidOperationException
+    function  zoneCol(zone:Integer):Integer;  // throws InvalidOperationException
+    procedure countTransfer(t:Integer; writing:Boolean; rows:Integer; cols:Integer; seconds:Double);
+    function  streamRows(const tables:array of TOMXTable):Integer;
+    procedure writeDoubles(const h:TOMXTable; firstRow:Integer; count:Integer; const block:array of Double;
+                           var singles:array of Single);
+    procedure createTableLike(table:string; const like:TOMXTable);  // throws InvalidOperationException
 
 end;
 
-function isOMX(filename:string):Boolean;
+// One block of rows in a TOMXRowReader ring
+TRowSlot = record
+    firstRow:Integer;
+    rows:Integer;
+    data:array of Byte;
+end;
+
+// Sequential read-ahead over one table. An I/O thread reads chunk-aligned
+// blocks of rows into a ring of 'depth' buffers while the caller works on
+// the current row, so reading and inflating overlap with the caller's work.
+// All HDF5 calls are made on that thread. Unless the HDF5 library was
+// built thread-safe (H5is_library_threadsafe), no other HDF5 call may be
+// made anywhere in the process while a reader exists: not through this
+// matrix, another TOMXMatrix, or THDF5Dll directly. Programs on Unix need
+// cthreads.
+TOMXRowReader = class(TObject)
+
+public
+    constructor Create(matrix:TOMXMatrix; table:string; depth:Integer); overload;  // throws NoSuchTableException
+    constructor Create(matrix:TOMXMatrix; const h:TOMXTable; depth:Integer); overload;
+    destructor Destroy(); override;
+
+    // Step to the next row; rowptr stays valid until the next call.
+    // Returns false after the last row.
+    function  nextRow(out row:Integer; out rowptr:Pointer):Boolean;  // throws MatrixReadException
+
+private
+    _matrix:TOMXMatrix;
+    _table:TOMXTable;
+    _thread:TThread;
+
+    _slots:array of TRowSlot;
+    _lock:TCriticalSection;
+    _dataReady:TEvent;         // set when a slot is filled, or reading ends
+    _spaceFree:TEvent;         // set when a slot is released
+    _filled:Integer;           // slots holding unread rows
+    _done:Boolean;             // no more slots will be filled
+    _stop:Boolean;             // set by Destroy to end the thread early
+    _ended:Boolean;            // nextRow has returned false
+    _error:string;
+
+    _current:Integer;          // slot being consumed, -1 for none
+    _rowInSlot:Integer;
+
+    procedure readAhead();
+end;
+
+function isOMX(filename:string):Boolean; overload;
+function isOMX(f:hid_t):Boolean; overload;
+
+// Creation presets: OMXRowOptions is the classic layout (CHUNK_ROWS full
+// rows, deflate 1) for sequential row scans; OMXColumnOptions chunks full
+// columns for getCol; OMXTileOptions uses square tiles with shuffle for
+// sub-block access. Set deflate to OMX_NO_DEFLATE for scratch matrices.
+function OMXRowOptions():TOMXCreateOptions;
+function OMXColumnOptions():TOMXCreateOptions;
+function OMXTileOptions():TOMXCreateOptions;
+
+// Automatic chunk cache for the given OMX_ACCESS_* pattern
+function OMXCacheOptions(access:Integer):TOMXCacheOptions;
 
 
 implementation
 { the implementation is the code to execute the interface commands above }
+
+uses
+	{$IFDEF WINDOWS}Windows{$ELSE}BaseUnix, Unix{$ENDIF};   // statsClock
 var {global}
     h5:THDF5Dll;
     //= THDF5Dll.Create('path/to/dll')  ;
+    h5hl:THDF5HLDll;   // loaded on first use by HLDll()
 
+const
+    // H5F_LIBVER_V110 (LATEST) of HDF5 1.10, which SWMR needs; the enum in
+    // hdf5dll follows 1.8, where LATEST is 1 and means the 1.8 format
+    LIBVER_V110 = 2;
 
 
 type
@@ -363,6 +709,42 @@ begin
 end;
 
 
+function nextPrime(n:Int64):Int64;
+var
+    d:Int64;
+    prime:Boolean;
+begin
+    result := n;
+    repeat
+        prime := result > 1;
+        d := 2;
+        while prime and (d * d <= result) do begin
+            prime := (result mod d) <> 0;
+            Inc(d);
+        end;
+        if (not prime) then Inc(result);
+    until prime;
+end;
+
+// Seconds from an arbitrary origin, for timing calls
+function statsClock():Double;
+{$IFDEF WINDOWS}
+var
+    count, freq:Int64;
+begin
+    QueryPerformanceCounter(count);
+    QueryPerformanceFrequency(freq);
+    result := count / freq;
+end;
+{$ELSE}
+var
+    tv:timeval;
+begin
+    fpgettimeofday(@tv, nil);
+    result := tv.tv_sec + tv.tv_usec / 1e6;
+end;
+{$ENDIF}
+
 constructor TOMXMatrix.Create();
 begin
     _fileOpen := false;
@@ -370,6 +752,7 @@ begin
     _nRows := 0;
     _nCols := 0;
     _memspace := -1;
+    _colspace := -1;
 
     _tableLookup:= TMapStringInt.Create();
     _dataset := TMapStringHID.Create();
@@ -378,6 +761,18 @@ begin
     _dataset_count := 0;
     _dataspace_count := 0;
 
+    _writeBudget := 0;
+    _writeBuffered := 0;
+
+    _cache := OMXCacheOptions(OMX_ACCESS_ROWS);
+    _residentTables := 0;
+    _openMode := OMX_OPEN_READWRITE;
+    _zoneLookup := '';
+    _zoneWanted := '';
+    _zoneSparse := nil;
+    _statsOn := false;
+    _statsDump := false;
+
     _std_dtype := H5.H5T_NATIVE_DOUBLE;
     std_dtype := 64;
 
@@ -385,12 +780,20 @@ end;
 
 
 constructor TOMXMatrix.CreateNew(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string; std_type:Integer);
+begin
+    CreateNew(tables, rows, cols, tableNames, fileName, std_type, OMXRowOptions());
+end;
+
+
+constructor TOMXMatrix.CreateNew(tables:Integer;  rows:Integer; cols:Integer; tableNames:array of string; fileName:string; std_type:Integer;
+                                 options:TOMXCreateOptions);
 begin
     _fileOpen := false;
     _nTables := 0;
     _nRows := 0;
     _nCols := 0;
     _memspace := -1;
+    _colspace := -1;
 
     _tableLookup:= TMapStringInt.Create();
     _dataset := TMapStringHID.Create();
@@ -399,6 +802,18 @@ begin
     _dataset_count := 0;
     _dataspace_count := 0;
 
+    _writeBudget := 0;
+    _writeBuffered := 0;
+
+    _cache := OMXCacheOptions(OMX_ACCESS_ROWS);
+    _residentTables := 0;
+    _openMode := OMX_OPEN_READWRITE;
+    _zoneLookup := '';
+    _zoneWanted := '';
+    _zoneSparse := nil;
+    _statsOn := false;
+    _statsDump := false;
+
     _std_dtype := H5.H5T_NATIVE_DOUBLE;
     std_dtype := 64;
     if (std_type=32) then begin
@@ -406,7 +821,7 @@ begin
        std_dtype := 32;
     end;
 
-    createFile(tables,rows,cols,tableNames,fileName);
+    createFile(tables,rows,cols,tableNames,fileName,options);
 end;
 
 
@@ -416,11 +831,17 @@ begin
         H5.H5Sclose(_memspace);
         _memspace := -1;
     end;
+    if (_colspace > -1 ) then begin
+        H5.H5Sclose(_colspace);
+        _colspace := -1;
+    end;
 
     // Close H5 file handles
     if (_fileOpen=true) then begin
+        flushWrites();
         H5.H5Fclose(_h5file);
     end;
+    FreeAndNil(_zoneSparse);
 
     _fileOpen := false;
 end;
@@ -428,23 +849,37 @@ end;
 //Write/Create operations ---------------------------------------------------
 
 procedure TOMXMatrix.createFile( tables:Integer;  rows:Integer;  cols:Integer; tableNames:array of string;  fileName:String);
+begin
+    createFile(tables, rows, cols, tableNames, fileName, OMXRowOptions());
+end;
+
+procedure TOMXMatrix.createFile( tables:Integer;  rows:Integer;  cols:Integer; tableNames:array of string;  fileName:String;
+                                 options:TOMXCreateOptions);
 var
 	shape:array[0..1] of Integer;
-	plist:hid_t;
+	plist, fapl, group:hid_t;
 begin
+    // Create the physical file - H5F_ACC_TRUNC = overwrite an existing file.
+    // The access list comes first: it rejects unknown storage options.
+    fapl := fileAccessList(options.storage, options.swmr);
+    _h5file := H5.H5Fcreate(PChar(fileName), H5F_ACC_TRUNC, H5P_DEFAULT, fapl);
+    if (fapl <> H5P_DEFAULT) then begin
+        H5.H5Pclose(fapl);
+    end;
+    if (0 > _h5file) then begin
+        writeln(stderr, 'ERROR: Could not create file ', fileName);
+        exit;
+    end;
+
     _fileOpen := true;
     _mode := MODE_CREATE;
+    _openMode := OMX_OPEN_READWRITE;
+    resetStats();
 
     _nRows := rows;
     _nCols := cols;
     _nTables := tables;
 
-    // Create the physical file - H5F_ACC_TRUNC = overwrite an existing file
-    _h5file := H5.H5Fcreate(PChar(fileName), H5F_ACC_TRUNC, H5P_DEFAULT, H5P_DEFAULT);
-    if (0 > _h5file) then begin
-        writeln(stderr, 'ERROR: Could not create file ', fileName);
-    end;
-
 
     // Build SHAPE attribute
     shape[0] := rows;
@@ -458,263 +893,1763 @@ begin
     plist := H5.H5Pcreate (H5.H5P_GROUP_CREATE);
     H5.H5Pset_link_creation_order(plist, H5P_CRT_ORDER_TRACKED);
 
-    // Create folder structure
-    H5.H5Gcreate2(_h5file, '/data', 0, plist, 0);
-    H5.H5Gcreate2(_h5file, '/lookup', 0, plist, 0);
+    // Create folder structure. Open groups would keep the file open past
+    // H5Fclose, so close them straight away.
+    group := H5.H5Gcreate2(_h5file, '/data', 0, plist, 0);
+    if (group >= 0) then H5.H5Gclose(group);
+    group := H5.H5Gcreate2(_h5file, '/lookup', 0, plist, 0);
+    if (group >= 0) then H5.H5Gclose(group);
 
     H5.H5Pclose(plist);
 
     // Create the datasets
-    init_tables(tableNames);
+    init_tables(tableNames, options);
+
+    // Readers may open the file from here on
+    if (options.swmr) then begin
+        if (0 > H5.H5Fstart_swmr_write(_h5file)) then begin
+            writeln(stderr, 'ERROR: Couldnt start SWMR writing to ', fileName);
+            exit;
+        end;
+        _openMode := OMX_OPEN_SWMR_WRITE;
+    end;
 end;
 
 procedure TOMXMatrix.writeRow( table:String;  row:Integer; rowptr:Pointer);
-var
-   count, offset:array[0..1] of hsize_t;
 begin
+    writeRow(getTableHandle(table), row, rowptr);
+end;
 
-	// First see if we've opened this table already
-	if (_dataset.IndexOf(table) < 0) then begin
-		// Does this table exist?
-		if (_tableLookup.IndexOf(table) < 0) then begin
-			Raise NoSuchTableException.Create(table);
-		end;
-		_dataset[table] := openDataset(table);
-                Inc(_dataset_count);
-	end;
+procedure TOMXMatrix.writeRow( const h:TOMXTable; row:Integer; rowptr:Pointer);
+begin
+    checkWritable();
+    if (_writeBudget > 0) then begin
+        bufferRow(h, row, rowptr);
+    end else begin
+        transferRows(h, row, 1, rowptr, true);
+    end;
+end;
 
+procedure TOMXMatrix.writeRows( table:String; firstRow:Integer; count:Integer; buffer:Pointer);
+begin
+    transferRows(getTableHandle(table), firstRow, count, buffer, true);
+end;
 
+procedure TOMXMatrix.writeRows( const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer);
+begin
+    transferRows(h, firstRow, count, buffer, true);
+end;
 
-    count[0] := 1;
-    count[1] := _nCols;
+procedure TOMXMatrix.writeTable( table:String; buffer:Pointer);
+begin
+    transferRows(getTableHandle(table), 1, _nRows, buffer, true);
+end;
 
-    offset[0] := row-1;
-    offset[1] := 0;
+procedure TOMXMatrix.writeTable( const h:TOMXTable; buffer:Pointer);
+begin
+    transferRows(h, 1, _nRows, buffer, true);
+end;
 
-    if (_memspace <0 ) then begin
-    	_memspace := H5.H5Screate_simple(2,count,Phsize_t(0));
+procedure TOMXMatrix.setWriteBuffer( budget:Int64);
+begin
+    if (budget <= 0) then begin
+        flushWrites();
+        budget := 0;
     end;
+    _writeBudget := budget;
+end;
 
-    if (_dataspace.IndexOf(table)<0) then begin
-        _dataspace[table] := H5.H5Dget_space(_dataset[table]);
-        Inc(_dataspace_count);
+procedure TOMXMatrix.setChunkCache( cache:TOMXCacheOptions);
+begin
+    _cache := cache;
+end;
+
+procedure TOMXMatrix.setTableChunkCache( table:string; cache:TOMXCacheOptions);
+var
+    t:Integer;
+begin
+    if (_tableLookup.IndexOf(table) < 0) then begin
+        Raise NoSuchTableException.Create(table);
     end;
+    t := _tableLookup[table];
+    _tableCache[t] := cache;
+    _tableCacheSet[t] := true;
 
-    H5.H5Sselect_hyperslab (_dataspace[table], H5S_SELECT_SET, offset, Phsize_t(0), count, Phsize_t(0));
+    // The cache is fixed when a dataset is opened
+    flushBlock(t);
+    forgetTable(table);
+end;
 
-    if (0 > H5.H5Dwrite(_dataset[table], _std_dtype, _memspace, _dataspace[table], H5P_DEFAULT, rowptr)) then begin
-        writeln(stderr, 'ERROR: writing table ',table,', row ', row);
-        exit;
+procedure TOMXMatrix.loadColumns( table:string);
+var
+    t, blockRows, first, count, i, rowBytes:Integer;
+    block:array of Byte;
+begin
+    if (_tableLookup.IndexOf(table) < 0) then begin
+        Raise NoSuchTableException.Create(table);
     end;
+    t := _tableLookup[table];
+    if (Length(_columns[t]) > 0) then exit;
+
+    rowBytes := _nCols * (std_dtype div 8);
+    blockRows := getChunkRows(table);
+    try
+        SetLength(_columns[t], Int64(_nRows) * rowBytes);
+        SetLength(block, Int64(blockRows) * rowBytes);
+    except
+        on EOutOfMemory do begin
+            SetLength(_columns[t], 0);
+            Raise OutOfMemoryException.Create('no room for the columns of ' + table);
+        end;
+    end;
+    Inc(_residentTables);
+
+    // One pass over the table, each chunk decompressed once
+    first := 1;
+    while (first <= _nRows) do begin
+        count := blockRows;
+        if (first + count - 1 > _nRows) then count := _nRows - first + 1;
+        getRows(table, first, count, @(block[0]));
+        for i := 0 to count-1 do begin
+            scatterRow(t, first + i, @(block[i * rowBytes]));
+        end;
+        first := first + count;
+    end;
+end;
 
+procedure TOMXMatrix.releaseColumns( table:string);
+var
+    t:Integer;
+begin
+    if (_tableLookup.IndexOf(table) < 0) then exit;
+    t := _tableLookup[table];
+    if (Length(_columns[t]) > 0) then begin
+        SetLength(_columns[t], 0);
+        Dec(_residentTables);
+    end;
+end;
 
-
+// The high-level library is only needed for raw chunk I/O
+function HLDll():THDF5HLDll;
+begin
+    if (h5hl = nil) then begin
+        h5hl := THDF5HLDll.Create('hdf5_hl.dll');
+    end;
+    result := h5hl;
 end;
 
-//Read/Open operations ------------------------------------------------------
+procedure TOMXMatrix.copyTable( source:TOMXMatrix; srcTable:string; destTable:string);
+begin
+    if (source.getRows() <> _nRows) then begin
+        Raise InvalidOperationException.Create('copying ' + IntToStr(source.getRows()) + ' rows into '
+                                               + IntToStr(_nRows));
+    end;
+    copyChunks(source, source.getTableHandle(srcTable), getTableHandle(destTable), 1, _nRows, 1);
+end;
 
-procedure TOMXMatrix.openFile( filename:string);
+procedure TOMXMatrix.copyChunks( source:TOMXMatrix; const src:TOMXTable; const dest:TOMXTable;
+                                 firstRow:Integer; count:Integer; destRow:Integer);
 var
-	shape:array[0..1] of Integer;
-	status:herr_t;
+    chunk:array[0..1] of hsize_t;
+    srcOffset, destOffset:array[0..1] of hsize_t;
+    elemSize:size_t;
+    chunkBytes:hsize_t;
+    buffer:array of Byte;
+    filters:uint32_t;
+    r, c:Int64;
+    major, minor, release:Cardinal;
 begin
-    // Try to open the existing file
-    _h5file := H5.H5Fopen(PChar(filename), H5F_ACC_RDWR, H5P_DEFAULT);
-    if (_h5file < 0) then begin
-        writeln(stderr, 'ERROR: Cant find or open file ',filename);
-        exit;
+    checkWritable();
+    if (count < 1) then exit;
+    source.checkRows(firstRow, count);
+    checkRows(destRow, count);
+
+    if (source.getCols() <> _nCols) then begin
+        Raise InvalidOperationException.Create('copying ' + IntToStr(source.getCols()) + ' columns into '
+                                               + IntToStr(_nCols));
+    end;
+    if (not sameChunks(src.dataset, dest.dataset, chunk, elemSize)) then begin
+        Raise InvalidOperationException.Create('tables ' + source.getTableName(src.index) + ' and ' + _tableName[dest.index]
+                                               + ' differ in chunk shape, element type or filters');
+    end;
+    if ((firstRow - 1) mod chunk[0] <> 0) or ((destRow - 1) mod chunk[0] <> 0) or
+       ((count mod chunk[0] <> 0) and
+        ((firstRow + count - 1 <> source.getRows()) or (destRow + count - 1 <> _nRows))) then begin
+        Raise InvalidOperationException.Create('rows ' + IntToStr(firstRow) + '-' + IntToStr(firstRow + count - 1)
+                                               + ' are not whole chunks of ' + IntToStr(chunk[0]) + ' rows');
     end;
 
-    // OK, it's open and it's HDF5;
-    // Now query some things about the file.
-    _fileOpen := true;
-	_mode := MODE_READWRITE;
+    // Buffered rows must be in the chunks before they are moved or replaced
+    source.flushWrites();
+    flushWrites();
 
-    status := 0;
-    status += H5LTget_attribute_int(_h5file, '/', 'SHAPE', @(shape[0]));
-    if (status < 0) then begin
-        writeln(stderr, 'ERROR: ',filename,' doesnt have SHAPE attribute');
+    // Before HDF5 1.10.2 stored chunk sizes are unknown: copy the values
+    if (0 > H5.H5get_libversion(@major, @minor, @release)) or
+       ((major * 1000 + minor) * 1000 + release < 1010002) then begin
+        copyRows(source, src, dest, firstRow, count, destRow);
         exit;
     end;
-    _nRows := shape[0];
-    _nCols := shape[1];
 
-    readTableNames();
-end;
+    SetLength(buffer, chunk[0] * chunk[1] * elemSize);
+    r := 0;
+    while (r < count) do begin
+        c := 0;
+        while (c < _nCols) do begin
+            srcOffset[0] := firstRow - 1 + r;
+            srcOffset[1] := c;
+            destOffset[0] := destRow - 1 + r;
+            destOffset[1] := c;
+
+            // Chunks never written in the source hold the fill value
+            if (0 > H5.H5Dget_chunk_storage_size(src.dataset, srcOffset, @chunkBytes)) then begin
+                // Units built with --external only have a failing stub
+                if (r = 0) and (c = 0) then begin
+                    copyRows(source, src, dest, firstRow, count, destRow);
+                    exit;
+                end;
+                writeln(stderr, 'ERROR: Couldnt find chunk of table ',source.getTableName(src.index),' at row ',srcOffset[0] + 1);
+            end else if (chunkBytes = 0) then begin
+                fillChunk(dest, destOffset, chunk);
+            end else begin
+                // A chunk the filters could not shrink may be larger than raw
+                if (chunkBytes > hsize_t(Length(buffer))) then begin
+                    SetLength(buffer, chunkBytes);
+                end;
+                if (0 > HLDll().H5DOread_chunk(src.dataset, H5P_DEFAULT, srcOffset, @filters, @(buffer[0]))) or
+                   (0 > HLDll().H5DOwrite_chunk(dest.dataset, H5P_DEFAULT, filters, destOffset, chunkBytes, @(buffer[0]))) then begin
+                    writeln(stderr, 'ERROR: Couldnt copy chunk of table ',source.getTableName(src.index),' at row ',srcOffset[0] + 1,
+                            ' to table ',_tableName[dest.index]);
+                end;
+            end;
+            c := c + chunk[1];
+        end;
+        r := r + chunk[0];
+    end;
 
-function TOMXMatrix.getRows():Integer;
-begin
-    result:= _nRows;
+    // The resident copy no longer matches the file
+    if (Length(_columns[dest.index]) > 0) then begin
+        releaseColumns(_tableName[dest.index]);
+        loadColumns(_tableName[dest.index]);
+    end;
 end;
 
-function TOMXMatrix.getCols() :Integer;
+// Can stored chunks of dataset a be written verbatim into dataset b?
+function TOMXMatrix.sameChunks( a:hid_t; b:hid_t; var chunk:array of hsize_t; var elemSize:size_t):Boolean;
+var
+    typeA, typeB, plistA, plistB:hid_t;
+    chunkB:array[0..1] of hsize_t;
+    flags, flagsB:Cardinal;
+    nelmts, nelmtsB:size_t;
+    values, valuesB:array[0..7] of Cardinal;
+    config:Cardinal;
+    filter:H5Z_filter_t;
+    i, n, j:Integer;
 begin
-    result:= _nCols;
-end;
+    typeA := H5.H5Dget_type(a);
+    typeB := H5.H5Dget_type(b);
+    result := (H5.H5Tequal(typeA, typeB) > 0);
+    elemSize := H5.H5Tget_size(typeA);
+    H5.H5Tclose(typeA);
+    H5.H5Tclose(typeB);
+
+    plistA := H5.H5Dget_create_plist(a);
+    plistB := H5.H5Dget_create_plist(b);
+    result := result and (H5.H5Pget_chunk(plistA, 2, @(chunk[0])) = 2) and (H5.H5Pget_chunk(plistB, 2, chunkB) = 2)
+              and (chunk[0] = chunkB[0]) and (chunk[1] = chunkB[1]);
+
+    n := H5.H5Pget_nfilters(plistA);
+    result := result and (n = H5.H5Pget_nfilters(plistB));
+    i := 0;
+    while (result) and (i < n) do begin
+        // Same filter with the same settings (deflate level, optional flag)
+        nelmts := Length(values);
+        filter := H5.H5Pget_filter2(plistA, i, @flags, @nelmts, @(values[0]), 0, nil, @config);
+        nelmtsB := Length(valuesB);
+        result := (filter = H5.H5Pget_filter2(plistB, i, @flagsB, @nelmtsB, @(valuesB[0]), 0, nil, @config))
+                  and (flags = flagsB) and (nelmts = nelmtsB);
+        j := 0;
+        while (result) and (j < nelmts) and (j < Length(values)) do begin
+            result := (values[j] = valuesB[j]);
+            Inc(j);
+        end;
+        Inc(i);
+    end;
 
-function TOMXMatrix.getTables() :Integer;
-begin
-    result:= _nTables;
+    H5.H5Pclose(plistA);
+    H5.H5Pclose(plistB);
 end;
 
-function TOMXMatrix.getTableName( table:Integer):String;
+// Write the fill value over the chunk of a table at offset, unless that
+// chunk was never written either
+procedure TOMXMatrix.fillChunk( const h:TOMXTable; const offset:array of hsize_t; const chunk:array of hsize_t);
+var
+    plist, memspace:hid_t;
+    size:array[0..1] of hsize_t;
+    stored:hsize_t;
+    fill:Double;
+    values:array of Double;
+    i:Int64;
 begin
-    result:= _tableName[table];
+    if (0 <= H5.H5Dget_chunk_storage_size(h.dataset, @(offset[0]), @stored)) and (stored = 0) then exit;
+
+    // Chunks at the edges stick out of the table
+    size[0] := chunk[0];
+    size[1] := chunk[1];
+    if (offset[0] + size[0] > hsize_t(_nRows)) then size[0] := _nRows - offset[0];
+    if (offset[1] + size[1] > hsize_t(_nCols)) then size[1] := _nCols - offset[1];
+
+    fill := 0;
+    plist := H5.H5Dget_create_plist(h.dataset);
+    H5.H5Pget_fill_value(plist, H5.H5T_NATIVE_DOUBLE, @fill);
+    H5.H5Pclose(plist);
+    SetLength(values, size[0] * size[1]);
+    for i := 0 to High(values) do begin
+        values[i] := fill;
+    end;
+
+    memspace := H5.H5Screate_simple(2, size, Phsize_t(0));
+    if (0 > H5.H5Sselect_hyperslab(h.dataspace, H5S_SELECT_SET, @(offset[0]), Phsize_t(0), size, Phsize_t(0))) or
+       (0 > H5.H5Dwrite(h.dataset, H5.H5T_NATIVE_DOUBLE, memspace, h.dataspace, H5P_DEFAULT, @(values[0]))) then begin
+        writeln(stderr, 'ERROR: Couldnt fill chunk of table ',_tableName[h.index],' at row ',offset[0] + 1);
+    end;
+    H5.H5Sclose(memspace);
 end;
 
-procedure TOMXMatrix.getRow ( table:String;  row:Integer; rowptr:Pointer);
+// Copy count rows from a table in source by reading and writing them,
+// a chunk-aligned block at a time
+procedure TOMXMatrix.copyRows( source:TOMXMatrix; const src:TOMXTable; const dest:TOMXTable;
+                               firstRow:Integer; count:Integer; destRow:Integer);
 var
-	data_count:array[0..1] of hsize_t;
-	data_offset:array[0..1] of hsize_t;
+    hs:TOMXTable;
+    block:array of Double;
+    singles:array of Single;
+    blockRows, done, n:Integer;
 begin
-
-    // First see if we've opened this table already
-    if (_dataset.IndexOf(table)<0) then begin
-        // Does this table exist?
-        if (_tableLookup.IndexOf(table)<0) then begin
-            Raise MatrixReadException.Create('matrix read error') ;
-        end;
-        _dataset[table] := openDataset(table);
-        Inc(_dataset_count);
+    hs := src;
+    hs.dtype := H5.H5T_NATIVE_DOUBLE;
+    blockRows := source.streamRows([src]);
+    SetLength(block, Int64(blockRows) * _nCols);
+    if (std_dtype = 32) then SetLength(singles, Length(block));
+
+    done := 0;
+    while (done < count) do begin
+        n := blockRows;
+        if (done + n > count) then n := count - done;
+        source.transferRows(hs, firstRow + done, n, @(block[0]), false);
+        writeDoubles(dest, destRow + done, n, block, singles);
+        done := done + n;
     end;
+end;
 
-    data_count[0] := 1;
-    data_count[1] := _nCols;
-    data_offset[0] := row-1;
-    data_offset[1] := 0;
+//Zone lookups --------------------------------------------------------------
 
-    // Create dataspace if necessary.  Don't do every time or we'll run OOM.
-    if (_dataspace.IndexOf(table)<0) then begin
-        _dataspace[table] :=H5. H5Dget_space(_dataset[table]);
-        Inc(_dataspace_count);
+procedure TOMXMatrix.writeLookup( name:string; const zones:array of Integer);
+var
+    dims:array[0..0] of hsize_t;
+    space, dataset, group:hid_t;
+    path:string;
+begin
+    checkWritable();
+    if (Length(zones) <> _nRows) and (Length(zones) <> _nCols) then begin
+        Raise InvalidOperationException.Create('lookup ' + name + ' has ' + IntToStr(Length(zones))
+                                               + ' zones for ' + IntToStr(_nRows) + 'x' + IntToStr(_nCols));
     end;
 
-    // Define MEMORY slab (using data_count since we don't want to read zones+1 values!)
-    if (_memspace < 0) then begin
-        _memspace := H5.H5Screate_simple(2, data_count, Phsize_t(0));
+    // Replace a lookup of the same name
+    path := '/lookup/' + name;
+    if (H5.H5Lexists(_h5file, '/lookup', H5P_DEFAULT) <= 0) then begin
+        group := H5.H5Gcreate2(_h5file, '/lookup', 0, H5P_DEFAULT, 0);
+        if (group >= 0) then H5.H5Gclose(group);
+    end else if (H5.H5Lexists(_h5file, PChar(path), H5P_DEFAULT) > 0) then begin
+        H5.H5Ldelete(_h5file, PChar(path), H5P_DEFAULT);
     end;
 
-    // Define DATA slab
-    if (0 > H5.H5Sselect_hyperslab (_dataspace[table], H5S_SELECT_SET, data_offset, Phsize_t(0), data_count, Phsize_t(0))) then begin
-        writeln(stderr, 'ERROR: Couldnt select DATA subregion for table ',table,', subrow ',row);
+    dims[0] := Length(zones);
+    space := H5.H5Screate_simple(1, dims, Phsize_t(0));
+    dataset := H5.H5Dcreate2(_h5file, PChar(path), H5.H5T_NATIVE_INT, space, H5P_DEFAULT, H5P_DEFAULT, H5P_DEFAULT);
+    if (dataset < 0) then begin
+        H5.H5Sclose(space);
+        writeln(stderr, 'ERROR: Couldnt create lookup ',name);
         exit;
     end;
+    if (Length(zones) > 0) then begin
+        if (0 > H5.H5Dwrite(dataset, H5.H5T_NATIVE_INT, H5S_ALL, H5S_ALL, H5P_DEFAULT, @(zones[0]))) then begin
+            writeln(stderr, 'ERROR: writing lookup ',name);
+        end;
+    end;
+    H5.H5Dclose(dataset);
+    H5.H5Sclose(space);
 
-    // Read the data!
-    if (0 > H5.H5Dread(_dataset[table], _std_dtype, _memspace, _dataspace[table],
-            H5P_DEFAULT, rowptr)) then begin
-        writeln(stderr, 'ERROR: Couldnt read table ',table,', subrow ',row);
-        exit;
+    // The first row lookup written, or a new version of the one in use, is used
+    if ((_zoneLookup = '') or (_zoneLookup = name)) and (Length(zones) = _nRows) then begin
+        useZones(name, zones);
     end;
 end;
 
-procedure TOMXMatrix.getCol( table:String;  col:Integer; colptr:Pointer);
+function TOMXMatrix.readLookup( name:string):TOMXZones;
 var
-	data_count:array[0..1] of hsize_t;
-	data_offset:array[0..1] of hsize_t;
+    dims:array[0..0] of hsize_t;
+    space, dataset:hid_t;
+    path:string;
 begin
+    path := '/lookup/' + name;
+    if (H5.H5Lexists(_h5file, '/lookup', H5P_DEFAULT) <= 0) or
+       (H5.H5Lexists(_h5file, PChar(path), H5P_DEFAULT) <= 0) then begin
+        Raise NoSuchTableException.Create('lookup ' + name);
+    end;
 
-	// First see if we've opened this table already
-	if (_dataset.IndexOf(table) < 0) then begin
-		// Does this table exist?
-		if (_tableLookup.IndexOf(table) < 0) then begin
-			Raise MatrixReadException.Create('matrix read error');
-		end;
-		_dataset[table] := openDataset(table);
-                Inc(_dataset_count);
-	end;
-
-	data_count[0] := _nRows;
-	data_count[1] := 1;
-	data_offset[0] := 0;
-	data_offset[1] := col - 1;
-
-	// Create dataspace if necessary.  Don't do every time or we'll run OOM.
-	if (_dataspace.IndexOf(table) < 0) then begin
-		_dataspace[table] := H5.H5Dget_space(_dataset[table]);
-                Inc(_dataspace_count);
-	end;
-
-	// Define MEMORY slab (using data_count since we don't want to read zones+1 values!)
-	if (_memspace < 0) then begin
-		_memspace := H5.H5Screate_simple(2, data_count, Phsize_t(0));
-	end;
-
-	// Define DATA slab
-	if (0 > H5.H5Sselect_hyperslab(_dataspace[table], H5S_SELECT_SET, data_offset, Phsize_t(0), data_count, Phsize_t(0))) then begin
-		writeln(stderr, 'ERROR: Couldnt select DATA subregion for table ',table,', subcol ',
-			col);
-		exit;
-	end;
+    dataset := H5.H5Dopen2(_h5file, PChar(path), H5P_DEFAULT);
+    space := H5.H5Dget_space(dataset);
+    dims[0] := 0;
+    H5.H5Sget_simple_extent_dims(space, dims, Phsize_t(0));
+    SetLength(result, dims[0]);
+    if (dims[0] > 0) then begin
+        if (0 > H5.H5Dread(dataset, H5.H5T_NATIVE_INT, H5S_ALL, H5S_ALL, H5P_DEFAULT, @(result[0]))) then begin
+            writeln(stderr, 'ERROR: Couldnt read lookup ',name);
+        end;
+    end;
+    H5.H5Sclose(space);
+    H5.H5Dclose(dataset);
+end;
 
-	// Read the data!
-	if (0 > H5.H5Dread(_dataset[table], _std_dtype, _memspace, _dataspace[table],
-		H5P_DEFAULT, colptr)) then begin
-		writeln(stderr, 'ERROR: Couldnt read table ',table,', subcol ', col);
-		exit;
-	end;
+procedure TOMXMatrix.useLookup( name:string);
+begin
+    _zoneWanted := name;
+    if (_fileOpen) then begin
+        useZones(name, readLookup(name));
+    end;
 end;
 
-procedure TOMXMatrix.closeFile;
+function TOMXMatrix.zoneIndex( zone:Integer):Integer;
 var
-        j:Integer;
+    i:Integer;
 begin
-     if (_fileOpen=true) then begin
-         if (_dataset_Count > 0) then begin
-          for j := 0 to _dataset_Count-1 do begin
-              H5.H5Dclose(_dataset.Data[J]);
-          end;
-        end;
-
-        if (_dataspace_Count > 0) then begin
-          for j := 0 to _dataspace_Count-1 do begin
-              H5.H5Sclose(_dataspace.Data[J]);
-          end;
+    result := 0;
+    if (Length(_zoneDirect) > 0) then begin
+        if (zone >= _zoneBase) and (Int64(zone) - _zoneBase < Length(_zoneDirect)) then begin
+            result := _zoneDirect[zone - _zoneBase];
         end;
-
-        if (_memspace > -1 ) then begin
-            H5.H5Sclose(_memspace);
-            _memspace := -1;
+    end else if (_zoneSparse <> nil) then begin
+        if (_zoneSparse.Find(zone, i)) then begin
+            result := _zoneSparse.Data[i];
         end;
-
-
-        H5.H5Fclose(_h5file);
     end;
-    _fileOpen := false;
 end;
 
-// ---- Private functions ---------------------------------------------------
-
-function TOMXMatrix.openDataset( table:string):hid_t;
+procedure TOMXMatrix.zoneIndexes( const zones:array of Integer; var indexes:array of Integer);
 var
-        tname: string;
-        dataset: hid_t;
+    i:Integer;
 begin
+    if (Length(indexes) < Length(zones)) then begin
+        Raise InvalidOperationException.Create(IntToStr(Length(zones)) + ' zones but room for '
+                                               + IntToStr(Length(indexes)) + ' indexes');
+    end;
+    for i := 0 to High(zones) do begin
+        indexes[i] := zoneIndex(zones[i]);
+    end;
+end;
 
-     tname := '/data/' + table;
-
-     dataset := H5.H5Dopen2(_h5file, PChar(tname), H5P_DEFAULT);
-    if (dataset < 0) then
-        raise InvalidOperationException.Create('nope');
+procedure TOMXMatrix.getRowByZone( table:string; zone:Integer; rowptr:Pointer);
+begin
+    getRow(table, zoneRow(zone), rowptr);
+end;
 
+procedure TOMXMatrix.getRowByZone( const h:TOMXTable; zone:Integer; rowptr:Pointer);
+begin
+    getRow(h, zoneRow(zone), rowptr);
+end;
 
-    result:= dataset;
+procedure TOMXMatrix.getColByZone( table:string; zone:Integer; colptr:Pointer);
+begin
+    getCol(table, zoneCol(zone), colptr);
 end;
 
-//
-// Group traversal function. Build list of tablenames from this.
-//
+procedure TOMXMatrix.getColByZone( const h:TOMXTable; zone:Integer; colptr:Pointer);
+begin
+    getCol(h, zoneCol(zone), colptr);
+end;
 
-type POMXMatrix = ^TOMXMatrix;
+function TOMXMatrix.zoneRow( zone:Integer):Integer;
+begin
+    result := zoneIndex(zone);
+    if (result = 0) then begin
+        Raise InvalidOperationException.Create('zone ' + IntToStr(zone) + ' is not in lookup ' + _zoneLookup);
+    end;
+end;
 
-type T_LeafInfoFunc = function ( loc_id:hid_t;name:PChar; info:PH5L_info_t; opdata:Pointer):herr_t; CDecl;
+// Columns share the row lookup, which only fits a square matrix
+function TOMXMatrix.zoneCol( zone:Integer):Integer;
+begin
+    if (_nCols <> _nRows) then begin
+        Raise InvalidOperationException.Create('lookup ' + _zoneLookup + ' indexes rows; the matrix is '
+                                               + IntToStr(_nRows) + 'x' + IntToStr(_nCols));
+    end;
+    result := zoneRow(zone);
+end;
 
+// Index zones as the lookup in use; they must give a zone per row
+procedure TOMXMatrix.useZones( name:string; const zones:array of Integer);
+begin
+    if (Length(zones) <> _nRows) then begin
+        Raise InvalidOperationException.Create('lookup ' + name + ' has ' + IntToStr(Length(zones))
+                                               + ' zones for ' + IntToStr(_nRows) + ' rows');
+    end;
+    indexZones(zones);
+    _zoneLookup := name;
+end;
 
-function _leaf_info( loc_id:hid_t;name:PChar; info:PH5L_info_t; opdata:Pointer) : herr_t;  CDecl;
+// Index the lookup useLookup chose, or the first one with a zone per row
+procedure TOMXMatrix.openLookup();
 var
-        m : TOMXMatrix;
+    group:hid_t;
+    info:H5G_info_t;
+    name:array[0..255] of Char;
+    zones:TOMXZones;
+    i:hsize_t;
 begin
-    m := POMXMatrix(opdata)^;
+    if (_zoneWanted <> '') then begin
+        try
+            useZones(_zoneWanted, readLookup(_zoneWanted));
+        except
+            on NoSuchTableException do begin
+                writeln(stderr, 'WARNING: no lookup ',_zoneWanted,' in file');
+            end;
+            on e:InvalidOperationException do begin
+                writeln(stderr, 'WARNING: ',e.Message);
+            end;
+        end;
+        exit;
+    end;
+
+    if (H5.H5Lexists(_h5file, '/lookup', H5P_DEFAULT) <= 0) then exit;
+    group := H5.H5Gopen2(_h5file, '/lookup', H5P_DEFAULT);
+    if (group < 0) then exit;
+    info.nlinks := 0;
+    H5.H5Gget_info(group, @info);
+    H5.H5Gclose(group);
+
+    i := 0;
+    while (i < info.nlinks) do begin
+        if (H5.H5Lget_name_by_idx(_h5file, '/lookup', H5_INDEX_NAME, H5_ITER_INC, i, name, Length(name), H5P_DEFAULT) > 0) then begin
+            zones := readLookup(name);
+            if (Length(zones) = _nRows) then begin
+                useZones(name, zones);
+                exit;
+            end;
+        end;
+        Inc(i);
+    end;
+end;
+
+// Zones within a few times their count of each other get a direct table;
+// otherwise they go in a sorted map. The first index of a repeated zone wins.
+procedure TOMXMatrix.indexZones( const zones:array of Integer);
+var
+    i, lo, hi:Integer;
+begin
+    SetLength(_zoneDirect, 0);
+    FreeAndNil(_zoneSparse);
+    if (Length(zones) = 0) then exit;
+
+    lo := zones[0];
+    hi := zones[0];
+    for i := 1 to High(zones) do begin
+        if (zones[i] < lo) then lo := zones[i];
+        if (zones[i] > hi) then hi := zones[i];
+    end;
+
+    if (Int64(hi) - lo + 1 <= 4 * Int64(Length(zones)) + 1024) then begin
+        _zoneBase := lo;
+        SetLength(_zoneDirect, hi - lo + 1);
+        FillChar(_zoneDirect[0], Length(_zoneDirect) * SizeOf(Integer), 0);
+        for i := High(zones) downto 0 do begin
+            _zoneDirect[zones[i] - lo] := i + 1;
+        end;
+    end else begin
+        _zoneSparse := TMapIntInt.Create();
+        _zoneSparse.Sorted := true;
+        _zoneSparse.Duplicates := dupIgnore;
+        _zoneSparse.Capacity := Length(zones);
+        for i := 0 to High(zones) do begin
+            _zoneSparse.Add(zones[i], i + 1);
+        end;
+    end;
+end;
+
+//I/O statistics ------------------------------------------------------------
+
+procedure TOMXMatrix.setStats( enabled:Boolean; dumpOnClose:Boolean);
+begin
+    _statsOn := enabled;
+    _statsDump := dumpOnClose;
+end;
+
+procedure TOMXMatrix.resetStats();
+begin
+    FillChar(_stats, SizeOf(_stats), 0);
+    if (_fileOpen) and (_h5file >= 0) then begin
+        H5.H5Freset_mdc_hit_rate_stats(_h5file);
+    end;
+end;
+
+// Counters of a table, with the chunk cache its dataset was opened with.
+// HDF5 keeps no hit counts for chunk caches, only for the metadata cache.
+function TOMXMatrix.getStats( table:string):TOMXTableStats;
+var
+    i:Integer;
+    dapl:hid_t;
+    slots, bytes:size_t;
+    w0:Double;
+begin
+    if (_tableLookup.IndexOf(table) < 0) then begin
+        Raise NoSuchTableException.Create(table);
+    end;
+    result := _stats[_tableLookup[table]];
+    result.cacheBytes := 0;
+    result.cacheSlots := 0;
+
+    i := _dataset.IndexOf(table);
+    if (i >= 0) then begin
+        dapl := H5.H5Dget_access_plist(_dataset.Data[i]);
+        if (H5.H5Pget_chunk_cache(dapl, @slots, @bytes, @w0) >= 0) then begin
+            result.cacheBytes := bytes;
+            result.cacheSlots := slots;
+        end;
+        H5.H5Pclose(dapl);
+    end;
+end;
+
+// Hit rate of the file's metadata cache since it was opened or resetStats,
+// 0 when unknown
+function TOMXMatrix.metadataCacheHitRate():Double;
+begin
+    result := 0;
+    if (_fileOpen) then begin
+        if (H5.H5Fget_mdc_hit_rate(_h5file, @result) < 0) then result := 0;
+    end;
+end;
+
+procedure TOMXMatrix.dumpStats( var f:Text);
+var
+    t:Integer;
+    st:TOMXTableStats;
+begin
+    writeln(f, 'OMX I/O statistics, metadata cache hit rate ', metadataCacheHitRate():0:3);
+    writeln(f, 'table':20, 'opens':7, 'reads':10, 'rows':10, 'cols':8, 'resident':9, 'MB read':10, 's read':9,
+               'writes':10, 'rows':10, 'MB written':11, 's write':9, 'cache MB':9, 'slots':8);
+    for t := 1 to _nTables do begin
+        st := getStats(_tableName[t]);
+        writeln(f, _tableName[t]:20, st.opens:7, st.reads:10, st.rowsRead:10, st.colsRead:8, st.residentCols:9,
+                   st.bytesRead / 1048576:10:1, st.readSeconds:9:3,
+                   st.writes:10, st.rowsWritten:10, st.bytesWritten / 1048576:11:1, st.writeSeconds:9:3,
+                   st.cacheBytes / 1048576:9:1, st.cacheSlots:8);
+    end;
+end;
+
+procedure TOMXMatrix.countTransfer( t:Integer; writing:Boolean; rows:Integer; cols:Integer; seconds:Double);
+var
+    bytes:Int64;
+begin
+    bytes := (Int64(rows) * _nCols + Int64(cols) * _nRows) * (std_dtype div 8);
+    if (writing) then begin
+        Inc(_stats[t].writes);
+        Inc(_stats[t].rowsWritten, rows);
+        Inc(_stats[t].bytesWritten, bytes);
+        _stats[t].writeSeconds := _stats[t].writeSeconds + seconds;
+    end else begin
+        Inc(_stats[t].reads);
+        Inc(_stats[t].rowsRead, rows);
+        Inc(_stats[t].colsRead, cols);
+        Inc(_stats[t].bytesRead, bytes);
+        _stats[t].readSeconds := _stats[t].readSeconds + seconds;
+    end;
+end;
+
+//Reductions and transforms -------------------------------------------------
+
+function TOMXMatrix.summarizeTable( table:string):TOMXSummary;
+var
+    h:TOMXTable;
+    block:array of Double;
+    blockRows, first, count, r, c:Integer;
+    v, rowSum:Double;
+    p:PtrDouble;
+begin
+    h := getTableHandle(table);
+    h.dtype := H5.H5T_NATIVE_DOUBLE;
+
+    SetLength(result.rowSums, _nRows);
+    SetLength(result.colSums, _nCols);
+    for c := 0 to _nCols-1 do result.colSums[c] := 0;
+    result.total := 0;
+    result.minValue := 0;
+    result.maxValue := 0;
+    if (_nRows < 1) or (_nCols < 1) then exit;
+
+    blockRows := streamRows([h]);
+    SetLength(block, Int64(blockRows) * _nCols);
+
+    first := 1;
+    while (first <= _nRows) do begin
+        count := blockRows;
+        if (first + count - 1 > _nRows) then count := _nRows - first + 1;
+        transferRows(h, first, count, @(block[0]), false);
+        if (first = 1) then begin
+            result.minValue := block[0];
+            result.maxValue := block[0];
+        end;
+        for r := 0 to count-1 do begin
+            p := @(block[Int64(r) * _nCols]);
+            rowSum := 0;
+            for c := 0 to _nCols-1 do begin
+                v := p[c];
+                rowSum := rowSum + v;
+                result.colSums[c] := result.colSums[c] + v;
+                if (v < result.minValue) then result.minValue := v;
+                if (v > result.maxValue) then result.maxValue := v;
+            end;
+            result.rowSums[first + r - 1] := rowSum;
+            result.total := result.total + rowSum;
+        end;
+        first := first + count;
+    end;
+end;
+
+function TOMXMatrix.rowSums( table:string):TOMXValues;
+begin
+    result := summarizeTable(table).rowSums;
+end;
+
+function TOMXMatrix.colSums( table:string):TOMXValues;
+begin
+    result := summarizeTable(table).colSums;
+end;
+
+function TOMXMatrix.tableTotal( table:string):Double;
+begin
+    result := summarizeTable(table).total;
+end;
+
+procedure TOMXMatrix.tableMinMax( table:string; var minValue:Double; var maxValue:Double);
+var
+    summary:TOMXSummary;
+begin
+    summary := summarizeTable(table);
+    minValue := summary.minValue;
+    maxValue := summary.maxValue;
+end;
+
+procedure TOMXMatrix.transformTable( table:string; factor:Double; offset:Double);
+var
+    h, hd:TOMXTable;
+    block:array of Double;
+    singles:array of Single;
+    blockRows, first, count:Integer;
+    i:Int64;
+begin
+    checkWritable();
+    h := getTableHandle(table);
+    hd := h;
+    hd.dtype := H5.H5T_NATIVE_DOUBLE;
+    if (_nRows < 1) or (_nCols < 1) then exit;
+
+    blockRows := streamRows([h]);
+    SetLength(block, Int64(blockRows) * _nCols);
+    if (std_dtype = 32) then SetLength(singles, Length(block));
+
+    first := 1;
+    while (first <= _nRows) do begin
+        count := blockRows;
+        if (first + count - 1 > _nRows) then count := _nRows - first + 1;
+        transferRows(hd, first, count, @(block[0]), false);
+        for i := 0 to Int64(count) * _nCols - 1 do begin
+            block[i] := block[i] * factor + offset;
+        end;
+        writeDoubles(h, first, count, block, singles);
+        first := first + count;
+    end;
+end;
+
+procedure TOMXMatrix.combineTables( destTable:string; const tables:array of string; const weights:array of Double;
+                                    constant:Double);
+var
+    src:array of TOMXTable;
+    all:array of TOMXTable;
+    dest:TOMXTable;
+    block, acc:array of Double;
+    singles:array of Single;
+    blockRows, first, count, j:Integer;
+    i:Int64;
+    w:Double;
+begin
+    if (Length(tables) = 0) or (Length(tables) <> Length(weights)) then begin
+        Raise InvalidOperationException.Create(IntToStr(Length(tables)) + ' tables but '
+                                               + IntToStr(Length(weights)) + ' weights');
+    end;
+    checkWritable();
+
+    SetLength(src, Length(tables));
+    for j := 0 to High(tables) do begin
+        src[j] := getTableHandle(tables[j]);
+        src[j].dtype := H5.H5T_NATIVE_DOUBLE;
+    end;
+    if (_tableLookup.IndexOf(destTable) < 0) then begin
+        createTableLike(destTable, src[0]);
+    end;
+    dest := getTableHandle(destTable);
+    if (_nRows < 1) or (_nCols < 1) then exit;
+
+    SetLength(all, Length(src) + 1);
+    for j := 0 to High(src) do all[j] := src[j];
+    all[High(all)] := dest;
+    blockRows := streamRows(all);
+    SetLength(block, Int64(blockRows) * _nCols);
+    SetLength(acc, Length(block));
+    if (std_dtype = 32) then SetLength(singles, Length(block));
+
+    first := 1;
+    while (first <= _nRows) do begin
+        count := blockRows;
+        if (first + count - 1 > _nRows) then count := _nRows - first + 1;
+        for i := 0 to Int64(count) * _nCols - 1 do begin
+            acc[i] := constant;
+        end;
+        for j := 0 to High(src) do begin
+            transferRows(src[j], first, count, @(block[0]), false);
+            w := weights[j];
+            for i := 0 to Int64(count) * _nCols - 1 do begin
+                acc[i] := acc[i] + w * block[i];
+            end;
+        end;
+        writeDoubles(dest, first, count, acc, singles);
+        first := first + count;
+    end;
+end;
+
+// Rows per block so that blocks are whole chunks of all the tables: the
+// least common multiple of their chunk heights, unless that is much taller
+// than the tallest chunk, and at least CHUNK_ROWS rows. Blocks of all the
+// tables together stay within STREAM_BYTES of doubles, so chunks spanning
+// every row (column chunks) are read in parts through the chunk cache
+// rather than the whole table at once.
+function TOMXMatrix.streamRows( const tables:array of TOMXTable):Integer;
+var
+    i:Integer;
+    rows, tallest, chunk, a, b, r, maxRows:Int64;
+begin
+    rows := 1;
+    tallest := 1;
+    for i := 0 to High(tables) do begin
+        chunk := getChunkRows(tables[i]);
+        if (chunk > tallest) then tallest := chunk;
+        if (rows > _nRows) then continue;
+        a := rows;
+        b := chunk;
+        while (b > 0) do begin
+            r := a mod b;
+            a := b;
+            b := r;
+        end;
+        rows := (rows div a) * chunk;
+    end;
+    if (rows > 4 * tallest) then rows := tallest;
+
+    rows := ((CHUNK_ROWS + rows - 1) div rows) * rows;
+
+    maxRows := STREAM_BYTES div (Int64(_nCols + 1) * SizeOf(Double) * (Length(tables) + 1));
+    if (rows > maxRows) then begin
+        if (tallest <= maxRows) then begin
+            rows := (maxRows div tallest) * tallest;
+        end else begin
+            rows := maxRows;
+        end;
+    end;
+
+    if (rows > _nRows) then rows := _nRows;
+    if (rows < 1) then rows := 1;
+    result := rows;
+end;
+
+// Write count rows of doubles to a table, narrowing them through singles
+// first when the tables are float32
+procedure TOMXMatrix.writeDoubles( const h:TOMXTable; firstRow:Integer; count:Integer; const block:array of Double;
+                                   var singles:array of Single);
+var
+    i:Int64;
+begin
+    if (std_dtype = 32) then begin
+        for i := 0 to Int64(count) * _nCols - 1 do begin
+            singles[i] := block[i];
+        end;
+        transferRows(h, firstRow, count, @(singles[0]), true);
+    end else begin
+        transferRows(h, firstRow, count, @(block[0]), true);
+    end;
+end;
+
+// New table with the type, shape, chunks and filters of another
+procedure TOMXMatrix.createTableLike( table:string; const like:TOMXTable);
+var
+    plist, dtype, dataset:hid_t;
+    tpath:string;
+begin
+    if (_nTables >= MAX_TABLES) then begin
+        Raise InvalidOperationException.Create('no room for table ' + table);
+    end;
+
+    tpath := '/data/' + table;
+    plist := H5.H5Dget_create_plist(like.dataset);
+    dtype := H5.H5Dget_type(like.dataset);
+    dataset := H5.H5Dcreate2(_h5file, PChar(tpath), dtype, like.dataspace, H5P_DEFAULT, plist, H5P_DEFAULT);
+    H5.H5Pclose(plist);
+    if (dataset < 0) then begin
+        H5.H5Tclose(dtype);
+        Raise InvalidOperationException.Create('could not create table ' + table);
+    end;
+    // tableDataset reopens it with a chunk cache to suit
+    H5.H5Dclose(dataset);
+
+    Inc(_nTables);
+    _tableName[_nTables] := table;
+    _tableLookup[table] := _nTables;
+    _tableBits[_nTables] := H5.H5Tget_size(dtype) * 8;
+    H5.H5Tclose(dtype);
+end;
+
+// Known from the first open of the table's dataset
+function TOMXMatrix.getTableType( table:string):Integer;
+begin
+    tableDataset(table);
+    result := _tableBits[_tableLookup[table]];
+end;
+
+function TOMXMatrix.getMemoryType():Integer;
+begin
+    result := std_dtype;
+end;
+
+procedure TOMXMatrix.setMemoryType( bits:Integer);
+var
+    t:Integer;
+begin
+    if (bits <> 32) and (bits <> 64) then begin
+        Raise InvalidOperationException.Create('memory type must be 32 or 64 bits, not ' + IntToStr(bits));
+    end;
+    if (bits = std_dtype) then exit;
+
+    // Buffered rows and resident columns are in the old type
+    flushWrites();
+    for t := 1 to MAX_TABLES do begin
+        SetLength(_columns[t], 0);
+    end;
+    _residentTables := 0;
+
+    std_dtype := bits;
+    if (bits = 32) then begin
+        _std_dtype := H5.H5T_NATIVE_FLOAT;
+    end else begin
+        _std_dtype := H5.H5T_NATIVE_DOUBLE;
+    end;
+end;
+
+procedure TOMXMatrix.flushWrites();
+var
+    t:Integer;
+begin
+    if (_writeBuffered = 0) then exit;
+    for t := 1 to MAX_TABLES do begin
+        flushBlock(t);
+    end;
+end;
+
+//Read/Open operations ------------------------------------------------------
+
+procedure TOMXMatrix.openFile( filename:string; cache:TOMXCacheOptions);
+begin
+    openFile(filename, OMX_OPEN_READWRITE, cache);
+end;
+
+procedure TOMXMatrix.openFile( filename:string; mode:Integer; cache:TOMXCacheOptions);
+begin
+    _cache := cache;
+    openFile(filename, mode);
+end;
+
+procedure TOMXMatrix.openFile( filename:string);
+begin
+    openFile(filename, OMX_OPEN_READWRITE);
+end;
+
+procedure TOMXMatrix.openFile( filename:string; mode:Integer);
+begin
+    openFile(filename, mode, OMX_STORAGE_DISK);
+end;
+
+procedure TOMXMatrix.openFile( filename:string; mode:Integer; storage:Integer);
+var
+	shape:array[0..1] of Integer;
+	status:herr_t;
+	flags:Cardinal;
+	fapl:hid_t;
+begin
+    case mode of
+        OMX_OPEN_READWRITE: flags := H5F_ACC_RDWR;
+        OMX_OPEN_READONLY:  flags := H5F_ACC_RDONLY;
+        OMX_OPEN_SWMR_READ: flags := H5F_ACC_RDONLY or H5F_ACC_SWMR_READ;
+        OMX_OPEN_SWMR_WRITE: flags := H5F_ACC_RDWR or H5F_ACC_SWMR_WRITE;
+    else
+        Raise InvalidOperationException.Create('unknown open mode ' + IntToStr(mode));
+    end;
+
+    // Try to open the existing file
+    fapl := fileAccessList(storage, mode = OMX_OPEN_SWMR_WRITE);
+    _h5file := H5.H5Fopen(PChar(filename), flags, fapl);
+    if (fapl <> H5P_DEFAULT) then begin
+        H5.H5Pclose(fapl);
+    end;
+    if (_h5file < 0) then begin
+        writeln(stderr, 'ERROR: Cant find or open file ',filename);
+        exit;
+    end;
+
+    // OK, it's open and it's HDF5;
+    // Now query some things about the file.
+    _fileOpen := true;
+	_mode := MODE_READWRITE;
+    _openMode := mode;
+    resetStats();
+
+    status := 0;
+    status += H5LTget_attribute_int(_h5file, '/', 'SHAPE', @(shape[0]));
+    if (status < 0) then begin
+        writeln(stderr, 'ERROR: ',filename,' doesnt have SHAPE attribute');
+        exit;
+    end;
+    _nRows := shape[0];
+    _nCols := shape[1];
+
+    readTableNames();
+    openLookup();
+end;
+
+// Is the open file an OMX file? Checks the handle already open rather than
+// opening the file again.
+function TOMXMatrix.isOMX():Boolean;
+begin
+    result := _fileOpen and omxmatrix.isOMX(_h5file);
+end;
+
+// Pick up what a SWMR writer has written since the file was opened or last
+// refreshed: every open table's metadata is reloaded, its dataspace and the
+// matrix size are read again, and so are resident column copies.
+procedure TOMXMatrix.refresh();
+var
+    j, t:Integer;
+    table:string;
+    dims:array[0..1] of hsize_t;
+begin
+    if (not _fileOpen) then exit;
+
+    for j := 0 to _dataset_count-1 do begin
+        table := _dataset.Keys[j];
+        if (0 > H5.H5Drefresh(_dataset.Data[j])) then begin
+            writeln(stderr, 'ERROR: Couldnt refresh table ',table);
+            continue;
+        end;
+
+        // The cached dataspace still has the extent of the last refresh
+        t := _dataspace.IndexOf(table);
+        if (t < 0) then continue;
+        H5.H5Sclose(_dataspace.Data[t]);
+        _dataspace.Data[t] := H5.H5Dget_space(_dataset.Data[j]);
+        if (2 = H5.H5Sget_simple_extent_dims(_dataspace.Data[t], dims, Phsize_t(0))) then begin
+            _nRows := dims[0];
+            _nCols := dims[1];
+        end;
+    end;
+
+    for t := 1 to _nTables do begin
+        if (Length(_columns[t]) > 0) then begin
+            releaseColumns(_tableName[t]);
+            loadColumns(_tableName[t]);
+        end;
+    end;
+end;
+
+// SWMR writers: write buffered rows and make everything written so far
+// visible to readers. Elsewhere it just writes buffered rows.
+procedure TOMXMatrix.flush();
+begin
+    if (not _fileOpen) then exit;
+    flushWrites();
+    if (_openMode = OMX_OPEN_SWMR_WRITE) then begin
+        if (0 > H5.H5Fflush(_h5file, H5F_SCOPE_LOCAL)) then begin
+            writeln(stderr, 'ERROR: Couldnt flush file');
+        end;
+    end;
+end;
+
+function TOMXMatrix.getRows():Integer;
+begin
+    result:= _nRows;
+end;
+
+function TOMXMatrix.getCols() :Integer;
+begin
+    result:= _nCols;
+end;
+
+function TOMXMatrix.getTables() :Integer;
+begin
+    result:= _nTables;
+end;
+
+function TOMXMatrix.getTableName( table:Integer):String;
+begin
+    result:= _tableName[table];
+end;
+
+function TOMXMatrix.getTableHandle( table:String):TOMXTable;
+begin
+    result.dataset := tableDataset(table);
+    result.dataspace := _dataspace[table];
+    result.dtype := _std_dtype;
+    result.index := _tableLookup[table];
+end;
+
+function TOMXMatrix.getTableHandle( table:Integer):TOMXTable;
+begin
+    if (table < 1) or (table > _nTables) then begin
+        Raise NoSuchTableException.Create('table ' + IntToStr(table));
+    end;
+    result := getTableHandle(_tableName[table]);
+end;
+
+procedure TOMXMatrix.getRow ( table:String;  row:Integer; rowptr:Pointer);
+begin
+    // Does this table exist?
+    if (_tableLookup.IndexOf(table)<0) then begin
+        Raise MatrixReadException.Create('matrix read error') ;
+    end;
+    getRow(getTableHandle(table), row, rowptr);
+end;
+
+procedure TOMXMatrix.getRow( const h:TOMXTable; row:Integer; rowptr:Pointer);
+begin
+    transferRows(h, row, 1, rowptr, false);
+end;
+
+procedure TOMXMatrix.getCol( table:String;  col:Integer; colptr:Pointer);
+begin
+	// Does this table exist?
+	if (_tableLookup.IndexOf(table) < 0) then begin
+		Raise MatrixReadException.Create('matrix read error');
+	end;
+	getCol(getTableHandle(table), col, colptr);
+end;
+
+procedure TOMXMatrix.getCol( const h:TOMXTable; col:Integer; colptr:Pointer);
+var
+	data_count:array[0..1] of hsize_t;
+	data_offset:array[0..1] of hsize_t;
+	status:herr_t;
+	start:Double;
+begin
+	if (col < 1) or (col > _nCols) then begin
+		Raise InvalidOperationException.Create('column ' + IntToStr(col) + ' outside 1-' + IntToStr(_nCols));
+	end;
+
+	// Rows still in the write buffer must reach the file first
+	if (_writeBuffered > 0) then begin
+		flushBlock(h.index);
+	end;
+
+	// Served from the resident column-major copy if there is one
+	if (Length(_columns[h.index]) > 0) then begin
+		Move(_columns[h.index][Int64(col - 1) * _nRows * (std_dtype div 8)], colptr^, _nRows * (std_dtype div 8));
+		if (_statsOn) then Inc(_stats[h.index].residentCols);
+		exit;
+	end;
+
+	data_count[0] := _nRows;
+	data_count[1] := 1;
+	data_offset[0] := 0;
+	data_offset[1] := col - 1;
+
+	// Define MEMORY slab (using data_count since we don't want to read zones+1 values!)
+	if (_colspace < 0) then begin
+		_colspace := H5.H5Screate_simple(2, data_count, Phsize_t(0));
+	end;
+
+	// Define DATA slab
+	if (0 > H5.H5Sselect_hyperslab(h.dataspace, H5S_SELECT_SET, data_offset, Phsize_t(0), data_count, Phsize_t(0))) then begin
+		writeln(stderr, 'ERROR: Couldnt select DATA subregion for table ',_tableName[h.index],', subcol ',
+			col);
+		exit;
+	end;
+
+	// Read the data!
+	if (_statsOn) then start := statsClock();
+	status := H5.H5Dread(h.dataset, h.dtype, _colspace, h.dataspace, H5P_DEFAULT, colptr);
+	if (_statsOn) then countTransfer(h.index, false, 0, 1, statsClock() - start);
+	if (0 > status) then begin
+		writeln(stderr, 'ERROR: Couldnt read table ',_tableName[h.index],', subcol ', col);
+		exit;
+	end;
+end;
+
+procedure TOMXMatrix.getRows( table:String; firstRow:Integer; count:Integer; buffer:Pointer);
+begin
+    transferRows(getTableHandle(table), firstRow, count, buffer, false);
+end;
+
+procedure TOMXMatrix.getRows( const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer);
+begin
+    transferRows(h, firstRow, count, buffer, false);
+end;
+
+procedure TOMXMatrix.readTable( table:String; buffer:Pointer);
+begin
+    transferRows(getTableHandle(table), 1, _nRows, buffer, false);
+end;
+
+procedure TOMXMatrix.readTable( const h:TOMXTable; buffer:Pointer);
+begin
+    transferRows(h, 1, _nRows, buffer, false);
+end;
+
+procedure TOMXMatrix.getRowMulti( const tables:array of string; row:Integer; const buffers:array of Pointer);
+begin
+    getRowsMulti(tables, row, 1, buffers);
+end;
+
+procedure TOMXMatrix.getRowMulti( const tables:array of TOMXTable; row:Integer; const buffers:array of Pointer);
+begin
+    getRowsMulti(tables, row, 1, buffers);
+end;
+
+procedure TOMXMatrix.getRowsMulti( const tables:array of string; firstRow:Integer; count:Integer; const buffers:array of Pointer);
+var
+    handles:array of TOMXTable;
+    i:Integer;
+begin
+    SetLength(handles, Length(tables));
+    for i := 0 to High(tables) do begin
+        handles[i] := getTableHandle(tables[i]);
+    end;
+    getRowsMulti(handles, firstRow, count, buffers);
+end;
+
+procedure TOMXMatrix.getRowsMulti( const tables:array of TOMXTable; firstRow:Integer; count:Integer; const buffers:array of Pointer);
+var
+    memspace:hid_t;
+    i:Integer;
+begin
+    if (Length(tables) <> Length(buffers)) then begin
+        Raise InvalidOperationException.Create(IntToStr(Length(tables)) + ' tables but '
+                                               + IntToStr(Length(buffers)) + ' buffers');
+    end;
+    if (count < 1) or (Length(tables) = 0) then exit;
+    checkRows(firstRow, count);
+
+    if (_writeBuffered > 0) then begin
+        flushWrites();
+    end;
+
+    memspace := rowsMemspace(count);
+    for i := 0 to High(tables) do begin
+        transferBlock(tables[i], firstRow, count, buffers[i], false, memspace);
+    end;
+    if (count > 1) then begin
+        H5.H5Sclose(memspace);
+    end;
+end;
+
+procedure TOMXMatrix.forEachRow( const tables:array of TOMXTable; proc:TOMXRowProc; data:Pointer);
+var
+    blocks:array of array of Byte;
+    buffers, rowptrs:array of Pointer;
+    blockRows, rowBytes, first, count, i, j:Integer;
+begin
+    if (Length(tables) = 0) then exit;
+
+    // Whole chunks of every table per block, within a memory budget
+    blockRows := streamRows(tables);
+    rowBytes := _nCols * (std_dtype div 8);
+
+    SetLength(blocks, Length(tables));
+    SetLength(buffers, Length(tables));
+    SetLength(rowptrs, Length(tables));
+    for j := 0 to High(tables) do begin
+        SetLength(blocks[j], Int64(blockRows) * rowBytes);
+        buffers[j] := @(blocks[j][0]);
+    end;
+
+    first := 1;
+    while (first <= _nRows) do begin
+        count := blockRows;
+        if (first + count - 1 > _nRows) then count := _nRows - first + 1;
+        getRowsMulti(tables, first, count, buffers);
+        for i := 0 to count-1 do begin
+            for j := 0 to High(tables) do begin
+                rowptrs[j] := @(blocks[j][Int64(i) * rowBytes]);
+            end;
+            proc(first + i, rowptrs, data);
+        end;
+        first := first + count;
+    end;
+end;
+
+function TOMXMatrix.getChunkRows( table:String):Integer;
+begin
+    result := getChunkRows(getTableHandle(table));
+end;
+
+function TOMXMatrix.getChunkRows( const h:TOMXTable):Integer;
+var
+    plist:hid_t;
+    chunk:array[0..1] of hsize_t;
+begin
+    plist := H5.H5Dget_create_plist(h.dataset);
+    if (H5.H5Pget_chunk(plist, 2, chunk) = 2) then begin
+        result := chunk[0];
+    end else begin
+        result := 1;   // contiguous layout, any block is aligned
+    end;
+    H5.H5Pclose(plist);
+end;
+
+procedure TOMXMatrix.closeFile;
+var
+        j:Integer;
+begin
+     if (_fileOpen=true) then begin
+        flushWrites();
+        if (_statsOn) and (_statsDump) then begin
+            dumpStats(stderr);
+        end;
+
+         if (_dataset_Count > 0) then begin
+          for j := 0 to _dataset_Count-1 do begin
+              H5.H5Dclose(_dataset.Data[J]);
+          end;
+        end;
+
+        if (_dataspace_Count > 0) then begin
+          for j := 0 to _dataspace_Count-1 do begin
+              H5.H5Sclose(_dataspace.Data[J]);
+          end;
+        end;
+
+        if (_memspace > -1 ) then begin
+            H5.H5Sclose(_memspace);
+            _memspace := -1;
+        end;
+        if (_colspace > -1 ) then begin
+            H5.H5Sclose(_colspace);
+            _colspace := -1;
+        end;
+
+        _dataset.clear();
+        _dataspace.clear();
+        _dataset_count := 0;
+        _dataspace_count := 0;
+        for j := 1 to MAX_TABLES do begin
+            _tableCacheSet[j] := false;
+            SetLength(_columns[j], 0);
+        end;
+        _residentTables := 0;
+
+        _zoneLookup := '';
+        SetLength(_zoneDirect, 0);
+        FreeAndNil(_zoneSparse);
+
+        H5.H5Fclose(_h5file);
+    end;
+    _fileOpen := false;
+end;
+
+// ---- Private functions ---------------------------------------------------
+
+function TOMXMatrix.openDataset( table:string):hid_t;
+var
+        tname: string;
+        dataset, plist, dtype, dapl, current: hid_t;
+        chunk:array[0..1] of hsize_t;
+        slots, bytes, wantSlots, wantBytes: size_t;
+        w0, wantW0: Double;
+        t:Integer;
+begin
+
+     tname := '/data/' + table;
+
+     dataset := H5.H5Dopen2(_h5file, PChar(tname), H5P_DEFAULT);
+    if (dataset < 0) then
+        raise InvalidOperationException.Create('nope');
+
+    t := 0;
+    if (_tableLookup.IndexOf(table) >= 0) then t := _tableLookup[table];
+    if (_statsOn) and (t > 0) then Inc(_stats[t].opens);
+
+    // Element type on disk; memory buffers may differ, HDF5 converts
+    dtype := H5.H5Dget_type(dataset);
+    if (t > 0) then begin
+        if (H5.H5Tget_class(dtype) <> H5T_FLOAT) then begin
+            writeln(stderr, 'WARNING: table ',table,' is not floating point; values are converted');
+        end;
+        _tableBits[t] := H5.H5Tget_size(dtype) * 8;
+    end;
+
+    // The chunk cache depends on the chunk shape, known only once open, and
+    // is fixed at open: reopen chunked tables whose cache should differ
+    // from the default one they were opened with.
+    plist := H5.H5Dget_create_plist(dataset);
+    if (H5.H5Pget_chunk(plist, 2, chunk) = 2) then begin
+        dapl := chunkCacheList(t, chunk[0], chunk[1], H5.H5Tget_size(dtype));
+        current := H5.H5Dget_access_plist(dataset);
+        H5.H5Pget_chunk_cache(current, @slots, @bytes, @w0);
+        H5.H5Pget_chunk_cache(dapl, @wantSlots, @wantBytes, @wantW0);
+        H5.H5Pclose(current);
+        if (slots <> wantSlots) or (bytes <> wantBytes) or (w0 <> wantW0) then begin
+            H5.H5Dclose(dataset);
+            dataset := H5.H5Dopen2(_h5file, PChar(tname), dapl);
+        end;
+        H5.H5Pclose(dapl);
+    end;
+    H5.H5Pclose(plist);
+    H5.H5Tclose(dtype);
+
+    result:= dataset;
+end;
+
+// Dataset access property list with the chunk cache for table t (0 when
+// not a known table) whose chunks are chunkRows x chunkCols elements.
+function TOMXMatrix.chunkCacheList( t:Integer; chunkRows:hsize_t; chunkCols:hsize_t; elemSize:size_t):hid_t;
+var
+    cache:TOMXCacheOptions;
+    chunkBytes, bytes, slots:Int64;
+    w0:Double;
+begin
+    cache := _cache;
+    if (t >= 1) and (t <= MAX_TABLES) then begin
+        if (_tableCacheSet[t]) then cache := _tableCache[t];
+    end;
+
+    chunkBytes := Int64(chunkRows) * chunkCols * elemSize;
+    if (chunkBytes < 1) then chunkBytes := 1;
+
+    bytes := cache.tableBytes;
+    if (bytes <= 0) then begin
+        if (cache.access = OMX_ACCESS_COLUMNS) then begin
+            bytes := ((_nRows + chunkRows - 1) div chunkRows) * chunkBytes;
+        end else begin
+            bytes := ((_nCols + chunkCols - 1) div chunkCols) * chunkBytes;
+        end;
+        if (bytes < 1024*1024) then bytes := 1024*1024;   // HDF5's default
+        if (cache.fileBytes > 0) and (_nTables > 0) then begin
+            if (bytes > cache.fileBytes div _nTables) then bytes := cache.fileBytes div _nTables;
+        end;
+    end;
+
+    slots := cache.slots;
+    if (slots <= 0) then begin
+        slots := 100 * ((bytes + chunkBytes - 1) div chunkBytes);
+        if (slots < 521) then slots := 521;
+        slots := nextPrime(slots);
+    end;
+
+    w0 := cache.w0;
+    if (w0 < 0) then w0 := 0.75;
+
+    result := H5.H5Pcreate(H5.H5P_DATASET_ACCESS);
+    H5.H5Pset_chunk_cache(result, slots, bytes, w0);
+end;
+
+// Close a table's dataset and dataspace; the next access reopens them.
+procedure TOMXMatrix.forgetTable( table:string);
+var
+    i:Integer;
+begin
+    i := _dataset.IndexOf(table);
+    if (i >= 0) then begin
+        H5.H5Dclose(_dataset.Data[i]);
+        _dataset.Delete(i);
+        Dec(_dataset_count);
+    end;
+
+    i := _dataspace.IndexOf(table);
+    if (i >= 0) then begin
+        H5.H5Sclose(_dataspace.Data[i]);
+        _dataspace.Delete(i);
+        Dec(_dataspace_count);
+    end;
+end;
+
+// Dataset of a table, opening it and its dataspace on first use.
+function TOMXMatrix.tableDataset( table:string):hid_t;
+begin
+    if (_dataset.IndexOf(table) < 0) then begin
+        if (_tableLookup.IndexOf(table) < 0) then begin
+            Raise NoSuchTableException.Create(table);
+        end;
+        _dataset[table] := openDataset(table);
+        Inc(_dataset_count);
+    end;
+
+    if (_dataspace.IndexOf(table) < 0) then begin
+        _dataspace[table] := H5.H5Dget_space(_dataset[table]);
+        Inc(_dataspace_count);
+    end;
+
+    result := _dataset[table];
+end;
+
+// Read or write count whole rows from firstRow with one hyperslab selection
+// and a memory space of exactly that size.
+procedure TOMXMatrix.transferRows( const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer; writing:Boolean);
+var
+    memspace:hid_t;
+begin
+    if (count < 1) then exit;
+    if (writing) then begin
+        checkWritable();
+    end;
+    checkRows(firstRow, count);
+
+    // Buffered rows of this table are older than this transfer
+    if (_writeBuffered > 0) then begin
+        flushBlock(h.index);
+    end;
+
+    memspace := rowsMemspace(count);
+    transferBlock(h, firstRow, count, buffer, writing, memspace);
+    if (count > 1) then begin
+        H5.H5Sclose(memspace);
+    end;
+end;
+
+// Single rows share one memory space; blocks get one of their size, which
+// the caller closes
+function TOMXMatrix.rowsMemspace( count:Integer):hid_t;
+var
+    block_count:array[0..1] of hsize_t;
+begin
+    block_count[0] := count;
+    block_count[1] := _nCols;
+    if (count = 1) then begin
+        if (_memspace < 0) then begin
+            _memspace := H5.H5Screate_simple(2, block_count, Phsize_t(0));
+        end;
+        result := _memspace;
+    end else begin
+        result := H5.H5Screate_simple(2, block_count, Phsize_t(0));
+    end;
+end;
+
+procedure TOMXMatrix.checkRows( firstRow:Integer; count:Integer);
+begin
+    if (firstRow < 1) or (firstRow + count - 1 > _nRows) then begin
+        Raise InvalidOperationException.Create('rows ' + IntToStr(firstRow) + '-' + IntToStr(firstRow + count - 1)
+                                               + ' outside 1-' + IntToStr(_nRows));
+    end;
+end;
+
+procedure TOMXMatrix.transferBlock( const h:TOMXTable; firstRow:Integer; count:Integer; buffer:Pointer; writing:Boolean;
+                                    memspace:hid_t);
+var
+    block_count, block_offset:array[0..1] of hsize_t;
+    status:herr_t;
+    i:Integer;
+    start:Double;
+begin
+    block_count[0] := count;
+    block_count[1] := _nCols;
+    block_offset[0] := firstRow-1;
+    block_offset[1] := 0;
+
+    if (0 > H5.H5Sselect_hyperslab(h.dataspace, H5S_SELECT_SET, block_offset, Phsize_t(0), block_count, Phsize_t(0))) then begin
+        writeln(stderr, 'ERROR: Couldnt select DATA subregion for table ',_tableName[h.index],', rows ',firstRow,'-',firstRow+count-1);
+        exit;
+    end;
+
+    if (_statsOn) then start := statsClock();
+    if (writing) then begin
+        status := H5.H5Dwrite(h.dataset, h.dtype, memspace, h.dataspace, H5P_DEFAULT, buffer);
+    end else begin
+        status := H5.H5Dread(h.dataset, h.dtype, memspace, h.dataspace, H5P_DEFAULT, buffer);
+    end;
+    if (_statsOn) then countTransfer(h.index, writing, count, 0, statsClock() - start);
+
+    if (writing) and (_residentTables > 0) then begin
+        for i := 0 to count-1 do begin
+            scatterRow(h.index, firstRow + i, @(PByte(buffer)[Int64(i) * _nCols * (std_dtype div 8)]));
+        end;
+    end;
+
+    if (0 > status) then begin
+        if (writing) then begin
+            writeln(stderr, 'ERROR: writing table ',_tableName[h.index],', rows ',firstRow,'-',firstRow+count-1);
+        end else begin
+            writeln(stderr, 'ERROR: Couldnt read table ',_tableName[h.index],', rows ',firstRow,'-',firstRow+count-1);
+        end;
+    end;
+end;
+
+procedure TOMXMatrix.checkWritable();
+begin
+    if (_openMode <> OMX_OPEN_READWRITE) and (_openMode <> OMX_OPEN_SWMR_WRITE) then begin
+        Raise InvalidOperationException.Create('file is open read-only');
+    end;
+end;
+
+// File access property list for an OMX_STORAGE_* kind, for SWMR writing if
+// swmr is set; the caller closes it unless it is H5P_DEFAULT.
+function TOMXMatrix.fileAccessList( storage:Integer; swmr:Boolean):hid_t;
+begin
+    if (swmr) and (storage <> OMX_STORAGE_DISK) then begin
+        Raise InvalidOperationException.Create('SWMR writing needs a file on disk');
+    end;
+    case storage of
+        OMX_STORAGE_DISK: result := H5P_DEFAULT;
+        OMX_STORAGE_MEMORY, OMX_STORAGE_SCRATCH: begin
+            result := H5.H5Pcreate(H5.H5P_FILE_ACCESS);
+            H5.H5Pset_fapl_core(result, CORE_INCREMENT, storage = OMX_STORAGE_MEMORY);
+        end;
+    else
+        Raise InvalidOperationException.Create('unknown storage ' + IntToStr(storage));
+    end;
+
+    // SWMR needs the 1.10 file format throughout
+    if (swmr) then begin
+        result := H5.H5Pcreate(H5.H5P_FILE_ACCESS);
+        H5.H5Pset_libver_bounds(result, H5F_libver_t(LIBVER_V110), H5F_libver_t(LIBVER_V110));
+    end;
+end;
+
+// Copy a row into its table's block, writing the block once all its rows
+// are present. A block for a different range is flushed first; blocks of
+// other tables are flushed as needed to stay within _writeBudget.
+procedure TOMXMatrix.bufferRow( const h:TOMXTable; row:Integer; rowptr:Pointer);
+var
+    t, i, chunkRows, rowBytes:Integer;
+    blockBytes:Int64;
+begin
+    if (row < 1) or (row > _nRows) then begin
+        Raise InvalidOperationException.Create('row ' + IntToStr(row) + ' outside 1-' + IntToStr(_nRows));
+    end;
+    t := h.index;
+    rowBytes := _nCols * (std_dtype div 8);
+
+    if (_rowBlock[t].firstRow > 0) and ((row < _rowBlock[t].firstRow) or
+                                        (row >= _rowBlock[t].firstRow + _rowBlock[t].rows)) then begin
+        flushBlock(t);
+    end;
+
+    if (_rowBlock[t].firstRow = 0) then begin
+        chunkRows := getChunkRows(h);
+        _rowBlock[t].firstRow := ((row - 1) div chunkRows) * chunkRows + 1;
+        _rowBlock[t].rows := chunkRows;
+        if (_rowBlock[t].firstRow + chunkRows - 1 > _nRows) then begin
+            _rowBlock[t].rows := _nRows - _rowBlock[t].firstRow + 1;
+        end;
+        blockBytes := Int64(_rowBlock[t].rows) * rowBytes;
+
+        i := 1;
+        while (_writeBuffered + blockBytes > _writeBudget) and (i <= MAX_TABLES) do begin
+            if (i <> t) then flushBlock(i);
+            Inc(i);
+        end;
+        if (_writeBuffered + blockBytes > _writeBudget) then begin
+            // A single block is over budget: write this row through
+            _rowBlock[t].firstRow := 0;
+            transferRows(h, row, 1, rowptr, true);
+            exit;
+        end;
+
+        SetLength(_rowBlock[t].data, blockBytes);
+        SetLength(_rowBlock[t].present, _rowBlock[t].rows);
+        for i := 0 to _rowBlock[t].rows-1 do begin
+            _rowBlock[t].present[i] := false;
+        end;
+        _rowBlock[t].filled := 0;
+        _writeBuffered := _writeBuffered + blockBytes;
+    end;
+
+    i := row - _rowBlock[t].firstRow;
+    Move(rowptr^, _rowBlock[t].data[i * rowBytes], rowBytes);
+    if (not _rowBlock[t].present[i]) then begin
+        _rowBlock[t].present[i] := true;
+        Inc(_rowBlock[t].filled);
+    end;
+
+    if (_rowBlock[t].filled = _rowBlock[t].rows) then begin
+        flushBlock(t);
+    end;
+end;
+
+// Write the buffered rows of table t, one H5Dwrite per run of consecutive
+// rows, and release the block.
+procedure TOMXMatrix.flushBlock( t:Integer);
+var
+    block:TRowBlock;
+    i, run, rowBytes:Integer;
+begin
+    if (_rowBlock[t].firstRow = 0) then exit;
+
+    // Detach the block first; transferRows flushes pending rows itself
+    block := _rowBlock[t];
+    _rowBlock[t].firstRow := 0;
+    SetLength(_rowBlock[t].data, 0);
+    SetLength(_rowBlock[t].present, 0);
+    _writeBuffered := _writeBuffered - Length(block.data);
+
+    rowBytes := _nCols * (std_dtype div 8);
+    i := 0;
+    while (i < block.rows) do begin
+        if (block.present[i]) then begin
+            run := 1;
+            while (i + run < block.rows) and (block.present[i + run]) do begin
+                Inc(run);
+            end;
+            transferRows(getTableHandle(_tableName[t]), block.firstRow + i, run, @(block.data[i * rowBytes]), true);
+            i := i + run;
+        end else begin
+            Inc(i);
+        end;
+    end;
+end;
+
+// Store one row into the resident column-major copy of table t, if any.
+procedure TOMXMatrix.scatterRow( t:Integer; row:Integer; rowptr:Pointer);
+var
+    c:Integer;
+begin
+    if (Length(_columns[t]) = 0) then exit;
+    if (std_dtype = 32) then begin
+        for c := 0 to _nCols-1 do begin
+            PtrFloat(@(_columns[t][0]))[Int64(c) * _nRows + row - 1] := PtrFloat(rowptr)[c];
+        end;
+    end else begin
+        for c := 0 to _nCols-1 do begin
+            PtrDouble(@(_columns[t][0]))[Int64(c) * _nRows + row - 1] := PtrDouble(rowptr)[c];
+        end;
+    end;
+end;
+
+//
+// Group traversal function. Build list of tablenames from this.
+//
+
+type POMXMatrix = ^TOMXMatrix;
+
+type T_LeafInfoFunc = function ( loc_id:hid_t;name:PChar; info:PH5L_info_t; opdata:Pointer):herr_t; CDecl;
+
+
+function _leaf_info( loc_id:hid_t;name:PChar; info:PH5L_info_t; opdata:Pointer) : herr_t;  CDecl;
+var
+        m : TOMXMatrix;
+begin
+    m := POMXMatrix(opdata)^;
     m._nTables := m._nTables +1;
     m._tableName[m._nTables] := name;
     m._tableLookup[name] := m._nTables;
@@ -757,7 +2692,7 @@ end;
 
 
 
-procedure TOMXMatrix.init_tables (tableNames:array of string);
+procedure TOMXMatrix.init_tables (tableNames:array of string; options:TOMXCreateOptions);
 var
     dims       :array[0..1] of hsize_t ;
     plist      :hid_t   ;
@@ -769,27 +2704,32 @@ var
     tpath, tname: String;
     ptpath:PChar;
     temp_hid : hid_t;
+    dapl       :hid_t;
 begin
 
     dims[0] := _nRows;
     dims[1] := _nCols;
 
-    fillvalue[0] := 0.0;
-    chunksize[0] := 5; // a few rows at a time, instead of just one
-    chunksize[1] := _nCols;
-    //if (_nCols > 5000) then begin
-    //   chunksize[1] := 4000;
-    //end else begin
-    //   chunksize[1] := _nCols;
-    //end;
+    fillvalue[0] := options.fillValue;
+    chunksize[0] := options.chunkRows;
+    chunksize[1] := options.chunkCols;
+    if (chunksize[0] < 1) or (chunksize[0] > dims[0]) then chunksize[0] := dims[0];
+    if (chunksize[1] < 1) or (chunksize[1] > dims[1]) then chunksize[1] := dims[1];
 
     dataspace := H5.H5Screate_simple(2,dims, nil);
+    dapl := chunkCacheList(0, chunksize[0], chunksize[1], std_dtype div 8);
 
-    // Use a row-chunked, zip-compressed data format:
+    // Chunked layout; shuffle has to precede deflate in the filter pipeline
     plist := H5.H5Pcreate(H5.H5P_DATASET_CREATE);
     rtn := H5.H5Pset_chunk(plist, 2, chunksize);
-    rtn := H5.H5Pset_deflate(plist, 1);
-    rtn := H5.H5Pset_fill_value(plist, _std_dtype, @(fillvalue[0]));
+    if (options.shuffle) then begin
+        rtn := H5.H5Pset_shuffle(plist);
+    end;
+    if (options.deflate <> OMX_NO_DEFLATE) then begin
+        rtn := H5.H5Pset_deflate(plist, options.deflate);
+    end;
+    // fillvalue is a double whatever the table type; HDF5 converts it
+    rtn := H5.H5Pset_fill_value(plist, H5.H5T_NATIVE_DOUBLE, @(fillvalue[0]));
 
     // Loop on all tables
     for t := 0 to Length(tableNames)-1 do begin
@@ -799,49 +2739,272 @@ begin
 
         // Create a dataset for each table
         temp_hid := H5.H5Dcreate2(_h5file, ptpath, _std_dtype,
-                                  dataspace, H5P_DEFAULT, plist, H5P_DEFAULT);
+                                  dataspace, H5P_DEFAULT, plist, dapl);
         if (temp_hid<0) then begin
             writeln(stderr, 'Error creating dataset ',tpath);
             exit;
         end;
         _dataset[tname] := temp_hid;
+        Inc(_dataset_count);
 
         // Save the something somewhere
         _tableLookup[tname] := t+1;
-        _tableName[t+1] := tname
+        _tableName[t+1] := tname;
+        _tableBits[t+1] := std_dtype;
     end;
 
+    rtn := H5.H5Pclose(dapl);
     rtn := H5.H5Pclose(plist);
     rtn := H5.H5Sclose(dataspace);
 end;
 
+function OMXCacheOptions( access:Integer):TOMXCacheOptions;
+begin
+    result.fileBytes := CACHE_FILE_BYTES;
+    result.tableBytes := 0;
+    result.slots := 0;
+    result.w0 := -1.0;
+    result.access := access;
+end;
+
+function OMXRowOptions():TOMXCreateOptions;
+begin
+    result.chunkRows := CHUNK_ROWS; // a few rows at a time, instead of just one
+    result.chunkCols := 0;
+    result.shuffle := false;
+    result.deflate := 1;
+    result.fillValue := 0.0;
+    result.storage := OMX_STORAGE_DISK;
+    result.swmr := false;
+end;
+
+function OMXColumnOptions():TOMXCreateOptions;
+begin
+    result := OMXRowOptions();
+    result.chunkRows := 0;
+    result.chunkCols := CHUNK_ROWS;
+end;
+
+function OMXTileOptions():TOMXCreateOptions;
+begin
+    result := OMXRowOptions();
+    result.chunkRows := 256;   // 512 KB of doubles, fits the default chunk cache
+    result.chunkCols := 256;
+    result.shuffle := true;
+end;
+
+//Read-ahead ------------------------------------------------------------------
+
+type
+    TRowReaderThread = class(TThread)
+    private
+        _reader:TOMXRowReader;
+    protected
+        procedure Execute(); override;
+    public
+        constructor Create(reader:TOMXRowReader);
+    end;
+
+constructor TRowReaderThread.Create(reader:TOMXRowReader);
+begin
+    _reader := reader;
+    inherited Create(false);
+end;
+
+procedure TRowReaderThread.Execute();
+begin
+    _reader.readAhead();
+end;
+
+constructor TOMXRowReader.Create(matrix:TOMXMatrix; table:string; depth:Integer);
+begin
+    Create(matrix, matrix.getTableHandle(table), depth);
+end;
+
+constructor TOMXRowReader.Create(matrix:TOMXMatrix; const h:TOMXTable; depth:Integer);
+var
+    i, blockRows:Integer;
+begin
+    _matrix := matrix;
+    _table := h;
+    if (depth < 2) then depth := 2;
+
+    // Pending writes must be in the file before the thread reads it
+    _matrix.flushWrites();
+
+    // Whole chunks per block, and at least CHUNK_ROWS rows
+    blockRows := _matrix.getChunkRows(h);
+    blockRows := ((CHUNK_ROWS + blockRows - 1) div blockRows) * blockRows;
+    SetLength(_slots, depth);
+    for i := 0 to depth-1 do begin
+        SetLength(_slots[i].data, Int64(blockRows) * _matrix.getCols() * (_matrix.std_dtype div 8));
+        _slots[i].rows := blockRows;
+    end;
+
+    _lock := TCriticalSection.Create();
+    _dataReady := TEvent.Create(nil, true, false, '');
+    _spaceFree := TEvent.Create(nil, true, false, '');
+    _filled := 0;
+    _done := false;
+    _stop := false;
+    _ended := false;
+    _error := '';
+    _current := -1;
+    _rowInSlot := 0;
+
+    _thread := TRowReaderThread.Create(self);
+end;
+
+destructor TOMXRowReader.Destroy();
+begin
+    if (_thread <> nil) then begin
+        _lock.Acquire();
+        _stop := true;
+        _spaceFree.SetEvent();
+        _lock.Release();
+        _thread.WaitFor();
+        _thread.Free();
+    end;
+    _dataReady.Free();
+    _spaceFree.Free();
+    _lock.Free();
+    inherited Destroy();
+end;
+
+// Runs on the I/O thread: fill slots in ring order, one block per slot,
+// waiting whenever every slot holds rows the caller has not reached yet.
+procedure TOMXRowReader.readAhead();
+var
+    tail, first, count, blockRows:Integer;
+begin
+    tail := 0;
+    first := 1;
+    blockRows := _slots[0].rows;
+    try
+        while (first <= _matrix.getRows()) do begin
+            _lock.Acquire();
+            if (_stop) then begin
+                _lock.Release();
+                break;
+            end;
+            if (_filled = Length(_slots)) then begin
+                _spaceFree.ResetEvent();
+                _lock.Release();
+                _spaceFree.WaitFor(INFINITE);
+                continue;
+            end;
+            _lock.Release();
+
+            count := blockRows;
+            if (first + count - 1 > _matrix.getRows()) then count := _matrix.getRows() - first + 1;
+            _matrix.getRows(_table, first, count, @(_slots[tail].data[0]));
+            _slots[tail].firstRow := first;
+            _slots[tail].rows := count;
+
+            _lock.Acquire();
+            Inc(_filled);
+            _dataReady.SetEvent();
+            _lock.Release();
+
+            tail := (tail + 1) mod Length(_slots);
+            first := first + count;
+        end;
+    except
+        on e:Exception do begin
+            _error := e.Message;
+        end;
+    end;
+
+    _lock.Acquire();
+    _done := true;
+    _dataReady.SetEvent();
+    _lock.Release();
+end;
+
+function TOMXRowReader.nextRow(out row:Integer; out rowptr:Pointer):Boolean;
+var
+    rowBytes:Integer;
+begin
+    result := false;
+    row := 0;
+    rowptr := nil;
+    if (_ended) then exit;
+
+    if (_current >= 0) then begin
+        Inc(_rowInSlot);
+        if (_rowInSlot >= _slots[_current].rows) then begin
+            // Hand the finished slot back to the I/O thread
+            _lock.Acquire();
+            Dec(_filled);
+            _spaceFree.SetEvent();
+            _lock.Release();
+            _current := (_current + 1) mod Length(_slots);
+            _rowInSlot := -1;
+        end;
+    end else begin
+        _current := 0;
+        _rowInSlot := -1;
+    end;
+
+    if (_rowInSlot < 0) then begin
+        _lock.Acquire();
+        while (_filled = 0) and (not _done) do begin
+            _dataReady.ResetEvent();
+            _lock.Release();
+            _dataReady.WaitFor(INFINITE);
+            _lock.Acquire();
+        end;
+        if (_filled = 0) then begin
+            _lock.Release();
+            _ended := true;
+            if (_error <> '') then begin
+                Raise MatrixReadException.Create(_error);
+            end;
+            exit;
+        end;
+        _lock.Release();
+        _rowInSlot := 0;
+    end;
+
+    rowBytes := _matrix.getCols() * (_matrix.std_dtype div 8);
+    row := _slots[_current].firstRow + _rowInSlot;
+    rowptr := @(_slots[_current].data[Int64(_rowInSlot) * rowBytes]);
+    result := true;
+end;
+
 function isOMX(filename:string):Boolean;
 var
 	answer:htri_t;
 	f:hid_t;
-	exists:herr_t;
 begin
+	result := false;
 	answer := H5.H5Fis_hdf5(PChar(filename));
 	if (answer <= 0) then begin
-           result:= false;
            exit;
         end;
 
 	// It's HDF5; is it OMX?
 	f := H5.H5Fopen(PChar(filename), H5F_ACC_RDONLY, H5P_DEFAULT);
-	exists := H5LT_find_attribute(f, 'OMX_VERSION');
-
-	//don't actually care what OMX version it is, yet...
-	//char version[255];
-	//int status = H5LTget_attribute_string(f,"/","OMX_VERSION", version);
+	if (f < 0) then exit;
+	result := isOMX(f);
 	H5.H5Fclose(f);
 
-	if (exists = 0)  then begin
+	if (not result)  then begin
 		writeln(stderr, '\n** ',filename,' is HDF5, but is not a valid OMX file.' );
-		exit;
 	end;
+end;
 
-	result:= true;
+// The same check on a file that is already open
+function isOMX(f:hid_t):Boolean;
+var
+	exists:herr_t;
+begin
+	exists := H5LT_find_attribute(f, 'OMX_VERSION');
+
+	//don't actually care what OMX version it is, yet...
+	//char version[255];
+	//int status = H5LTget_attribute_string(f,"/","OMX_VERSION", version);
+	result := (exists > 0);
 end;
 
 
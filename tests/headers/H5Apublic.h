@@ -0,0 +1,9 @@
+#ifndef _H5Apublic_H
+#define _H5Apublic_H
+
+#include "H5Ipublic.h"
+
+H5_DLL hid_t H5Aopen(hid_t obj_id, const char *attr_name, hid_t aapl_id);
+H5_DLL herr_t H5Aclose(hid_t attr_id);
+
+#endif
@@ -0,0 +1,10 @@
+#ifndef _H5Ipublic_H
+#define _H5Ipublic_H
+
+#include "H5public.h"
+
+typedef int64_t hid_t;
+
+H5_DLL int H5Iget_ref(hid_t id);
+
+#endif
@@ -0,0 +1,16 @@
+#ifndef _H5public_H
+#define _H5public_H
+
+#include "H5Ipublic.h"
+
+/* Version numbers */
+#define H5_VERS_MAJOR	1	/* For major interface/format changes  	     */
+#define H5_VERS_MINOR	10	/* For minor interface/format changes  	     */
+
+typedef int herr_t;
+typedef unsigned long long 	hsize_t;
+
+H5_DLL herr_t H5open(void);
+H5_DLL herr_t H5get_libversion(unsigned *majnum, unsigned *minnum, unsigned *relnum);
+
+#endif
@@ -0,0 +1,8 @@
+#ifndef _HDF5_H
+#define _HDF5_H
+
+#include "H5public.h"
+#include "H5Apublic.h"
+#include "H5Ipublic.h"
+
+#endif